@@ -1,204 +1,313 @@
-import re
-import os
-import pandas as pd
-#import odfpy
-import random
-
-
-# Path to your file
-FILE_PATH = r"C:\Users\user\Documents\GitHub\Situations_Resolutions\Situations-n-Resolutions-with-sections.xlsx"
-
-def display_card(row):
-    """Helper function to display a situation and wait for the resolution."""
-    print(f"\n--- SECTION: {row['Section']}  #{row['Number']} ---")
-    print(f"Situation:")
-    print(f"\n{row['Situation']}")
-    
-    input("\n[Press Enter to see the Resolution...]")
-    
-    print("\n" + "-"*30)
-    print(f"\n--- SECTION: {row['Section']}  #{row['Number']} ---")
-    print(f"RECOMMENDED RESOLUTION:")
-    print(f"{row['Recommended resolution']}")
-    print(f"\nAPPLICABLE RULE: {row['Applicable Rule']}")
-    print("-"*30)
-
-def get_section_choice(df):
-    """Helper to let user pick a section from the list."""
-    sections = sorted(df['Section'].dropna().unique())
-    print("\nAvailable Sections:")
-    for i, section in enumerate(sections, 1):
-        print(f"{i}. {section}")
-    
-    while True:
-        choice = input("\nSelect a Section number (or 'b' to go back): ").strip().lower()
-        if choice == 'b': return None
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(sections):
-                return sections[idx]
-            print("Invalid number.")
-        except ValueError:
-            print("Please enter a valid number.")
-
-# --- MODE 1: Review BY SECTION (Continuous Study) ---
-def mode_review_by_section(df):
-    selected_section = get_section_choice(df)
-    
-    # If user didn't pick a section (hit 'b'), go back to Main Menu
-    if not selected_section:
-        return 
-
-    while True:
-        # Filter and pick a random row
-        section_df = df[df['Section'] == selected_section]
-        random_row = section_df.sample(n=1).iloc[0]
-        
-        # Show the situation and resolution
-        display_card(random_row)
-        
-        # Navigation prompt
-        print(f"\nCurrently Studying: {selected_section}")
-        choice = input("Enter: Next random situation | 's': Change section | 'm': Main Menu: ").strip().lower()
-        
-        if choice == 'm':
-            break  # Exit to Main Menu
-        
-        elif choice == 's':
-            # Let them pick a new section without leaving Mode 1
-            new_section = get_section_choice(df)
-            if new_section:
-                selected_section = new_section
-                continue
-            else:
-                break # If they hit 'b' in the section menu, go back to Main Menu
-        
-        # If they just hit Enter, the loop repeats with the current selected_section
-
-# --- MODE 2: SEQUENTIAL REVIEW (Continuous) ---
-def mode_sequential_review(df):
-    while True:
-        selected_section = get_section_choice(df)
-        
-        # If user hits 'b' in the section list, go back to Main Menu
-        if not selected_section:
-            break
-
-        # Sort values by 'Number' to ensure they appear in order (1, 2, 3...)
-        section_df = df[df['Section'] == selected_section].sort_values(by='Number')
-        print(f"\n--- Starting sequential review of: {selected_section} ---")
-        
-        for _, row in section_df.iterrows():
-            display_card(row)
-            
-            print(f"\n[Studying: {selected_section}]")
-            choice = input("Enter: Next Item | 's': Switch Section | 'm': Main Menu: ").strip().lower()
-            
-            if choice == 'm':
-                return  # Exit the function entirely back to Main Menu
-            
-            if choice == 's':
-                break  # Exit the row loop to choose a different section
-        
-        else:
-            # This triggers only if the 'for' loop finishes naturally (reached the end)
-            print(f"\n*** You have completed all situations in {selected_section}! ***")
-            input("[Press Enter to return to Section Selection]")
-
-# --- MODE 3: REVIEW SPECIFIC NUMBER (Continuous Search) ---
-def mode_specific_number(df):
-    while True:
-        print("\n" + "-"*40)
-        num_choice = input("Enter Situation # to Find | 'm' for Main Menu): ").strip().lower()
-        
-        # Exit condition
-        if num_choice == 'm':
-            break
-            
-        # Filter by the 'Number' column
-        # Converting both to string ensures a match even if Excel loaded them as integers
-        """A Minor "Safety" Suggestion
-        In Mode 3 (Search by Number), since you're converting everything to strings for comparison, 
-        users might accidentally type something like 12.0 or add a space. To make it even more robust, 
-        you can use .str.strip() during the comparison.
-        Here is that one specific line updated for better "user-proofing":"""
-        # Updated filter in Mode 3
-        results = df[df['Number'].astype(str).str.strip() == num_choice.strip()]
-        
-        if results.empty:
-            print(f"\n[!] No situation found with Number: {num_choice}")
-            print("Please try a different number.")
-        else:
-            # Since you confirmed numbers are unique, we just take the first match
-            row = results.iloc[0]
-            display_card(row)
-            
-            # After viewing, the loop restarts to let them search for another number
-
-# --- MODE 4: TOTALLY RANDOM (Continuous Shuffle) ---
-def mode_totally_random(df):
-    count = 0
-    print("\n" + "!" * 40)
-    print("ENTERING TOTAL SHUFFLE MODE")
-    print("Picking random situations from all sections...")
-    print("!" * 40)
-
-    while True:
-        # Pick a random row from the entire dataframe
-        random_row = df.sample(n=1).iloc[0]
-        count += 1
-        
-        # Display the card
-        display_card(random_row)
-        
-        print(f"\n[Total reviewed this session: {count}]")
-        choice = input("Enter: Next random situation | 'm': Back to Main Menu: ").strip().lower()
-        
-        if choice == 'm':
-            print(f"Shuffle session ended. You reviewed {count} situations.")
-            break
-        
-        # If they hit Enter or anything else, the loop continues...
-
-# --- MAIN MANAGER ---
-def main_menu():
-    try:
-        # Load data once at the start
-        df = pd.read_excel(FILE_PATH)
-        df.dropna(subset=['Situation'])
-        df.columns = [c.strip() for c in df.columns] # Clean columns
-        
-        while True:
-            print("\n" + "="*50)
-            print("          USA SWIMMING OFFICIALS")
-            print("              Stroke & Turn")
-            print("         Situations and Resolutions")
-            print("="*50)
-            print("1. Review by Section (Random Item)")
-            print("2. Sequential Review (Item-by-Item)")
-            print("3. Search by Situation Number")
-            print("4. Total Random Shuffle")
-            print("Q. Quit")
-            print("="*50)
-            
-            choice = input("\nSelect a Mode: ").strip().lower()
-            
-            if choice == '1':
-                mode_review_by_section(df)
-            elif choice == '2':
-                mode_sequential_review(df)
-            elif choice == '3':
-                mode_specific_number(df)
-            elif choice == '4':
-                mode_totally_random(df)
-            elif choice == 'q':
-                print("Happy Officiating! See you on the deck.")
-                break
-            else:
-                print("Invalid selection. Please try again.")
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-if __name__ == "__main__":
-    main_menu()
+import argparse
+import os
+import sys
+
+from cards import load_cards
+from lookups import NumberIndex, ShuffleDecks, StrokePartitions
+from rule_index import RuleIndex
+
+
+# Path to your file (.xlsx, .ods or .csv), next to this script by default.
+# Same as dataset.DEFAULT_SOURCE, which isn't imported here because dataset.py imports pandas.
+FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Situations-n-Resolutions-with-sections.xlsx")
+
+# Escape sequences (POSIX) and scan codes (Windows) of the arrow keys
+_ARROWS = {"\x1b[C": "right", "\x1b[D": "left", "\x1bOC": "right", "\x1bOD": "left"}
+_WINDOWS_ARROWS = {"M": "right", "K": "left"}
+
+NEXT_KEYS = ("enter", " ", "n", "right")
+PREVIOUS_KEYS = ("p", "left")
+
+
+def read_key():
+    """Returns one keypress without waiting for Enter.
+
+    Letters come back lower-cased, Enter as "enter" and the arrow keys as
+    "left" / "right". When input is piped rather than typed, reads a line and
+    returns its first character instead.
+    """
+    if not sys.stdin.isatty():
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError
+        return line.strip().lower()[:1] or "enter"
+
+    if os.name == "nt":
+        import msvcrt
+        key = msvcrt.getwch()
+        if key in ("\x00", "\xe0"):
+            return _WINDOWS_ARROWS.get(msvcrt.getwch(), "")
+    else:
+        import termios
+        import tty
+        fd = sys.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+        try:
+            # cbreak: keys arrive one at a time, Ctrl+C still interrupts
+            tty.setcbreak(fd)
+            # An arrow key arrives as one 3-byte escape sequence
+            key = os.read(fd, 8).decode("utf-8", errors="ignore")
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        if key.startswith("\x1b"):
+            return _ARROWS.get(key, "")
+
+    if key == "\x03":
+        raise KeyboardInterrupt
+    if key in ("\r", "\n"):
+        return "enter"
+    return key.lower()
+
+
+def prompt_key(text):
+    print(text, end=" ", flush=True)
+    key = read_key()
+    print()
+    return key
+
+
+def display_card(card):
+    """Helper function to display a situation and wait for the resolution."""
+    print(f"\n--- SECTION: {card.stroke}  #{card.number} ---")
+    print(f"Situation:")
+    print(f"\n{card.situation}")
+
+    prompt_key("\n[Press any key to see the Resolution...]")
+
+    print("-"*30)
+    print(f"\n--- SECTION: {card.stroke}  #{card.number} ---")
+    print(f"RECOMMENDED RESOLUTION:")
+    print(f"{card.resolution}")
+    print(f"\nAPPLICABLE RULE: {card.rule}")
+    print("-"*30)
+
+def get_section_choice(partitions):
+    """Helper to let user pick a section from the list."""
+    sections = partitions.topics
+    print("\nAvailable Sections:")
+    for i, section in enumerate(sections, 1):
+        print(f"{i}. {section}")
+
+    while True:
+        # One keypress while the sections fit in single digits
+        if len(sections) <= 9:
+            choice = prompt_key("\nSelect a Section number (or 'b' to go back):")
+        else:
+            choice = input("\nSelect a Section number (or 'b' to go back): ").strip().lower()
+        if choice == 'b': return None
+        try:
+            idx = int(choice) - 1
+            if 0 <= idx < len(sections):
+                return sections[idx]
+            print("Invalid number.")
+        except ValueError:
+            print("Please enter a valid number.")
+
+# --- MODE 1: Review BY SECTION (Continuous Study) ---
+def mode_review_by_section(cards, partitions, decks):
+    selected_section = get_section_choice(partitions)
+
+    # If user didn't pick a section (hit 'b'), go back to Main Menu
+    if not selected_section:
+        return
+
+    while True:
+        # Next card of this section's shuffled deck (no repeats until the section is done)
+        card = cards[decks.draw(selected_section)]
+        drawn, deck_size, _ = decks.progress(selected_section)
+
+        # Show the situation and resolution
+        display_card(card)
+
+        # Navigation prompt
+        print(f"\nCurrently Studying: {selected_section}  [{drawn} of {deck_size} this round]")
+        choice = prompt_key("Enter/n: Next random situation | 's': Change section | 'm': Main Menu:")
+
+        if choice == 'm':
+            break  # Exit to Main Menu
+
+        elif choice == 's':
+            # Let them pick a new section without leaving Mode 1
+            new_section = get_section_choice(partitions)
+            if new_section:
+                selected_section = new_section
+                continue
+            else:
+                break # If they hit 'b' in the section menu, go back to Main Menu
+
+        # Any other key repeats the loop with the current selected_section
+
+# --- MODE 2: SEQUENTIAL REVIEW (Continuous) ---
+def mode_sequential_review(cards, partitions):
+    while True:
+        selected_section = get_section_choice(partitions)
+
+        # If user hits 'b' in the section list, go back to Main Menu
+        if not selected_section:
+            break
+
+        # Precomputed deck of the section, already in Number order (1, 2, 3...)
+        section_rows = partitions.deck(selected_section)
+        print(f"\n--- Starting sequential review of: {selected_section} ---")
+
+        position = 0
+        while position < len(section_rows):
+            display_card(cards[section_rows[position]])
+
+            print(f"\n[Studying: {selected_section}  {position + 1} of {len(section_rows)}]")
+            choice = prompt_key("Enter/n: Next Item | 'p': Previous | 's': Switch Section | 'm': Main Menu:")
+
+            if choice == 'm':
+                return  # Exit the function entirely back to Main Menu
+
+            if choice == 's':
+                break  # Exit the row loop to choose a different section
+
+            if choice in PREVIOUS_KEYS:
+                position = max(position - 1, 0)
+            else:
+                position += 1
+
+        else:
+            # This triggers only if the loop finishes naturally (reached the end)
+            print(f"\n*** You have completed all situations in {selected_section}! ***")
+            prompt_key("[Press any key to return to Section Selection]")
+
+def show_list(cards, rows):
+    """Shows the cards of a search result one by one, stepping with single keys."""
+    position = 0
+    while 0 <= position < len(rows):
+        display_card(cards[rows[position]])
+        if len(rows) == 1:
+            return
+        choice = prompt_key(f"\n[{position + 1} of {len(rows)}] Enter/n: Next | 'p': Previous | 's': Stop this list:")
+        if choice == 's':
+            return
+        position = max(position - 1, 0) if choice in PREVIOUS_KEYS else position + 1
+
+# --- MODE 3: REVIEW SPECIFIC NUMBER (Continuous Search) ---
+def mode_specific_number(cards, number_index):
+    while True:
+        print("\n" + "-"*40)
+        num_choice = input("Enter Situation # or list (e.g. 12-20, 45) | 'm' for Main Menu): ").strip()
+
+        # Exit condition (the query itself keeps its case: Numbers such as "12A" are matched as written)
+        if num_choice.lower() == 'm':
+            break
+
+        # Accepts single numbers, ranges and comma-separated lists in one lookup
+        lookup = number_index.lookup(num_choice)
+        if lookup.invalid:
+            print(f"\n[!] Not a number or range: {', '.join(lookup.invalid)}")
+        if lookup.missing:
+            print(f"\n[!] No situation found with Number: {', '.join(lookup.missing)}")
+
+        if not lookup.rows:
+            print("Please try a different number.")
+        else:
+            show_list(cards, lookup.rows)
+
+            # After viewing, the loop restarts to let them search for another number
+
+# --- MODE 4: TOTALLY RANDOM (Continuous Shuffle) ---
+def mode_totally_random(cards, decks):
+    count = 0
+    print("\n" + "!" * 40)
+    print("ENTERING TOTAL SHUFFLE MODE")
+    print("Picking random situations from all sections...")
+    print("!" * 40)
+
+    while True:
+        # Next card of the shuffled deck of all situations
+        card = cards[decks.draw(StrokePartitions.ALL)]
+        count += 1
+
+        # Display the card
+        display_card(card)
+
+        print(f"\n[Total reviewed this session: {count}]")
+        choice = prompt_key("Enter/n: Next random situation | 'm': Back to Main Menu:")
+
+        if choice == 'm':
+            print(f"Shuffle session ended. You reviewed {count} situations.")
+            break
+
+        # Any other key continues the loop...
+
+# --- MODE 5: SEARCH BY RULE (Continuous Search) ---
+def mode_search_by_rule(cards, rule_index):
+    print(f"\nCited rules: {', '.join(rule_index.children_of())}, plus Glossary and interpretations")
+
+    while True:
+        print("\n" + "-"*40)
+        rule_choice = input("Enter Rule # (e.g. 101.2, add '=' for exact: =101.2) | 'm' for Main Menu: ").strip()
+
+        if rule_choice.lower() == 'm':
+            break
+
+        exact = rule_choice.startswith("=")
+        rows = rule_index.lookup(rule_choice.lstrip("="), exact=exact)
+
+        if not rows:
+            print(f"\n[!] No situations cite rule: {rule_choice}")
+            continue
+
+        print(f"\nFound {len(rows)} situations citing {rule_choice.lstrip('=')}.")
+        show_list(cards, rows)
+
+# --- MAIN MANAGER ---
+def main_menu(seed=None):
+    try:
+        # Load the prebuilt card file once at the start (compiled from FILE_PATH if it is missing or stale).
+        # Rows are addressed by position, and every index below is built once from plain lists.
+        cards = load_cards(FILE_PATH)
+        positions = range(len(cards))
+        numbers = [card.number for card in cards]
+        partitions = StrokePartitions(positions, [card.stroke for card in cards], numbers)
+        number_index = NumberIndex(positions, numbers)
+        rule_index = RuleIndex(positions, [card.rule for card in cards])
+        # Shuffled decks for the random modes, kept for the whole session
+        decks = ShuffleDecks(partitions, seed)
+
+        while True:
+            print("\n" + "="*50)
+            print("          USA SWIMMING OFFICIALS")
+            print("              Stroke & Turn")
+            print("         Situations and Resolutions")
+            print("="*50)
+            print("1. Review by Section (Random Item)")
+            print("2. Sequential Review (Item-by-Item)")
+            print("3. Search by Situation Number")
+            print("4. Total Random Shuffle")
+            print("5. Search by Rule")
+            print("Q. Quit")
+            print(f"(Shuffle seed: {decks.seed})")
+            print("="*50)
+
+            choice = prompt_key("\nSelect a Mode:")
+
+            if choice == '1':
+                mode_review_by_section(cards, partitions, decks)
+            elif choice == '2':
+                mode_sequential_review(cards, partitions)
+            elif choice == '3':
+                mode_specific_number(cards, number_index)
+            elif choice == '4':
+                mode_totally_random(cards, decks)
+            elif choice == '5':
+                mode_search_by_rule(cards, rule_index)
+            elif choice == 'q':
+                print("Happy Officiating! See you on the deck.")
+                break
+            else:
+                print("Invalid selection. Please try again.")
+
+    except (KeyboardInterrupt, EOFError):
+        print("\nHappy Officiating! See you on the deck.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="USA Swimming Situations & Resolutions study tool.")
+    parser.add_argument("--seed", help="Shuffle seed; the same seed gives the same random order.")
+    main_menu(parser.parse_args().seed)
@@ -1,12 +1,37 @@
+import uuid
+
 import streamlit as st
-import pandas as pd
 from streamlit_js_eval import streamlit_js_eval
-import base64
-import os
-import re
+from search_index import IncrementalSearch, perform_keyword_search
+from assets import get_img_with_href
+from highlight import HIGHLIGHT_CSS
+from corpus import ALL_LOADED, CorpusRegistry
+from lookups import ShuffleDecks
+from progress_store import DEFAULT_DB_PATH, ProgressStore
+from metrics import RunTimer, SamplingProfiler, start_exporters
+from layout import LANDSCAPE, ORIENTATION_JS, PORTRAIT, orientation_from_headers
+from classroom import ClassroomHub, fragment_rerun_trigger, push_supported
+
+# Time each phase of this run (see metrics.py); exporters start once per process
+run_timer = RunTimer()
+start_exporters()
 
 # Set Page Config
 st.set_page_config(page_title="USA Swimming Officials - Situations & Resolutions", layout="centered")
+run_timer.phase("page_setup")
+
+# Opt-in sampling profiler: ?profile=1 turns it on for the rest of this session.
+# One per session: a run that didn't get to stop its profiler (interrupted by a rerun,
+# st.stop() or an error) leaves it in session state, and the next run stops it
+if st.query_params.get("profile") == "1":
+    st.session_state.profiling = True
+if st.session_state.get("profiler") is not None:
+    st.session_state.profiler.stop()
+profiler = SamplingProfiler().start() if st.session_state.get("profiling") else None
+st.session_state.profiler = profiler
+
+# Script runs in this session (a cold page load should take exactly one)
+st.session_state.run_count = st.session_state.get("run_count", 0) + 1
 
 image = 'USA_Swimming_Logo.svg'
 
@@ -26,63 +51,13 @@ css = f'''
         height: 0px;
     }}
     */
+
+    /* 3. Keyword highlight, referenced by class so each match stays short */
+    {HIGHLIGHT_CSS}
 </style>
 '''
 st.markdown(css, unsafe_allow_html=True)
 
-def highlight_text(text, query):
-    if not query or not isinstance(text, str):
-        return text
-    
-    # We use a span with a background color to make it look like a highlighter pen
-    # Yellow background with black text for maximum contrast
-    highlight_style = (
-        'background-color: #ffff00; '  # Bright Yellow
-        'color: #000000; '            # Black text
-        'font-weight: bold; '          # Bold
-        'padding: 2px 4px; '           # Slight padding for "pill" look
-        'border-radius: 3px;'          # Rounded corners
-    )
-    
-    # re.IGNORECASE ensures we find "Foot" even if user typed "foot"
-    # re.escape ensures we don't crash if user types special characters like "("
-    compiled = re.compile(re.escape(query), re.IGNORECASE)
-    
-    # This replaces the match while preserving the original casing of the text
-    return compiled.sub(lambda m: f'<span style="{highlight_style}">{m.group()}</span>', text)
-
-def get_img_with_href(local_img_path, target_url, width=None):
-    """Encodes a local image file to Base64 and wraps it in an HTML hyperlink tag.
-
-    Args:
-        local_img_path: path to the image on disk.
-        target_url: href for the anchor tag.
-        width: optional pixel width to apply to the <img> element. If provided,
-            the image tag will include a width attribute.
-    """
-    # Determine the image format from the file extension
-    img_format = os.path.splitext(local_img_path)[-1].replace(".", "")
-    if img_format.lower() == 'svg':
-        mime_type = 'image/svg+xml'
-    else:
-        mime_type = f'image/{img_format}'
-        
-    # Read and encode the file
-    with open(local_img_path, "rb") as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode("utf-8")
-
-    # Build width attribute if requested
-    width_attr = f' width="{width}"' if width else ''
-
-    # Construct the HTML markdown string
-    html_string = f"""
-    <a href="{target_url}" target="_blank">
-        <img src="data:{mime_type};base64,{b64}" alt="Linked Image"{width_attr}/>
-    </a>
-    """
-    return html_string
-
 # Helper function to display the USA Swimming logo with a hyperlink
 def usa_swimming_logo_w_hyperlink(desired_width=100):
     width = desired_width  # Desired width of the image in pixels
@@ -109,34 +84,69 @@ def pns_logo_w_hyperlink(desired_width=100):
     html_string = f'<div style="text-align: center;">{inner_html}</div>'
     st.markdown(html_string, unsafe_allow_html=True)
 
-# Get dimensions to determine Orientation. This is used to control formating where needed.
+# Determine Orientation once per session. This is used to control formating where needed.
 def get_orientation_mode():
-    # Use a static key. streamlit_js_eval will still update the values 
-    # if the user rotates their phone.
-    width = streamlit_js_eval(js_expressions='screen.width', key='WIDTH_STATIC')
-    height = streamlit_js_eval(js_expressions='screen.height', key='HEIGHT_STATIC')
-
-    if width is not None and height is not None:
-        if width < height:
-            return "Portrait"
-        else:
-            return "Landscape"
-    # Default to Portrait if JS hasn't loaded yet
-    return "Portrait"
+    # Decided on the first run from the request headers (user agent, client hints),
+    # so the page renders in the right layout straight away without a browser round trip
+    if 'orientation_mode' not in st.session_state:
+        st.session_state.orientation_mode = orientation_from_headers(st.context.headers)
+
+    if st.session_state.orientation_mode is None:
+        # Headers can't tell (tablet or unknown browser): one combined measurement,
+        # whose answer costs one extra rerun and is then kept for the session
+        measured = streamlit_js_eval(js_expressions=ORIENTATION_JS, key='ORIENTATION_STATIC')
+        if measured in (PORTRAIT, LANDSCAPE):
+            st.session_state.orientation_mode = measured
+            return measured
+        # Default to Portrait until the measurement comes back
+        return PORTRAIT
+    return st.session_state.orientation_mode
+
+# Every study document is found here and loaded and indexed on first use (see corpus.py);
+# one registry per server process, shared by all sessions
+@st.cache_resource
+def get_corpus_registry():
+    return CorpusRegistry.from_environment()
+
+# Classroom rooms: instructors publish their current card, attendees follow it (see classroom.py);
+# one hub per server process, shared by all sessions
+@st.cache_resource
+def get_classroom_hub():
+    return ClassroomHub()
+
+CLASSROOM_ROLES = ["Off", "Lead a class", "Join a class"]
+# Attendee refresh interval when the server can't push reruns to a session (see classroom.push_supported),
+# and a slower one as a safety net when it can: a missed push costs at most that long
+CLASSROOM_POLL_SECONDS = 2
+CLASSROOM_SAFETY_POLL_SECONDS = 15
 
 # --- SIDEBAR NAVIGATION ---
+run_timer.phase("sidebar")
 
 with st.sidebar:
     with st.container(horizontal_alignment="center"):
         usa_swimming_logo_w_hyperlink()
     st.markdown("---")
     st.title("Navigation")
+
+# Document picker, only shown once there is more than one document to study
+corpora = get_corpus_registry().corpora
+corpus_key = next(iter(corpora))
+if len(corpora) > 1:
+    corpus_key = st.sidebar.selectbox(
+        "Document:",
+        list(corpora) + [ALL_LOADED],
+        format_func=lambda key: "All loaded documents" if key == ALL_LOADED else corpora[key].title,
+        help="'All loaded documents' searches and shuffles every document opened so far."
+    )
+
 mode = st.sidebar.radio(
         "Choose a Study Mode:",
         ["Sequential Review", 
          "Random Shuffle",
         "Keyword Search",
-        "Search by Number"]  # Renamed and consolidated
+        "Search by Number",
+        "Search by Rule"]  # Renamed and consolidated
     )
 
 # --- MODE SWITCH DETECTION ---
@@ -151,6 +161,14 @@ if st.session_state.last_mode != mode:
     st.session_state.show_resolution_clicked = False
     st.session_state.last_mode = mode
 
+# Row labels belong to one document, so a new document starts every mode afresh
+if st.session_state.get('last_corpus', corpus_key) != corpus_key:
+    st.session_state.current_index = None
+    st.session_state.show_resolution_clicked = False
+    st.session_state.seq_num_input = 1
+    st.session_state.pop('seq_seg', None)
+st.session_state.last_corpus = corpus_key
+
 # --- SIDEBAR OPTIONS ---
 st.sidebar.markdown("---")
 st.sidebar.subheader("Options")
@@ -161,15 +179,65 @@ hide_resolution = st.sidebar.checkbox("Hide resolution", value=False)
 # Font Size Slider
 font_size = st.sidebar.slider("Adjust Font Size", min_value=14, max_value=36, value=18)
 
+# Performance tracking is opt-in: attempts are only logged under a name
+tracking_user = st.sidebar.text_input(
+    "Your name or initials (to track progress)",
+    key="tracking_user",
+    placeholder="Leave blank to skip tracking"
+).strip()
+
+# --- CLASSROOM ---
+# A link ending in ?class=CODE opens the app already joined to that class
+st.sidebar.markdown("---")
+classroom_role = st.sidebar.radio(
+    "Classroom:",
+    CLASSROOM_ROLES,
+    index=2 if st.query_params.get("class") else 0,
+    key="classroom_role",
+    help="Lead a class to show attendees the card you are on; join one to follow the instructor's card."
+)
+classroom_hub = get_classroom_hub()
+if 'classroom_id' not in st.session_state:
+    st.session_state.classroom_id = uuid.uuid4().hex
+
+# Instructor: a room is opened for this session and kept until they stop leading
+lead_code = None
+if classroom_role == "Lead a class":
+    if classroom_hub.state(st.session_state.get('lead_code')) is None:
+        st.session_state.lead_code = classroom_hub.open_room()
+    lead_code = st.session_state.lead_code
+    st.sidebar.markdown(f"Class code: **{lead_code}**")
+    st.sidebar.caption(f"{classroom_hub.attendees(lead_code)} following. Attendees choose 'Join a class' "
+                       f"and enter the code, or open a link ending in ?class={lead_code}")
+elif st.session_state.get('lead_code'):
+    classroom_hub.close_room(st.session_state.pop('lead_code'))
+
+# Attendee: the study area shows the instructor's card instead of this session's own
+join_code = None
+if classroom_role == "Join a class":
+    join_code = ClassroomHub.normalize_code(
+        st.sidebar.text_input("Class code:", value=st.query_params.get("class", ""), max_chars=8)
+    ) or None
+if st.session_state.get('joined_code') not in (None, join_code):
+    classroom_hub.unsubscribe(st.session_state.joined_code, st.session_state.classroom_id)
+st.session_state.joined_code = join_code
+
+# Published versions of the selected document(s), where known (see documents.KNOWN_DOCUMENTS);
+# the footer names the version only when a single known document is selected
+document_infos = [corpus.info for key, corpus in corpora.items()
+                  if corpus.info is not None and corpus_key in (key, ALL_LOADED)]
+document_version = corpora[corpus_key].info.version if corpus_key in corpora and corpora[corpus_key].info else None
+
 with st.sidebar:
     usaswimming_rulebook_url = "https://websiteprodcoresa.blob.core.windows.net/sitefinity/docs/default-source/governance/governance-lsc-website/rules_policies/rulebooks/2026-rulebook.pdf"
     st.markdown(f"[2026 USA Swimming Rulebook]({usaswimming_rulebook_url})")
-    usaswimming_st_sit_resol_url = "https://www.usaswimming.org/docs/default-source/officialsdocuments/officials-training-resources/situations-and-resolutions/situations-and-resolutions-stroke-and-turn.pdf"
-    st.markdown(f"[Mar. 2025 USA Swimming Situations & Resolutions - Stroke & Turn]({usaswimming_st_sit_resol_url})")
+    for info in document_infos:
+        st.markdown(f"[{info.label}]({info.url})")
 
     st.markdown("---")
     pns_logo_w_hyperlink()
 
+run_timer.phase("orientation")
 orientation_mode = get_orientation_mode()
 #st.write(f"Orientation Mode: {orientation_mode}")
 
@@ -178,55 +246,98 @@ if 'current_index' not in st.session_state:
     st.session_state.current_index = None
 if 'show_resolution_clicked' not in st.session_state:
     st.session_state.show_resolution_clicked = False
+if 'assessed_index' not in st.session_state:
+    st.session_state.assessed_index = None
+if 'session_tally' not in st.session_state:
+    st.session_state.session_tally = {'attempts': 0, 'correct': 0}
+
+def reveal_resolution():
+    st.session_state.show_resolution_clicked = True
+
+def open_related(row_label):
+    # Jumps the card to a related situation; the mode's controls take over again on their next change
+    st.session_state.current_index = row_label
+    st.session_state.show_resolution_clicked = False
 
-def get_new_situation(filtered_df):
-    # Check if the dataframe actually has data
-    if filtered_df is not None and len(filtered_df) > 0:
-        st.session_state.current_index = filtered_df.sample(n=1).index[0]
+def record_self_assessment(row_label, study_mode, correct):
+    # Only queues the attempt; the store writes it to SQLite in the background
+    corpus, stroke, number = corpus_data.origin(row_label)
+    progress_store.record_attempt(st.session_state.tracking_user.strip(), corpus, number, stroke, study_mode, correct)
+    st.session_state.assessed_index = st.session_state.current_index
+    st.session_state.session_tally['attempts'] += 1
+    st.session_state.session_tally['correct'] += int(correct)
+
+def get_new_situation(selected_stroke_topic):
+    # Next card of this session's shuffled deck for the Stroke/Topic (or ALL): no repeats until it runs out
+    new_index = st.session_state.shuffle_decks.draw(selected_stroke_topic)
+    if new_index is not None:
+        st.session_state.current_index = new_index
         st.session_state.show_resolution_clicked = False
     else:
         # If empty, reset the index so no card is shown
         st.session_state.current_index = None
 
-def perform_keyword_search(df, query, search_field, selected_stroke):
-    if not query:
-        return pd.DataFrame()
-    
-    # 1. Filter by Stroke/Topic if not "All"
-    if selected_stroke != "All":
-        filtered_df = df[df['Stroke'] == selected_stroke]
-    else:
-        filtered_df = df.copy()
-        
-    # 2. Perform text search (case-insensitive)
-    q = query.lower()
-    
-    if search_field == "Situations":
-        results = filtered_df[filtered_df["Situation"].str.lower().str.contains(q, na=False)]
-    elif search_field == "Resolutions":
-        results = filtered_df[filtered_df["Recommended resolution"].str.lower().str.contains(q, na=False)]
-    else:  # "All" option
-        # Search across both "Situations" and "Resolutions" columns
-        mask = (
-            filtered_df["Situation"].str.lower().str.contains(q, na=False) | 
-            filtered_df["Recommended resolution"].str.lower().str.contains(q, na=False)
-        )
-        results = filtered_df[mask]
-    return results
+def reseed_shuffle():
+    # A new seed deals every deck again in that seed's order
+    st.session_state.shuffle_decks = ShuffleDecks(partitions, st.session_state.shuffle_seed)
+    st.session_state.shuffle_seed = st.session_state.shuffle_decks.seed
+    st.session_state.current_index = None
+
+def load_data(corpus_key):
+    # The document's rows (from the precompiled snapshot) with everything built from them
+    # once per document: keyword index, per-Stroke decks in Number order, Number hash index,
+    # rule-number trie and rendered card cache. Loaded on first use, evicted when unused,
+    # rebuilt in the background when the file changes
+    return get_corpus_registry().get(corpus_key)
 
-@st.cache_data
-def load_data():
-    file_path = "Situations-n-Resolutions-with-sections.xlsx"
-    df = pd.read_excel(file_path)
-    df.columns = [c.strip() for c in df.columns]
-    return df
+# One write-behind attempt log per server process, shared by all sessions
+@st.cache_resource
+def get_progress_store():
+    return ProgressStore(DEFAULT_DB_PATH)
 
+run_timer.phase("data_load")
 try:
-    df = load_data()
+    corpus_data = load_data(corpus_key)
+    df = corpus_data.df
+    search_index = corpus_data.search_index
+    partitions = corpus_data.partitions
+    number_index = corpus_data.number_index
+    rule_index = corpus_data.rule_index
+    card_cache = corpus_data.card_cache
+    related_index = corpus_data.related
+    progress_store = get_progress_store()
 except Exception as e:
-    st.error(f"Error loading Excel: {e}")
+    st.error(f"Error loading data: {e}")
     st.stop()
 
+# The registry swaps in a new CorpusData when the document's file changes (or, for all
+# loaded documents, when the set of loaded ones does). Keep this session's place: the
+# same situation by (Stroke, Number), if it still exists. Sessions keep only the data's
+# keys and version, and the card they last showed (see display_card), not the data itself,
+# so an old version is freed as soon as no run uses it
+seen_keys, seen_version = st.session_state.get('corpus_version', (None, None))
+if seen_version is not None and seen_version != corpus_data.version:
+    if st.session_state.current_index is not None:
+        shown_label, shown_situation = st.session_state.get('card_place', (None, None))
+        # A card picked on the old data since (e.g. a related situation) can't be traced: start over
+        st.session_state.current_index = (corpus_data.find_situation(shown_situation)
+                                          if shown_label == st.session_state.current_index else None)
+        if st.session_state.current_index is None:
+            st.session_state.show_resolution_clicked = False
+    st.session_state.assessed_index = None
+    seq_topic = st.session_state.get('seq_seg')
+    if seq_topic is not None and seq_topic not in partitions.topics:
+        st.session_state.pop('seq_seg')
+    elif seq_topic is not None:
+        section_rows = partitions.deck(seq_topic)
+        if st.session_state.current_index in section_rows:
+            st.session_state.seq_num_input = section_rows.index(st.session_state.current_index) + 1
+        else:
+            st.session_state.seq_num_input = max(1, min(st.session_state.seq_num_input, len(section_rows)))
+    if seen_keys == corpus_data.keys:
+        st.toast(f"{corpus_data.title} was updated.")
+st.session_state.corpus_version = (corpus_data.keys, corpus_data.version)
+
 def landscape_title_mode():
     # Use columns for desktop. On mobile, Streamlit will stack these 
     # if the screen is narrow enough, but we'll optimize the content.
@@ -237,7 +348,7 @@ def landscape_title_mode():
     with header_col2:
         st.markdown("<h2 style='text-align: center; margin-top: -20px;'><a href='https://www.usaswimming.org' target='_blank' style='color: inherit; text-decoration: none;'>USA Swimming</a> Officials</h2>", unsafe_allow_html=True)
         st.markdown("<h4 style='text-align: center; margin-top: -10px;'>Situations & Resolutions</h4>", unsafe_allow_html=True)
-        st.markdown("<h5 style='text-align: center; margin-top: -10px;'>Stroke & Turn</h5>", unsafe_allow_html=True)
+        st.markdown(f"<h5 style='text-align: center; margin-top: -10px;'>{corpus_data.title}</h5>", unsafe_allow_html=True)
     with header_col3:
         pns_logo_w_hyperlink()
 
@@ -247,14 +358,19 @@ def portrait_title_mode():
         # Reduced margin-top on the first title
         st.markdown("<h3 style='text-align: center; margin-top: -20px;'><a href='https://www.usaswimming.org' target='_blank' style='color: inherit; text-decoration: none;'>USA Swimming</a> Officials</h3>", unsafe_allow_html=True)
         st.markdown("<h5 style='text-align: center; margin-top: -10px;'>Situations & Resolutions</h5>", unsafe_allow_html=True)
-        st.markdown("<h5 style='text-align: center; margin-top: -10px;'>Stroke & Turn</h5>", unsafe_allow_html=True)
+        st.markdown(f"<h5 style='text-align: center; margin-top: -10px;'>{corpus_data.title}</h5>", unsafe_allow_html=True)
 
 # --- APP UI (Mobile Friendly) ---
+run_timer.phase("title")
 if orientation_mode == "Portrait":
     portrait_title_mode()
 else:
     landscape_title_mode()
 
+# --- HELPER FOR RESULT PICKERS (Number and Rule search) ---
+def get_result_label(idx):
+    return f"#{df.loc[idx, 'Number']} [{df.loc[idx, 'Stroke']}] - {df.loc[idx, 'Situation'][:50]}..."
+
 # --- HELPER FOR MODE 1 (Sequential) Number Wrapping ---
 def handle_seq_change():
     val = st.session_state.seq_num_input
@@ -266,8 +382,8 @@ def handle_seq_change():
         st.session_state.seq_num_input = total
 
 # --- MODE 1: SEQUENTIAL REVIEW ---
-if mode == "Sequential Review":
-    stroke_topic_list = sorted(df['Stroke'].dropna().unique())
+def sequential_review_controls():
+    stroke_topic_list = partitions.topics
     default_stroke = "Backstroke" if "Backstroke" in stroke_topic_list else stroke_topic_list[0]
     
     selected_stroke_topic = st.segmented_control(
@@ -278,8 +394,8 @@ if mode == "Sequential Review":
     )
     
     if selected_stroke_topic:
-        section_df = df[df['Stroke'] == selected_stroke_topic].sort_values(by='Number')
-        total_items = len(section_df)
+        section_rows = partitions.deck(selected_stroke_topic)
+        total_items = len(section_rows)
         st.session_state.max_items_in_section = total_items
 
         # --- RESET & SYNC LOGIC ---
@@ -340,7 +456,9 @@ if mode == "Sequential Review":
 
         # Map to index
         safe_val = max(1, min(current_val, total_items))
-        new_index = section_df.index[safe_val - 1]
+        new_index = section_rows[safe_val - 1]
+        # The cards +/- lead to (wrapping like handle_seq_change), prefetched by the card
+        st.session_state.seq_neighbors = (section_rows[safe_val - 2], section_rows[safe_val % total_items])
         
         if st.session_state.current_index != new_index:
             st.session_state.current_index = new_index
@@ -350,9 +468,20 @@ if mode == "Sequential Review":
         st.session_state.current_index = None
 
 # --- MODE 2: RANDOM SHUFFLE  ---
-elif mode == "Random Shuffle":
+def random_shuffle_controls():
+    # Per-session decks; ?seed=... (or the seed box below) gives everyone the same order.
+    # A different document (or a reloaded one) is dealt again with the same seed
+    if 'shuffle_decks' not in st.session_state:
+        st.session_state.shuffle_decks = ShuffleDecks(partitions, st.query_params.get("seed"))
+    elif st.session_state.shuffle_decks.partitions is not partitions:
+        st.session_state.shuffle_decks = ShuffleDecks(partitions, st.session_state.shuffle_decks.seed)
+    # The decks own the seed; Streamlit drops the Seed box's key whenever the box
+    # isn't shown (e.g. in another mode), so it is filled in again from them
+    if 'shuffle_seed' not in st.session_state:
+        st.session_state.shuffle_seed = st.session_state.shuffle_decks.seed
+
     # 1. Create the list with "ALL" at the front
-    stroke_topic_list = ["ALL"] + sorted(df['Stroke'].dropna().unique().tolist())
+    stroke_topic_list = ["ALL"] + partitions.topics
     
     # 2. Selection
     selected_stroke_topic = st.segmented_control(
@@ -362,29 +491,32 @@ elif mode == "Random Shuffle":
     )
     
     if selected_stroke_topic:
-        # 3. Filter Logic
-        if selected_stroke_topic == "ALL":
-            active_df = df
-        else:
-            active_df = df[df['Stroke'] == selected_stroke_topic]
+        # 3. Deck Lookup (prebuilt at load time)
+        active_rows = partitions.deck(selected_stroke_topic)
         
         # 4. Situation Selection Logic
-        if not active_df.empty:
+        if active_rows:
             # Load new situation if none is selected OR if the stroke changed
             # We track the stroke in session state to detect changes
             if 'last_random_stroke' not in st.session_state:
                 st.session_state.last_random_stroke = selected_stroke_topic
 
             if st.session_state.current_index is None or \
-               st.session_state.current_index not in active_df.index or \
+               not partitions.contains(selected_stroke_topic, st.session_state.current_index) or \
                st.session_state.last_random_stroke != selected_stroke_topic:
                 
-                get_new_situation(active_df)
+                get_new_situation(selected_stroke_topic)
                 st.session_state.last_random_stroke = selected_stroke_topic
 
             # 5. Shuffle Button
             if st.button("Shuffle Next Situation", width="content", icon=":material/refresh:", type="secondary"):
-                get_new_situation(active_df)
+                get_new_situation(selected_stroke_topic)
+
+            drawn, deck_size, passes = st.session_state.shuffle_decks.progress(selected_stroke_topic)
+            st.caption(f"Card {drawn} of {deck_size} in this shuffle" + (f" (round {passes + 1})" if passes else ""))
+            with st.expander("Shuffle order"):
+                st.text_input("Seed", key="shuffle_seed", on_change=reseed_shuffle,
+                              help="Share this seed (or a link ending in ?seed=...) so others get the same order.")
         else:
             st.warning(f"No situations found for {selected_stroke_topic}")
     else:
@@ -392,7 +524,7 @@ elif mode == "Random Shuffle":
         st.session_state.current_index = None
 
 # --- MODE 3: KEYWORD SEARCH ---
-elif mode == "Keyword Search":
+def keyword_search_controls():
     st.markdown("### 🔍 Keyword Search")
     
     # Field Selection - Added "Both"
@@ -403,7 +535,7 @@ elif mode == "Keyword Search":
     )
     
     # Breadth Selection
-    stroke_list = ["All"] + sorted(df['Stroke'].dropna().unique().tolist())
+    stroke_list = ["All"] + partitions.topics
     selected_stroke = st.segmented_control(
         "Limit to Stroke/Topic:", 
         stroke_list, 
@@ -411,12 +543,26 @@ elif mode == "Keyword Search":
     )
     
     search_query = st.text_input("Enter keyword or phrase:", placeholder="Search...")
+    ranked_search = st.toggle(
+        "Best matches first",
+        help="Ranks results by relevance, also finds other word forms (kick, kicks, kicking) and small typos."
+    )
     
+    # Per-session search-as-you-type state: a longer query only re-checks the previous matches
+    if 'keyword_search' not in st.session_state or st.session_state.keyword_search.search_index is not search_index:
+        st.session_state.keyword_search = IncrementalSearch(search_index)
+
     if search_query:
-        search_results = perform_keyword_search(df, search_query, search_field, selected_stroke)
+        search_results = perform_keyword_search(
+            df, search_index, search_query, search_field, selected_stroke, ranked=ranked_search,
+            incremental=st.session_state.keyword_search
+        )
         
         if not search_results.empty:
-            st.success(f"Found {len(search_results)} matches.")
+            if ranked_search:
+                st.success(f"Top {len(search_results)} matches, best first.")
+            else:
+                st.success(f"Found {len(search_results)} matches.")
             
             # Create a dictionary for the dropdown: "Display Name": Index
             result_options = {
@@ -436,75 +582,267 @@ elif mode == "Keyword Search":
             st.session_state.current_index = None
     else:
         st.session_state.current_index = None
+        return None
+
+    if ranked_search:
+        # Highlight the word forms the ranked search actually matched
+        return search_index.highlight_words(search_query, search_field), True
+    return search_query, False
 
 # --- MODE 4: Search by Number ---
-elif mode == "Search by Number":
+def number_search_controls():
     # We explicitly set this to None if they haven't searched yet 
     # so the old card from the previous mode disappears.
-    # find the min and max numbers in the dataset to guide the user on valid inputs
-    min_num = int(df['Number'].min())
-    max_num = int(df['Number'].max())
+    # min and max numbers come from the prebuilt index to guide the user on valid inputs
+    min_num = number_index.min_number
+    max_num = number_index.max_number
     
     st.write(f"Available Situations: **{min_num} to {max_num}**")
-    num_search = st.text_input("Enter Situation Number:", placeholder=f"e.g. {min_num}")
+    num_search = st.text_input(
+        "Enter Situation Number(s):",
+        placeholder=f"e.g. {min_num}  or  12-20, 45, 101"
+    )
 
-    #num_search = st.text_input("Enter Situation Number:")
-    
     if not num_search:
         st.session_state.current_index = None
     else:
-        results = df[df['Number'].astype(str).str.strip() == num_search.strip()]
-        if not results.empty:
-            st.session_state.current_index = results.index[0]
+        # One indexed lookup for the whole list of numbers and ranges
+        lookup = number_index.lookup(num_search)
+        if lookup.invalid:
+            st.warning(f"Not a number or range: {', '.join(lookup.invalid)}")
+
+        if len(lookup.rows) == 1:
+            st.session_state.current_index = lookup.rows[0]
+        elif lookup.rows:
+            st.success(f"Found {len(lookup.rows)} situations.")
+            result_options = {get_result_label(idx): idx for idx in lookup.rows}
+            selected_label = st.selectbox("Select a result to view details:", options=list(result_options.keys()))
+
+            new_index = result_options[selected_label]
+            if st.session_state.current_index != new_index:
+                st.session_state.current_index = new_index
+                st.session_state.show_resolution_clicked = False
         else:
-            st.warning("Number not found.")
             st.session_state.current_index = None
 
+        if lookup.missing:
+            if lookup.rows or lookup.invalid:
+                st.info(f"Not found: {', '.join(lookup.missing)}")
+            else:
+                st.warning("Number not found.")
 
+# --- MODE 5: Search by Rule ---
+def rule_search_controls():
+    # Top-level rules from the prebuilt citation trie, to guide the user on valid inputs
+    st.write(f"Cited rules: **{', '.join(rule_index.children_of())}**, plus Glossary and interpretations")
+    rule_search = st.text_input("Enter Rule Number:", placeholder="e.g. 101.2 or 105.1.3A")
+    exact_rule = st.checkbox("Exact rule only", help="Off: 101.2 also finds 101.2.3, 101.2.4, ...")
 
-# --- DISPLAY CARD ---
-if st.session_state.current_index is not None:
-    row = df.loc[st.session_state.current_index]
-    
-    st.markdown("---")
-    st.info(f"**Stroke/Topic: {row['Stroke']}  #{row['Number']}** \n\n **Situation:**")
-    
-    # Prepare text for display
-    display_sit = row["Situation"]
-    display_res = row["Recommended resolution"]
+    if not rule_search:
+        st.session_state.current_index = None
+    else:
+        rule_rows = rule_index.lookup(rule_search, exact=exact_rule)
+        if rule_rows:
+            st.success(f"Found {len(rule_rows)} situations citing {rule_search.strip()}.")
+            result_options = {get_result_label(idx): idx for idx in rule_rows}
+            selected_label = st.selectbox("Select a result to view details:", options=list(result_options.keys()))
 
-    # Apply highlighting if in Search Mode
-    if mode == "Keyword Search" and 'search_query' in locals() and search_query:
-        display_sit = highlight_text(display_sit, search_query)
-        display_res = highlight_text(display_res, search_query)
+            new_index = result_options[selected_label]
+            if st.session_state.current_index != new_index:
+                st.session_state.current_index = new_index
+                st.session_state.show_resolution_clicked = False
+        else:
+            st.warning("No situations cite that rule.")
+            st.session_state.current_index = None
 
-    # Situation Display
-    st.markdown(f'<div style="font-size: {font_size}px;"><br>{display_sit}</div>', unsafe_allow_html=True)
+# --- FRAGMENT TIMING ---
+def rerun_if_reloaded():
+    # A fragment rerun uses the data of the page's last full run; if the document has been
+    # reloaded since, rerun the whole page instead, which moves this session onto the new data
+    if load_data(corpus_key) is not corpus_data:
+        st.rerun()
+
+def start_fragment_timer():
+    # A fragment rerun skips the rest of the script, so it times itself and
+    # owns that timer; inside a full run the page's timer is still running
+    global run_timer
+    if run_timer.finished:
+        run_timer = RunTimer()
+        return True
+    return False
+
+# --- DISPLAY CARD ---
+# Its own fragment: Show Resolution and the self-assessment buttons rerun only the card.
+# Sidebar options come in as arguments; changing one reruns the whole page, so the card
+# always renders with the current values. When leading a class (lead_code), every card
+# change and reveal is published to the room.
+@st.fragment
+def display_card(mode, font_size, hide_resolution, tracking_user, highlight=None, lead_code=None):
+    owns_timer = start_fragment_timer()
+    if owns_timer:
+        rerun_if_reloaded()
+    run_timer.phase("card")
+    st.session_state.card_place = (st.session_state.current_index,
+                                   corpus_data.situation_of(st.session_state.current_index))
+    if st.session_state.current_index is not None:
+        # Formatted and highlighted once per (row, font size, highlight), then served from the cache
+        with run_timer.span("render"):
+            card = card_cache.get(st.session_state.current_index, font_size, highlight)
+
+        st.markdown("---")
+        st.info(card.header)
+
+        # Situation Display
+        st.markdown(card.situation, unsafe_allow_html=True)
     
-    # Logic to show/hide resolution
-    should_show = (not hide_resolution) or st.session_state.show_resolution_clicked
+        # Logic to show/hide resolution
+        should_show = (not hide_resolution) or st.session_state.show_resolution_clicked
 
-    if not should_show:
-        if st.button("Show Resolution", key=f"btn_{st.session_state.current_index}"):
-            st.session_state.show_resolution_clicked = True
+        if not should_show:
+            # Callback runs before the rerun, so the resolution appears on this click
+            st.button("Show Resolution", key=f"btn_{st.session_state.current_index}", on_click=reveal_resolution)
     
-    if should_show:
-        st.write("") 
-        st.success("**Recommended Resolution:**")
-        # Display the highlighted resolution
-        st.markdown(f'<div style="font-size: {font_size}px;">{display_res}</div>', unsafe_allow_html=True)
+        if should_show:
+            st.write("") 
+            st.success("**Recommended Resolution:**")
+            # Display the highlighted resolution
+            st.markdown(card.resolution, unsafe_allow_html=True)
         
-        st.warning(f"**Applicable Rule:**")
-        st.markdown(f'<div style="font-size: {font_size}px;">{row["Applicable Rule"]}</div>', unsafe_allow_html=True)
+            st.warning(f"**Applicable Rule:**")
+            st.markdown(card.rule, unsafe_allow_html=True)
+
+        # --- SELF-ASSESSMENT (Show Resolution and Shuffle flows) ---
+        if should_show and (st.session_state.show_resolution_clicked or mode == "Random Shuffle"):
+            if not tracking_user:
+                st.caption("Enter your name in the sidebar to track which situations you get right.")
+            elif st.session_state.assessed_index == st.session_state.current_index:
+                tally = st.session_state.session_tally
+                st.caption(f"Recorded. This session: {tally['correct']} of {tally['attempts']} right.")
+            else:
+                with st.container(horizontal=True, gap="small"):
+                    st.button("I got it right", icon=":material/check:", on_click=record_self_assessment,
+                              args=(st.session_state.current_index, mode, True), key=f"right_{st.session_state.current_index}")
+                    st.button("I got it wrong", icon=":material/close:", on_click=record_self_assessment,
+                              args=(st.session_state.current_index, mode, False), key=f"wrong_{st.session_state.current_index}")
+
+        # --- RELATED SITUATIONS ---
+        # Nearest neighbours were precomputed when the data loaded, so this is a table lookup
+        related = related_index.related(st.session_state.current_index)
+        if related:
+            with st.expander("Related situations"):
+                for label, score in related:
+                    situation = df.at[label, 'Situation']
+                    st.button(
+                        f"#{df.at[label, 'Number']} [{df.at[label, 'Stroke']}] {situation[:70]}{'...' if len(situation) > 70 else ''}",
+                        key=f"related_{st.session_state.current_index}_{label}", type="tertiary",
+                        on_click=open_related, args=(label,), help=f"Similarity {score:.0%}"
+                    )
+
+        # Warm the neighbouring cards in the background while this one is read
+        if mode == "Sequential Review" and "seq_neighbors" in st.session_state:
+            card_cache.prefetch(st.session_state.seq_neighbors, font_size, highlight)
+        if related:
+            card_cache.prefetch([label for label, _ in related], font_size, highlight)
+
+    if lead_code:
+        # Attendees follow this card; publishing the card the room already shows does nothing
+        revealed = st.session_state.current_index is not None and (
+            (not hide_resolution) or st.session_state.show_resolution_clicked)
+        with run_timer.span("publish"):
+            classroom_hub.publish(lead_code, corpus_key, corpus_data.situation_of(st.session_state.current_index),
+                                  revealed)
+
+    if owns_timer:
+        run_timer.finish(f"{mode} (card)")
+
+# --- CLASSROOM CARD (attendees) ---
+# Shows the instructor's current card in place of the study area. The hub calls back
+# when the instructor publishes, which reruns only this fragment in this session; a
+# server that can't push gets the same fragment on a CLASSROOM_POLL_SECONDS timer, and
+# one that can still reruns it every CLASSROOM_SAFETY_POLL_SECONDS in case a push is lost
+def classroom_card(code, font_size):
+    owns_timer = start_fragment_timer()
+    run_timer.phase("classroom")
+    notify = fragment_rerun_trigger()
+    if notify is not None:
+        room = classroom_hub.subscribe(code, st.session_state.classroom_id, notify)
+    else:
+        room = classroom_hub.state(code)
+
+    # The instructor's card, found by its (Stroke, Number) in this session's copy of the document:
+    # a reload or a different combination of documents can give it another row label
+    data = get_corpus_registry().get(room.corpus_key) if room is not None and room.situation is not None else None
+    row_label = data.find_situation(room.situation) if data is not None else None
+    if room is None:
+        st.warning(f"No class with code {code}. Check the code with your instructor.")
+    elif row_label is None:
+        st.info(f"Joined class {code}. Waiting for the instructor to pick a situation...")
+    else:
+        st.caption(f"Following class {code}: {data.title}")
+        card = data.card_cache.get(row_label, font_size)
+
+        st.markdown("---")
+        st.info(card.header)
+        st.markdown(card.situation, unsafe_allow_html=True)
+
+        if room.revealed:
+            st.write("")
+            st.success("**Recommended Resolution:**")
+            st.markdown(card.resolution, unsafe_allow_html=True)
+
+            st.warning(f"**Applicable Rule:**")
+            st.markdown(card.rule, unsafe_allow_html=True)
+        else:
+            st.caption("The resolution appears when the instructor reveals it.")
+
+    if owns_timer:
+        run_timer.finish("Classroom (card)")
+
+classroom_view = st.fragment(
+    classroom_card, run_every=CLASSROOM_SAFETY_POLL_SECONDS if push_supported() else CLASSROOM_POLL_SECONDS)
+
+# --- STUDY AREA (mode controls + card) ---
+# Each mode's controls pick the current card; Keyword Search also returns what to
+# highlight on it as (terms, whole_words), the other modes return None
+MODE_CONTROLS = {
+    "Sequential Review": sequential_review_controls,
+    "Random Shuffle": random_shuffle_controls,
+    "Keyword Search": keyword_search_controls,
+    "Search by Number": number_search_controls,
+    "Search by Rule": rule_search_controls,
+}
+
+# A fragment, so Shuffle, the Sequential +/- buttons and the search boxes rerun only
+# the mode's controls and the card, not the sidebar, logos, title and footer
+@st.fragment
+def study_area(mode, font_size, hide_resolution, tracking_user, lead_code=None):
+    owns_timer = start_fragment_timer()
+    if owns_timer:
+        rerun_if_reloaded()
+    run_timer.phase("mode_controls")
+    highlight = MODE_CONTROLS[mode]()
+    display_card(mode, font_size, hide_resolution, tracking_user, highlight, lead_code)
+    if owns_timer:
+        run_timer.finish(f"{mode} (controls)")
+
+if join_code:
+    classroom_view(join_code, font_size)
+else:
+    study_area(mode, font_size, hide_resolution, tracking_user, lead_code)
 
 # --- FOOTER ---
+def footer_version_line():
+    if document_version is None:
+        return ""
+    return f"National Officials Committee, Version {document_version}<br>"
+
 def landscape_footer_mode():
     st.markdown("---") # Adds a horizontal line to separate the content from the footer
     st.markdown(
-            """
+            f"""
             <div style="text-align: center; color: grey; font-size: 14px;">
                 © 2025 <a href="https://www.usaswimming.org" target="_blank">USA Swimming</a> <br>
-                National Officials Committee, Version 03/07/2025<br>
+                {footer_version_line()}
             </div>
             """, 
             unsafe_allow_html=True
@@ -514,19 +852,41 @@ def portrait_footer_mode():
     with st.container(horizontal_alignment="center"):
         pns_logo_w_hyperlink()
         st.markdown(
-            """
+            f"""
             <div style="text-align: center; color: grey; font-size: 14px;">
                 © 2025 <a href="https://www.usaswimming.org" target="_blank">USA Swimming</a> <br>
-                National Officials Committee, Version 03/07/2025<br>
+                {footer_version_line()}
             </div>
             """, 
             unsafe_allow_html=True
         )
 
 # --- Footer - Check Orientationa and set footer ---
+run_timer.phase("footer")
 # orientation_mode = get_orientation_mode()
 #st.write(f"Orientation Mode: {orientation_mode}")
 if orientation_mode == "Portrait":
     portrait_footer_mode()
 else:
-    landscape_footer_mode()
\ No newline at end of file
+    landscape_footer_mode()
+
+# --- RUN METRICS ---
+phase_durations = run_timer.finish(mode)
+if profiler is not None:
+    profiler.stop()
+    st.session_state.profiler = None
+    card_stats = card_cache.stats()
+    corpus_stats = get_corpus_registry().stats()
+    with st.expander("Profile of this run"):
+        st.code(
+            f"run {st.session_state.run_count} of this session, layout {orientation_mode}\n"
+            f"card cache: {card_stats['hit_rate']:.0%} hits ({card_stats['hits']} of "
+            f"{card_stats['hits'] + card_stats['misses']}), {card_stats['prefetch_hits']} of "
+            f"{card_stats['prefetched']} prefetched cards used, {card_stats['entries']} cards in "
+            f"{card_stats['bytes'] / 1024:.0f} KB\n"
+            f"documents: {len(corpus_stats['loaded'])} of {corpus_stats['available']} loaded, "
+            f"{corpus_stats['used_bytes'] / 2 ** 20:.1f} of {corpus_stats['budget_bytes'] / 2 ** 20:.0f} MB budget, "
+            f"{corpus_stats['evictions']} evicted\n\n"
+            + "\n".join(f"{phase:>14}: {seconds * 1000:8.2f} ms" for phase, seconds in phase_durations.items())
+            + "\n\n" + profiler.report()
+        )
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+# Streamlit serves files placed in ./static (next to the app script) at
+# app/static/<name> when server.enableStaticServing is on (.streamlit/config.toml)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL_PREFIX = "app/static"
+DIGEST_LENGTH = 12
+
+
+@lru_cache(maxsize=None)
+def static_asset_url(local_img_path):
+    """Publishes a local file once per process and returns its static URL.
+
+    The file is copied into ./static under a content-hash filename
+    (e.g. pns_logo.3f2a9c1b7d4e.png), so the browser downloads it once and
+    reuses its cached copy on every rerun; a changed logo gets a new name,
+    and its copies under earlier names are deleted.
+
+    Args:
+        local_img_path: path to the image on disk (relative to the app directory).
+    """
+    source_path = os.path.join(APP_DIR, local_img_path)
+    with open(source_path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+
+    stem, ext = os.path.splitext(os.path.basename(local_img_path))
+    file_name = f"{stem}.{digest}{ext}"
+    target_path = os.path.join(STATIC_DIR, file_name)
+
+    if not os.path.exists(target_path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        # Write to a temp name and rename so a browser never fetches a half-written file
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, target_path)
+        remove_stale_copies(stem, ext, keep=file_name)
+
+    return f"{STATIC_URL_PREFIX}/{file_name}"
+
+
+def remove_stale_copies(stem, ext, keep):
+    """Deletes the content-hashed copies of one asset in ./static other than `keep`."""
+    pattern = re.compile(rf"{re.escape(stem)}\.[0-9a-f]{{{DIGEST_LENGTH}}}{re.escape(ext)}")
+    for name in os.listdir(STATIC_DIR):
+        if name != keep and pattern.fullmatch(name):
+            try:
+                os.remove(os.path.join(STATIC_DIR, name))
+            except FileNotFoundError:
+                # Another process published the same change and removed it first
+                pass
+
+
+def get_img_with_href(local_img_path, target_url, width=None):
+    """Wraps a local image in an HTML hyperlink tag.
+
+    The image is published once per process as a content-hashed static file
+    (see static_asset_url), so each rerun only sends the short URL, not the image bytes.
+
+    Args:
+        local_img_path: path to the image on disk.
+        target_url: href for the anchor tag.
+        width: optional pixel width to apply to the <img> element. If provided,
+            the image tag will include a width attribute.
+    """
+    img_url = static_asset_url(local_img_path)
+
+    # Build width attribute if requested
+    width_attr = f' width="{width}"' if width else ''
+
+    # Construct the HTML markdown string
+    html_string = f"""
+    <a href="{target_url}" target="_blank">
+        <img src="{img_url}" alt="Linked Image"{width_attr}/>
+    </a>
+    """
+    return html_string
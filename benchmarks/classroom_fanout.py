@@ -0,0 +1,246 @@
+"""Classroom fan-out: how long an instructor's card change takes to reach N attendees.
+
+Two measurements, both with --attendees sessions (default 200):
+
+  hub          ClassroomHub alone. Every subscriber's notify() hands a callback
+               to an asyncio event loop on another thread, as the app's
+               fragment_rerun_trigger does; times publish() itself and until
+               the loop has run the last attendee's callback.
+  server       A headless server (ws_session.py). One instructor session leads
+               a class with "Hide resolution" on, N attendee sessions join it,
+               then the instructor alternates a Sequential Review step and
+               Show Resolution. Times from the instructor's click until every
+               attendee's classroom fragment has re-rendered, with no request
+               from the attendees.
+
+    python benchmarks/classroom_fanout.py
+    python benchmarks/classroom_fanout.py --attendees 50,200 --rounds 10 --output fanout.json
+    python benchmarks/classroom_fanout.py --skip-server
+
+The attendee clients are threads on the same machine as the server, so on a
+small machine the server numbers include the clients' own CPU time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from classroom import ClassroomHub  # noqa: E402
+from click_cost import FINISHED  # noqa: E402
+from run_benchmarks import APP_SCRIPT, summarize  # noqa: E402
+from ws_session import StreamlitSession, streamlit_server  # noqa: E402
+
+DEFAULT_ATTENDEES = "200"
+CODE_PATTERN = re.compile(r"Class code: \*\*(\w+)\*\*")
+
+
+def hub_fanout(attendees, rounds):
+    """publish() to `attendees` event-loop subscribers, `rounds` times; returns the two latencies."""
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    hub = ClassroomHub()
+    code = hub.open_room()
+    delivered = [0]
+    all_delivered = threading.Event()
+
+    def deliver():
+        delivered[0] += 1
+        if delivered[0] == attendees:
+            all_delivered.set()
+
+    def notify():
+        loop.call_soon_threadsafe(deliver)
+        return True
+
+    for i in range(attendees):
+        hub.subscribe(code, f"attendee-{i}", notify)
+
+    publish, reached = [], []
+    for round_number in range(rounds):
+        delivered[0] = 0
+        all_delivered.clear()
+        started = time.perf_counter()
+        notified = hub.publish(code, "corpus", ("Stroke", round_number), False)
+        publish.append(time.perf_counter() - started)
+        all_delivered.wait()
+        reached.append(time.perf_counter() - started)
+        assert notified == attendees, notified
+
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join()
+    loop.close()
+    return {"attendees": attendees, "publish": summarize(publish), "all_delivered": summarize(reached)}
+
+
+class Attendee(threading.Thread):
+    """One attendee session: joins the class, then waits for runs the server pushes."""
+
+    def __init__(self, url, code, expected_runs, joined):
+        super().__init__(daemon=True)
+        self.url = url
+        self.code = code
+        self.expected_runs = expected_runs
+        self.joined = joined
+        self.finished_at = []     # time.perf_counter() at the end of each pushed run
+        self.failures = []
+        self.progress = threading.Semaphore(0)
+
+    def run(self):
+        session = None
+        try:
+            session = StreamlitSession(self.url)
+            session.rerun()
+            session.choose("Classroom:", "Join a class")
+            session.set_text("Class code:", self.code)
+            if not any(f"class {self.code}" in text for text in self.text(session)):
+                self.failures.append(f"didn't join: {self.text(session)[:2]}")
+        except Exception as exc:
+            self.failures.append(f"join: {type(exc).__name__}: {exc}")
+            self.joined.release()
+            return
+        self.joined.release()
+        try:
+            for _ in range(self.expected_runs):
+                result = session.receive_run()
+                self.finished_at.append(time.perf_counter())
+                if result.errors or result.status not in FINISHED:
+                    self.failures.append(f"{result.status} {result.errors[:1]}")
+                self.progress.release()
+        except Exception as exc:  # a timeout means a broadcast never arrived
+            self.failures.append(f"waiting: {type(exc).__name__}: {exc}")
+            self.progress.release()
+        finally:
+            session.close()
+
+    @staticmethod
+    def text(session):
+        """Markdown, info and caption text of the last run."""
+        texts = []
+        for element in session.elements:
+            kind = element.WhichOneof("type")
+            if kind == "markdown":
+                texts.append(element.markdown.body)
+            elif kind == "alert":
+                texts.append(element.alert.body)
+        return texts
+
+
+def server_fanout(app_script, attendees, rounds, timeout):
+    """Instructor plus `attendees` joined sessions on a fresh server; returns the delivery latencies."""
+    with streamlit_server(app_script) as url:
+        instructor = StreamlitSession(url)
+        instructor.rerun()
+        instructor.choose("Classroom:", "Lead a class")
+        match = next(filter(None, map(CODE_PATTERN.search, instructor.markdown())), None)
+        if match is None:
+            raise RuntimeError("The instructor's session shows no class code")
+        code = match.group(1)
+        instructor.set_checkbox("Hide resolution", True)
+
+        # Each round the instructor publishes twice: a new card, then its resolution
+        joined = threading.Semaphore(0)
+        sessions = [Attendee(url, code, 2 * rounds, joined) for _ in range(attendees)]
+        for session in sessions:
+            session.start()
+        for _ in sessions:
+            joined.acquire()
+        joined_sessions = [session for session in sessions if not session.failures]
+
+        instructor_runs, first, all_updated, per_attendee = [], [], [], []
+        failures = []
+        for round_number in range(rounds):
+            for action in ("step", "reveal"):
+                delivered = len(instructor_runs)
+                started = time.perf_counter()
+                if action == "step":
+                    result = instructor.set_number("Select Item", 2 + round_number)
+                else:
+                    result = instructor.click("Show Resolution")
+                instructor_runs.append(result.seconds)
+
+                # Every attendee should get exactly one run per publish
+                deadline = time.monotonic() + timeout
+                for session in joined_sessions:
+                    if not session.progress.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                        failures.append(f"{action} {round_number}: an attendee got no update in {timeout:g} s")
+                        break
+                arrivals = [session.finished_at[delivered] - started
+                            for session in joined_sessions if len(session.finished_at) > delivered]
+                if arrivals:
+                    per_attendee.extend(arrivals)
+                    first.append(min(arrivals))
+                    all_updated.append(max(arrivals))
+
+        for session in sessions:
+            session.join(timeout=timeout)
+            failures.extend(session.failures[:1])
+        instructor.close()
+
+    return {
+        "attendees": attendees,
+        "broadcasts": len(instructor_runs),
+        "joined": len(joined_sessions),
+        "failures": len(failures),
+        "failure_examples": failures[:5],
+        "instructor_run": summarize(instructor_runs),
+        "first_attendee_updated": summarize(first) if first else None,
+        "attendee_updated": summarize(per_attendee) if per_attendee else None,
+        "all_attendees_updated": summarize(all_updated) if all_updated else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure classroom broadcast fan-out to N attendees.")
+    parser.add_argument("--app", default=APP_SCRIPT, help="App script to serve (default: this checkout).")
+    parser.add_argument("--attendees", default=DEFAULT_ATTENDEES,
+                        help=f"Comma-separated attendee counts (default {DEFAULT_ATTENDEES}).")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="Instructor rounds (a step and a reveal each) per count (default 5).")
+    parser.add_argument("--hub-rounds", type=int, default=200, help="publish() calls per count for the hub (default 200).")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for one broadcast (default 30).")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure the hub, without a server.")
+    parser.add_argument("--output", help="Write results JSON here.")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.attendees.split(",") if n.strip()]
+    results = {"hub": [], "server": []}
+    for attendees in counts:
+        hub = hub_fanout(attendees, args.hub_rounds)
+        results["hub"].append(hub)
+        print(f"hub, {attendees} attendees: publish p50 {hub['publish']['p50_ms']:.3f} ms, "
+              f"all delivered p50 {hub['all_delivered']['p50_ms']:.3f} ms, "
+              f"p95 {hub['all_delivered']['p95_ms']:.3f} ms", flush=True)
+
+    if not args.skip_server:
+        app_script = os.path.abspath(args.app)
+        for attendees in counts:
+            print(f"server, {attendees} attendees joining...", flush=True)
+            r = server_fanout(app_script, attendees, args.rounds, args.timeout)
+            results["server"].append(r)
+            every = r["all_attendees_updated"] or {}
+            first = r["first_attendee_updated"] or {}
+            print(f"server, {r['joined']} of {attendees} attendees joined, {r['broadcasts']} broadcasts: first updated p50 "
+                  f"{first.get('p50_ms', 0):.1f} ms, all updated p50 {every.get('p50_ms', 0):.1f} ms, "
+                  f"max {every.get('max_ms', 0):.1f} ms; instructor run p50 "
+                  f"{r['instructor_run']['p50_ms']:.1f} ms; {r['failures']} failures", flush=True)
+            for example in r["failure_examples"]:
+                print(f"    {example}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-click server time and websocket bytes, measured against a real Streamlit server.
+
+Starts the app headless, connects one simulated browser over the websocket
+(ws_session.py) and repeats the card navigation clicks: Sequential +,
+Show Resolution (with "Hide resolution" on) and Shuffle Next Situation. For each
+click it records the round trip until ScriptFinished and every byte the server
+sent back, so a full-page rerun and a fragment rerun can be compared directly.
+
+    python benchmarks/click_cost.py
+    python benchmarks/click_cost.py --app /path/to/older/checkout/Situations-app_web.py
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from run_benchmarks import APP_SCRIPT, summarize  # noqa: E402
+from ws_session import StreamlitSession, streamlit_server  # noqa: E402
+
+
+FINISHED = ("FINISHED_SUCCESSFULLY", "FINISHED_FRAGMENT_RUN_SUCCESSFULLY")
+
+
+def measure(app_script, repeat):
+    """Returns {click: [RunResult, ...]} for one app script."""
+    clicks = {"sequential.plus": [], "show_resolution": [], "shuffle.next": []}
+    with streamlit_server(app_script) as url:
+        session = StreamlitSession(url)
+        try:
+            session.rerun()
+            # Sequential Review starts on the first card of the default Stroke; step through the next ones
+            for i in range(repeat):
+                clicks["sequential.plus"].append(session.set_number("Select Item", i % 20 + 2))
+
+            session.set_checkbox("Hide resolution", True)
+            for i in range(repeat):
+                session.set_number("Select Item", (i + repeat) % 20 + 2)
+                clicks["show_resolution"].append(session.click("Show Resolution"))
+
+            session.choose("Choose a Study Mode:", "Random Shuffle")
+            for _ in range(repeat):
+                clicks["shuffle.next"].append(session.click("Shuffle Next Situation"))
+        finally:
+            session.close()
+
+    for name, runs in clicks.items():
+        failed = [r for r in runs if r.errors or r.status not in FINISHED]
+        if failed:
+            raise RuntimeError(f"{name}: script run failed: {failed[0]}")
+    return clicks
+
+
+def report(clicks):
+    results = {}
+    for name, runs in clicks.items():
+        results[name] = {
+            **summarize([r.seconds for r in runs]),
+            "mean_bytes": round(statistics.fmean(r.bytes for r in runs)),
+            "mean_messages": round(statistics.fmean(r.messages for r in runs), 1),
+            "fragment_runs": sum(r.status == "FINISHED_FRAGMENT_RUN_SUCCESSFULLY" for r in runs),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-click server time and websocket bytes.")
+    parser.add_argument("--app", default=APP_SCRIPT, help="App script to serve (default: this checkout).")
+    parser.add_argument("--repeat", type=int, default=30, help="Clicks of each kind (default 30).")
+    parser.add_argument("--output", help="Write results JSON here.")
+    args = parser.parse_args()
+
+    results = report(measure(os.path.abspath(args.app), args.repeat))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"app": os.path.abspath(args.app), "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    print(f"\n{'click':20} {'p50 ms':>9} {'p90 ms':>9} {'bytes':>8} {'msgs':>6} {'fragment':>9}")
+    print("-" * 66)
+    for name, r in results.items():
+        print(f"{name:20} {r['p50_ms']:9.2f} {r['p90_ms']:9.2f} {r['mean_bytes']:8} "
+              f"{r['mean_messages']:6} {r['fragment_runs']:>5}/{r['n']}")
+
+
+if __name__ == "__main__":
+    main()
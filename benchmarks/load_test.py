@@ -0,0 +1,243 @@
+"""Meet-day load test: N simulated officials opening and using the app at once.
+
+For each session count (--sessions, e.g. 1,10,50,100,200) it starts a fresh
+headless server, then opens that many websocket sessions at the same moment
+(ws_session.py, the same messages a browser sends). Every session loads the
+page and then works through a study script --rounds times: Sequential Review
+steps, a switch to Random Shuffle and a few shuffles, a few keyword searches,
+a Number search, and back to Sequential Review, pausing a random "think time"
+between actions.
+
+Per level it reports rerun latency (p50/p95/p99, page loads separately),
+throughput in reruns per second, failed runs, and the server's resident memory
+per session (peak minus the warmed-up baseline, divided by N). The first level
+whose p95 rerun latency passes --slo-ms is marked as the knee.
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 25,50,100,150,200 --rounds 3 --output load.json
+
+The clients run as threads on the same machine as the server, so at high N
+they compete with it for CPU; on a small machine treat the knee as a lower bound.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from click_cost import FINISHED  # noqa: E402
+from run_benchmarks import APP_SCRIPT, summarize  # noqa: E402
+from ws_session import StreamlitSession, process_rss_bytes, streamlit_process  # noqa: E402
+
+DEFAULT_SESSIONS = "1,10,50,100,200"
+SEARCH_TERMS = ["kick", "false start", "turn judge", "touch", "dolphin", "relay", "goggles"]
+NUMBER_SEARCHES = ["12", "12-20", "45, 101", "60-75"]
+
+
+def study_script(session, rng):
+    """One round of what an official does after the page has loaded, as (action, call) pairs."""
+    start = rng.randint(2, 10)
+    for step in range(3):
+        yield "sequential.step", lambda n=start + step: session.set_number("Select Item", n)
+
+    yield "mode.switch", lambda: session.choose("Choose a Study Mode:", "Random Shuffle")
+    for _ in range(4):
+        yield "shuffle.next", lambda: session.click("Shuffle Next Situation")
+
+    yield "mode.switch", lambda: session.choose("Choose a Study Mode:", "Keyword Search")
+    for term in rng.sample(SEARCH_TERMS, 2):
+        yield "keyword.search", lambda term=term: session.set_text("Enter keyword or phrase:", term)
+
+    yield "mode.switch", lambda: session.choose("Choose a Study Mode:", "Search by Number")
+    yield "number.search", lambda: session.set_text("Enter Situation Number(s):", rng.choice(NUMBER_SEARCHES))
+
+    yield "mode.switch", lambda: session.choose("Choose a Study Mode:", "Sequential Review")
+
+
+class LevelRun:
+    """Shared state of one load level: the start gate, collected samples and completion."""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.start_gate = threading.Barrier(sessions + 1)
+        self.samples = defaultdict(list)    # action -> [seconds, ...]
+        self.failures = []
+        self.reported = 0
+        self.finished = threading.Condition()
+        self.release = threading.Event()
+
+    def report(self, samples, failures):
+        with self.finished:
+            for action, seconds in samples.items():
+                self.samples[action].extend(seconds)
+            self.failures.extend(failures)
+            self.reported += 1
+            self.finished.notify_all()
+
+    def wait_all_reported(self):
+        with self.finished:
+            self.finished.wait_for(lambda: self.reported == self.sessions)
+
+
+def run_session(url, index, level, rounds, think, seed):
+    """Body of one simulated browser: waits for the gate, loads the page, runs the script."""
+    rng = random.Random(f"{seed}/{index}")
+    samples = defaultdict(list)
+    failures = []
+    session = None
+
+    def record(action, call):
+        result = call()
+        samples[action].append(result.seconds)
+        if result.errors or result.status not in FINISHED:
+            failures.append(f"{action}: {result.status} {result.errors[:1]}")
+
+    level.start_gate.wait()
+    try:
+        session = StreamlitSession(url)
+        record("page.load", session.rerun)
+        for _ in range(rounds):
+            for action, call in study_script(session, rng):
+                if think:
+                    time.sleep(rng.uniform(0, 2 * think))
+                record(action, call)
+    except Exception as exc:  # a timeout or dropped connection fails this session, not the test
+        failures.append(f"session {index}: {type(exc).__name__}: {exc}")
+    finally:
+        level.report(samples, failures)
+        # Stay connected until every session is done, so memory is measured with all of them open
+        level.release.wait()
+        if session is not None:
+            session.close()
+
+
+def sample_memory(pid, stop, peak):
+    while not stop.wait(0.2):
+        rss = process_rss_bytes(pid)
+        if rss is not None:
+            peak[0] = max(peak[0] or 0, rss)
+
+
+def run_level(app_script, sessions, rounds, think, seed):
+    """Runs one session count against a fresh server; returns its report."""
+    with streamlit_process(app_script) as (url, process):
+        # Warm up the process (data load, indexes, imports) so the baseline is the idle server
+        warmup = StreamlitSession(url)
+        warmup.rerun()
+        warmup.close()
+        time.sleep(0.5)
+        baseline = process_rss_bytes(process.pid)
+
+        level = LevelRun(sessions)
+        threads = [
+            threading.Thread(target=run_session, name=f"session-{i}", daemon=True,
+                             args=(url, i, level, rounds, think, seed))
+            for i in range(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+
+        peak = [baseline]
+        stop = threading.Event()
+        sampler = threading.Thread(target=sample_memory, args=(process.pid, stop, peak), daemon=True)
+        sampler.start()
+
+        level.start_gate.wait()
+        started = time.perf_counter()
+        level.wait_all_reported()
+        elapsed = time.perf_counter() - started
+        final = process_rss_bytes(process.pid)
+
+        level.release.set()
+        stop.set()
+        sampler.join()
+        for thread in threads:
+            thread.join(timeout=30)
+
+    peak_rss = max((rss for rss in (peak[0], final) if rss is not None), default=None)
+    return level_report(level, elapsed, baseline, peak_rss)
+
+
+def level_report(level, elapsed, baseline, peak_rss):
+    reruns = [s for action, samples in level.samples.items() if action != "page.load" for s in samples]
+    report = {
+        "sessions": level.sessions,
+        "seconds": round(elapsed, 2),
+        "runs": sum(len(samples) for samples in level.samples.values()),
+        "failures": len(level.failures),
+        "failure_examples": level.failures[:5],
+        "throughput_runs_per_s": round(sum(len(s) for s in level.samples.values()) / elapsed, 1),
+        "page_load": summarize(level.samples["page.load"]) if level.samples["page.load"] else None,
+        "rerun": summarize(reruns) if reruns else None,
+        "actions": {action: summarize(samples) for action, samples in sorted(level.samples.items())},
+        "rss_baseline_mb": None,
+        "rss_peak_mb": None,
+        "rss_per_session_mb": None,
+    }
+    if baseline is not None and peak_rss is not None:
+        report["rss_baseline_mb"] = round(baseline / 2**20, 1)
+        report["rss_peak_mb"] = round(peak_rss / 2**20, 1)
+        report["rss_per_session_mb"] = round((peak_rss - baseline) / 2**20 / level.sessions, 2)
+    return report
+
+
+def print_table(levels, slo_ms):
+    print(f"\n{'sessions':>8} {'runs/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'load p95':>9} {'fail':>5} {'MB/sess':>8} {'peak MB':>8}")
+    print("-" * 84)
+    knee = None
+    for r in levels:
+        rerun = r["rerun"] or {}
+        load = r["page_load"] or {}
+        over = rerun.get("p95_ms", 0) > slo_ms or r["failures"]
+        if over and knee is None:
+            knee = r["sessions"]
+        per_session = r["rss_per_session_mb"]
+        print(f"{r['sessions']:8} {r['throughput_runs_per_s']:8} {rerun.get('p50_ms', 0):9.1f} "
+              f"{rerun.get('p95_ms', 0):9.1f} {rerun.get('p99_ms', 0):9.1f} {load.get('p95_ms', 0):9.1f} "
+              f"{r['failures']:5} {'-' if per_session is None else per_session:>8} "
+              f"{'-' if r['rss_peak_mb'] is None else r['rss_peak_mb']:>8}" + ("   <- knee" if knee == r["sessions"] else ""))
+        for example in r["failure_examples"]:
+            print(f"{'':8} {example}")
+    if knee is None:
+        print(f"\np95 rerun latency stayed under {slo_ms:g} ms at every level.")
+    else:
+        print(f"\nKnee: at {knee} sessions p95 rerun latency passed {slo_ms:g} ms (or runs failed).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate N concurrent sessions against a local server.")
+    parser.add_argument("--app", default=APP_SCRIPT, help="App script to serve (default: this checkout).")
+    parser.add_argument("--sessions", default=DEFAULT_SESSIONS,
+                        help=f"Comma-separated session counts, one level each (default {DEFAULT_SESSIONS}).")
+    parser.add_argument("--rounds", type=int, default=2, help="Study script rounds per session (default 2).")
+    parser.add_argument("--think", type=float, default=0.5,
+                        help="Mean pause between actions in seconds, uniform 0..2x (default 0.5, 0 = none).")
+    parser.add_argument("--slo-ms", type=float, default=500,
+                        help="p95 rerun latency that counts as overloaded (default 500).")
+    parser.add_argument("--seed", default="load", help="Seed for each session's choices (default 'load').")
+    parser.add_argument("--output", help="Write results JSON here.")
+    args = parser.parse_args()
+
+    app_script = os.path.abspath(args.app)
+    levels = []
+    for sessions in [int(n) for n in args.sessions.split(",") if n.strip()]:
+        print(f"{sessions} sessions...", flush=True)
+        levels.append(run_level(app_script, sessions, args.rounds, args.think, args.seed))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"app": app_script, "rounds": args.rounds, "think_s": args.think,
+                       "slo_ms": args.slo_ms, "levels": levels}, f, indent=2)
+        print(f"Wrote {args.output}")
+    print_table(levels, args.slo_ms)
+
+
+if __name__ == "__main__":
+    main()
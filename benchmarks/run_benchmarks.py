@@ -0,0 +1,325 @@
+"""Rerun-latency and hot-path benchmarks for the Situations & Resolutions app.
+
+App scenarios drive Situations-app_web.py headlessly with Streamlit's AppTest
+and time every rerun (Sequential +/- steps, shuffles, keyword searches of
+different lengths, number lookups). Micro-benchmarks time the hot functions
+directly, and a +/- walk through every deck reports the card cache's hit rate
+and memory use. Results are written as JSON and, if a baseline is given, compared
+against it with a regression report.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --save-baseline            # record benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+Exits with status 1 if any benchmark regressed past --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+APP_SCRIPT = os.path.join(REPO_DIR, "Situations-app_web.py")
+DEFAULT_BASELINE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+
+# Keyword searches from one letter to a full phrase
+KEYWORD_QUERIES = ["k", "kick", "dolphin kick", "the swimmer touched the wall with one hand"]
+# Searched (untimed) between two timed keyword searches: contains none of the queries, so each
+# timed run searches afresh instead of reusing or narrowing the session's last results
+KEYWORD_RESET_QUERY = "qqqq"
+NUMBER_QUERIES = ["12", "101", "12-20, 45, 101"]
+
+# Differences below this are timer noise, never a regression (milliseconds)
+NOISE_FLOOR_MS = 0.05
+
+
+def summarize(samples_s):
+    """Latency distribution in milliseconds."""
+    ms = sorted(s * 1000 for s in samples_s)
+
+    def pct(p):
+        return ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))]
+
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(pct(50), 4),
+        "p90_ms": round(pct(90), 4),
+        "p95_ms": round(pct(95), 4),
+        "p99_ms": round(pct(99), 4),
+        "max_ms": round(ms[-1], 4),
+    }
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# --- APP SCENARIOS (AppTest reruns) ---
+
+def _new_app():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=60)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"App failed to start: {at.exception}")
+    return at
+
+
+def _timed_run(at, samples):
+    start = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"App raised during benchmark: {at.exception}")
+
+
+def _select_mode(at, mode):
+    at.sidebar.radio[0].set_value(mode)
+    at.run()
+
+
+def bench_sequential(repeat):
+    at = _new_app()
+    plus, minus = [], []
+    for _ in range(repeat):
+        at.number_input(key="seq_num_input").increment()
+        _timed_run(at, plus)
+    for _ in range(repeat):
+        at.number_input(key="seq_num_input").decrement()
+        _timed_run(at, minus)
+    return {"app.sequential.plus": plus, "app.sequential.minus": minus}
+
+
+def bench_shuffle(repeat):
+    at = _new_app()
+    _select_mode(at, "Random Shuffle")
+    samples = []
+    for _ in range(repeat):
+        next(b for b in at.button if b.label == "Shuffle Next Situation").click()
+        _timed_run(at, samples)
+    return {"app.shuffle.next": samples}
+
+
+def bench_keyword(repeat):
+    at = _new_app()
+    _select_mode(at, "Keyword Search")
+    results = {}
+    for query in KEYWORD_QUERIES:
+        samples = []
+        for _ in range(repeat):
+            # Alternate with a different query so every timed rerun is a real search
+            at.text_input[0].input(KEYWORD_RESET_QUERY)
+            at.run()
+            at.text_input[0].input(query)
+            _timed_run(at, samples)
+        results[f"app.keyword.{len(query.split())}w_{len(query)}c"] = samples
+    return results
+
+
+def bench_number(repeat):
+    at = _new_app()
+    _select_mode(at, "Search by Number")
+    results = {}
+    for query in NUMBER_QUERIES:
+        samples = []
+        for _ in range(repeat):
+            at.text_input[0].input("")
+            at.run()
+            at.text_input[0].input(query)
+            _timed_run(at, samples)
+        results[f"app.number.{query.replace(' ', '')}"] = samples
+    return results
+
+
+APP_SCENARIOS = [bench_sequential, bench_shuffle, bench_keyword, bench_number]
+
+
+# --- MICRO-BENCHMARKS (hot paths called directly) ---
+
+def card_cache_walk():
+    """Steps through every Sequential Review deck like a user pressing +, with prefetch.
+
+    Returns the cache's hit rate and memory use after the walk.
+    """
+    import dataset
+    from card_cache import CardCache
+    from lookups import StrokePartitions
+
+    df = dataset.load_dataset(os.path.join(REPO_DIR, dataset.DEFAULT_SOURCE))
+    cache = CardCache.from_dataframe(df)
+    partitions = StrokePartitions.from_dataframe(df)
+    for topic in partitions.topics:
+        deck = partitions.deck(topic)
+        for i in range(len(deck)):
+            cache.get(deck[i], 18)
+            cache.prefetch([deck[i - 1], deck[(i + 1) % len(deck)]], 18)
+            # A user reads for seconds; give the prefetch thread a moment to run
+            time.sleep(0.002)
+    return cache.stats()
+
+
+def run_micro(repeat):
+    import dataset
+    from assets import get_img_with_href
+    from card_cache import CardCache
+    from corpus import CorpusData, CorpusRegistry
+    from highlight import highlight_text
+    from related import RelatedIndex
+    from search_index import IncrementalSearch, KeywordIndex, perform_keyword_search
+
+    source = os.path.join(REPO_DIR, dataset.DEFAULT_SOURCE)
+    df = dataset.load_dataset(source)
+    index = KeywordIndex.from_dataframe(df)
+    long_text = max(df["Situation"].tolist(), key=len)
+    long_row = df["Situation"].str.len().idxmax()
+    cold_cache = CardCache.from_dataframe(df, max_entries=0)
+    warm_cache = CardCache.from_dataframe(df)
+    warm_cache.get(long_row, 18, ("swimmer", False))
+    related = RelatedIndex.from_dataframe(df)
+    # Looks for a changed source on every get(), the worst case of the reload check
+    registry = CorpusRegistry(source, reload_seconds=1e-9)
+    corpus_key = next(iter(registry.corpora))
+    registry.get(corpus_key)
+
+    results = {
+        # load_data(): snapshot path, and the parse it replaces on a cache miss
+        "micro.load_data.snapshot": time_calls(lambda: dataset.load_dataset(source), repeat),
+        "micro.load_data.parse_source": time_calls(lambda: dataset.read_source(source), max(3, repeat // 20)),
+        "micro.search_index.build": time_calls(lambda: KeywordIndex.from_dataframe(df), max(3, repeat // 20)),
+        "micro.related.build": time_calls(lambda: RelatedIndex.from_dataframe(df), max(3, repeat // 20)),
+        "micro.related.lookup": time_calls(lambda: related.related(long_row), repeat),
+        # A reload: every index built again from the new rows (on a background thread), and
+        # what a run pays for the source check in get()
+        "micro.corpus.rebuild": time_calls(lambda: CorpusData(["bench"], "bench", df), max(3, repeat // 20)),
+        "micro.corpus.get_checking_source": time_calls(lambda: registry.get(corpus_key), repeat),
+        "micro.get_img_with_href": time_calls(
+            lambda: get_img_with_href("pns_logo.png", "https://www.pns.org/page/home", width=100), repeat
+        ),
+        "micro.highlight_text.one_term": time_calls(lambda: highlight_text(long_text, "swimmer"), repeat),
+        "micro.highlight_text.three_terms": time_calls(
+            lambda: highlight_text(long_text, ["swimmer", "wall", "touch"]), repeat
+        ),
+        # Rendering the longest card with a highlight: on a cache miss, and from the cache
+        "micro.card_cache.render": time_calls(lambda: cold_cache.get(long_row, 18, ("swimmer", False)), repeat),
+        "micro.card_cache.hit": time_calls(lambda: warm_cache.get(long_row, 18, ("swimmer", False)), repeat),
+    }
+    for query in KEYWORD_QUERIES:
+        key = f"{len(query.split())}w_{len(query)}c"
+        results[f"micro.perform_keyword_search.{key}"] = time_calls(
+            lambda: perform_keyword_search(df, index, query, "All", "All"), repeat
+        )
+        results[f"micro.perform_keyword_search.ranked.{key}"] = time_calls(
+            lambda: perform_keyword_search(df, index, query, "All", "All", ranked=True), repeat
+        )
+    # Typing the longest query one keystroke at a time: every prefix searched afresh, or narrowed per session
+    typed = [KEYWORD_QUERIES[-1][:n] for n in range(1, len(KEYWORD_QUERIES[-1]) + 1)]
+    results["micro.search_as_you_type.fresh"] = time_calls(lambda: [index.search(q) for q in typed], repeat)
+    results["micro.search_as_you_type.incremental"] = time_calls(
+        lambda: [searcher.search(q) for searcher in [IncrementalSearch(index)] for q in typed], repeat
+    )
+    return results
+
+
+# --- REPORTING ---
+
+def compare(results, baseline, threshold):
+    """Prints a comparison table; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':48} {'base p50':>10} {'now p50':>10} {'change':>9}")
+    print("-" * 80)
+    for name, now in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:48} {'-':>10} {now['p50_ms']:10.3f} {'new':>9}")
+            continue
+        before, after = base["p50_ms"], now["p50_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold and after - before > NOISE_FLOOR_MS:
+            flag = "  << REGRESSION"
+            regressions.append(name)
+        elif change < -threshold and before - after > NOISE_FLOOR_MS:
+            flag = "  (faster)"
+        print(f"{name:48} {before:10.3f} {after:10.3f} {change:+8.1%}{flag}")
+    for name in sorted(set(baseline) - set(results)):
+        print(f"{name:48} {baseline[name]['p50_ms']:10.3f} {'-':>10} {'gone':>9}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rerun latency and hot paths.")
+    parser.add_argument("--repeat", type=int, default=20, help="Reruns per app scenario (default 20).")
+    parser.add_argument("--micro-repeat", type=int, default=500, help="Calls per micro-benchmark (default 500).")
+    parser.add_argument("--only", choices=["app", "micro"], help="Run just one group.")
+    parser.add_argument("--output", help="Write results JSON here.")
+    parser.add_argument("--baseline", help="Compare against this results JSON.")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write results to {DEFAULT_BASELINE}.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative p50 slowdown that counts as a regression (default 0.25).")
+    args = parser.parse_args()
+
+    # Relative paths in the app (data file, logos) resolve from the repo root
+    os.chdir(REPO_DIR)
+
+    samples = {}
+    card_cache_stats = None
+    if args.only in (None, "micro"):
+        samples.update(run_micro(args.micro_repeat))
+        card_cache_stats = card_cache_walk()
+    if args.only in (None, "app"):
+        for scenario in APP_SCENARIOS:
+            samples.update(scenario(args.repeat))
+
+    results = {name: summarize(s) for name, s in samples.items()}
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "micro_repeat": args.micro_repeat,
+        },
+        "results": results,
+    }
+    if card_cache_stats is not None:
+        report["card_cache"] = card_cache_stats
+
+    for path in filter(None, [args.output, DEFAULT_BASELINE if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if card_cache_stats is not None:
+        print(f"Card cache after a +/- walk of every deck: {card_cache_stats['hit_rate']:.0%} hits, "
+              f"{card_cache_stats['prefetch_hits']} of {card_cache_stats['prefetched']} prefetched cards used, "
+              f"{card_cache_stats['entries']} cards in {card_cache_stats['bytes'] / 1024:.0f} KB")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+    else:
+        print(f"\n{'benchmark':48} {'p50 ms':>10} {'p90 ms':>10} {'max ms':>10}")
+        print("-" * 80)
+        for name, r in sorted(results.items()):
+            print(f"{name:48} {r['p50_ms']:10.3f} {r['p90_ms']:10.3f} {r['max_ms']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
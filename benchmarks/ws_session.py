@@ -0,0 +1,236 @@
+"""A minimal browser stand-in that drives a running Streamlit server over its websocket.
+
+It speaks the same protobuf messages as the Streamlit frontend (BackMsg out,
+ForwardMsg in), so each interaction costs the server exactly what a real click
+does, and every byte the server sends back is counted.
+
+    with streamlit_server(APP_SCRIPT) as url:
+        session = StreamlitSession(url)
+        session.rerun()                          # first page load
+        session.click("Shuffle Next Situation")
+        print(session.last.seconds, session.last.bytes)
+
+Only the widgets this app uses are supported (button, checkbox, number input,
+radio, segmented control, slider, text input, selectbox).
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.request import urlopen
+
+from websockets.sync.client import connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+DESKTOP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36"
+
+# What one script run cost: wall time from sending the BackMsg to ScriptFinished,
+# bytes and messages received, the ScriptFinished status name and any exception messages
+RunResult = namedtuple("RunResult", "seconds bytes messages status errors")
+
+# A widget seen in the last deltas: its id, label, element type and the fragment it lives in
+Widget = namedtuple("Widget", "id label kind fragment_id")
+
+_WIDGET_KINDS = ("button", "checkbox", "number_input", "radio", "button_group", "text_input", "selectbox", "slider")
+
+
+class StreamlitSession:
+    """One simulated browser tab."""
+
+    def __init__(self, url, user_agent=DESKTOP_USER_AGENT, timeout=60):
+        ws_url = url.replace("http://", "ws://").rstrip("/") + "/_stcore/stream"
+        self._ws = connect(
+            ws_url,
+            subprotocols=["streamlit"],
+            user_agent_header=user_agent,
+            additional_headers={"Sec-CH-UA-Mobile": "?0"},
+            max_size=None,
+            open_timeout=timeout,
+            # No keepalive pings: a server saturated by the other sessions may not answer them
+            # in time, and the client would drop a connection that is only waiting its turn
+            ping_interval=None,
+        )
+        self.timeout = timeout
+        self.widgets = {}      # label -> Widget, from every run so far
+        self.runs = []         # RunResult per script run
+        self.elements = []     # Element protos of the last run
+
+    @property
+    def last(self):
+        return self.runs[-1]
+
+    def close(self):
+        self._ws.close()
+
+    def rerun(self, widget_states=(), fragment_id=""):
+        """Sends one rerun request and reads messages until the script finishes."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+
+        started = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        return self.receive_run(started)
+
+    def receive_run(self, started=None):
+        """Reads messages until a script run finishes, e.g. one the server started on its own.
+
+        Timed from `started` (a time.perf_counter() value), or from the first message.
+        """
+        received = messages = 0
+        self.elements = []
+        while True:
+            data = self._ws.recv(timeout=self.timeout)
+            if started is None:
+                started = time.perf_counter()
+            received += len(data)
+            messages += 1
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._see_element(forward.delta.new_element, forward.delta.fragment_id)
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(forward.script_finished)
+                if status != "FINISHED_EARLY_FOR_RERUN":
+                    break
+        errors = [e.exception.message for e in self.elements if e.WhichOneof("type") == "exception"]
+        result = RunResult(time.perf_counter() - started, received, messages, status, errors)
+        self.runs.append(result)
+        return result
+
+    def _see_element(self, element, fragment_id):
+        self.elements.append(element)
+        kind = element.WhichOneof("type")
+        if kind in _WIDGET_KINDS:
+            proto = getattr(element, kind)
+            label = getattr(proto, "label", "") or proto.id
+            self.widgets[label] = Widget(proto.id, label, kind, fragment_id)
+
+    def _widget(self, label):
+        try:
+            return self.widgets[label]
+        except KeyError:
+            raise KeyError(f"No widget labelled {label!r}; seen: {sorted(self.widgets)}") from None
+
+    def _send(self, widget, **value):
+        state = WidgetState(id=widget.id, **value)
+        return self.rerun([state], fragment_id=widget.fragment_id)
+
+    def click(self, label):
+        return self._send(self._widget(label), trigger_value=True)
+
+    def set_number(self, label, value):
+        return self._send(self._widget(label), double_value=float(value))
+
+    def set_text(self, label, value):
+        return self._send(self._widget(label), string_value=value)
+
+    def set_checkbox(self, label, value):
+        return self._send(self._widget(label), bool_value=bool(value))
+
+    def set_slider(self, label, value):
+        widget = self._widget(label)
+        state = WidgetState(id=widget.id)
+        state.double_array_value.data.append(float(value))
+        return self.rerun([state], fragment_id=widget.fragment_id)
+
+    def choose(self, label, option):
+        """Picks an option of a radio or selectbox (sent by label) or a segmented control."""
+        widget = self._widget(label)
+        if widget.kind == "button_group":
+            state = WidgetState(id=widget.id)
+            state.string_array_value.data.append(option)
+            return self.rerun([state], fragment_id=widget.fragment_id)
+        return self._send(widget, string_value=option)
+
+    def markdown(self):
+        """Text of the markdown elements of the last run (to check what a click rendered)."""
+        return [e.markdown.body for e in self.elements if e.WhichOneof("type") == "markdown"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_rss_bytes(pid):
+    """Resident memory of process `pid` in bytes, or None where it can't be read.
+
+    Uses psutil if it is installed, otherwise /proc (Linux).
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@contextmanager
+def streamlit_server(app_script, port=None, env=None, startup_timeout=60):
+    """Runs `streamlit run app_script` headless on localhost and yields its URL."""
+    with streamlit_process(app_script, port, env, startup_timeout) as (url, _):
+        yield url
+
+
+@contextmanager
+def streamlit_process(app_script, port=None, env=None, startup_timeout=60):
+    """Like streamlit_server, but yields (url, subprocess.Popen) to watch the server process."""
+    port = port or free_port()
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", app_script,
+        "--server.headless=true", f"--server.port={port}", "--server.address=127.0.0.1",
+        "--browser.gatherUsageStats=false", "--server.fileWatcherType=none",
+    ]
+    # Server output goes to a temp file so a chatty server can never block on a full pipe
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        cmd, cwd=os.path.dirname(os.path.abspath(app_script)), env=env,
+        stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                with urlopen(f"{url}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                if process.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"Streamlit exited: {log.read().decode(errors='replace')}")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Streamlit did not start on port {port}")
+                time.sleep(0.2)
+        yield url, process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
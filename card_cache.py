@@ -0,0 +1,142 @@
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from highlight import highlight_text, normalize_terms
+
+# The markup of one card, ready to hand to st.info / st.markdown
+RenderedCard = namedtuple("RenderedCard", ["header", "situation", "resolution", "rule"])
+
+
+class CardCache:
+    """Bounded LRU cache of rendered card HTML, shared by all sessions.
+
+    Keyed by (row label, font size, highlight terms, whole_words), so a card is
+    highlighted and formatted once and every later visit is a dictionary lookup.
+    prefetch() renders cards on a background thread before they are asked for
+    (Sequential Review warms the previous and next card while the current one
+    is being read).
+
+    Entries are evicted least recently used first once either max_entries or
+    max_bytes is exceeded.
+    """
+
+    def __init__(self, labels, strokes, numbers, situations, resolutions, rules,
+                 max_entries=2048, max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            labels: DataFrame index labels, in row order.
+            strokes, numbers, situations, resolutions, rules: column values per row.
+            max_entries: most cards kept.
+            max_bytes: most memory (as measured by sys.getsizeof) kept in rendered HTML.
+        """
+        self._rows = {
+            label: fields
+            for label, *fields in zip(labels, strokes, numbers, situations, resolutions, rules)
+        }
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._cards = OrderedDict()   # key -> (RenderedCard, size in bytes)
+        self._unused_prefetches = set()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.prefetch_hits = 0
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="card-prefetch")
+
+    @classmethod
+    def from_dataframe(cls, df, **limits):
+        return cls(
+            df.index.tolist(), df['Stroke'].tolist(), df['Number'].tolist(), df['Situation'].tolist(),
+            df['Recommended resolution'].tolist(), df['Applicable Rule'].tolist(), **limits
+        )
+
+    @staticmethod
+    def _key(label, font_size, highlight):
+        if highlight is None:
+            return (label, font_size, (), False)
+        terms, whole_words = highlight
+        return (label, font_size, normalize_terms(terms), bool(whole_words))
+
+    def get(self, label, font_size, highlight=None):
+        """The rendered card for row `label`, from the cache or rendered now.
+
+        Args:
+            label: row label of the card.
+            font_size: pixel font size of the card text.
+            highlight: optional (terms, whole_words) to mark up, as for highlight_text.
+        """
+        key = self._key(label, font_size, highlight)
+        with self._lock:
+            entry = self._cards.get(key)
+            if entry is not None:
+                self._cards.move_to_end(key)
+                self.hits += 1
+                if key in self._unused_prefetches:
+                    self._unused_prefetches.discard(key)
+                    self.prefetch_hits += 1
+                return entry[0]
+            self.misses += 1
+        return self._store(key, self._render(key))
+
+    def prefetch(self, labels, font_size, highlight=None):
+        """Renders the given cards in the background if they are not cached yet."""
+        keys = [self._key(label, font_size, highlight) for label in labels if label in self._rows]
+        with self._lock:
+            keys = [key for key in keys if key not in self._cards]
+        for key in keys:
+            self._prefetcher.submit(self._prefetch_one, key)
+
+    def _prefetch_one(self, key):
+        with self._lock:
+            if key in self._cards:
+                return
+        self._store(key, self._render(key), prefetched=True)
+
+    def _render(self, key):
+        label, font_size, terms, whole_words = key
+        stroke, number, situation, resolution, rule = self._rows[label]
+        if terms:
+            situation = highlight_text(situation, list(terms), whole_words=whole_words)
+            resolution = highlight_text(resolution, list(terms), whole_words=whole_words)
+        return RenderedCard(
+            header=f"**Stroke/Topic: {stroke}  #{number}** \n\n **Situation:**",
+            situation=f'<div style="font-size: {font_size}px;"><br>{situation}</div>',
+            resolution=f'<div style="font-size: {font_size}px;">{resolution}</div>',
+            rule=f'<div style="font-size: {font_size}px;">{rule}</div>',
+        )
+
+    def _store(self, key, card, prefetched=False):
+        size = sys.getsizeof(card) + sum(sys.getsizeof(part) for part in card)
+        with self._lock:
+            if key in self._cards:
+                # Rendered twice at once (request and prefetch); keep the first
+                return self._cards[key][0]
+            self._cards[key] = (card, size)
+            self._bytes += size
+            if prefetched:
+                self.prefetched += 1
+                self._unused_prefetches.add(key)
+            while self._cards and (len(self._cards) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, (_, old_size) = self._cards.popitem(last=False)
+                self._bytes -= old_size
+                self._unused_prefetches.discard(old_key)
+        return card
+
+    def stats(self):
+        """Hit rate and memory use of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cards),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "prefetched": self.prefetched,
+                "prefetch_hits": self.prefetch_hits,
+            }
@@ -0,0 +1,95 @@
+"""Compact prebuilt card file for the terminal client, loaded without pandas.
+
+dataset.py needs pandas (and openpyxl for the workbook), which alone takes
+longer to import than a terminal session should take to start. This module
+writes the canonical columns once to <source>.cards.json, a compact JSON list of
+rows stamped with the source's size and modification time, and loads it back
+into __slots__ Card records. Only a missing or stale card file goes through
+dataset.load_dataset, so pandas is imported only the first time after the
+source changes.
+
+    python cards.py Situations-n-Resolutions-with-sections.xlsx    # prebuild
+"""
+import argparse
+import json
+import os
+import time
+
+from documents import source_stamp
+
+CARDS_SUFFIX = ".cards.json"
+# Bump when the file layout changes
+CARDS_VERSION = 1
+
+
+class Card:
+    """One situation, as the terminal client shows it."""
+
+    __slots__ = ("stroke", "number", "situation", "resolution", "rule")
+
+    def __init__(self, stroke, number, situation, resolution, rule):
+        self.stroke = stroke
+        self.number = number
+        self.situation = situation
+        self.resolution = resolution
+        self.rule = rule
+
+
+def cards_path(source_path):
+    return source_path + CARDS_SUFFIX
+
+
+def compile_cards(source_path):
+    """Parses the source (through dataset.py) and writes its card file. Returns the Cards."""
+    import pandas as pd
+
+    from dataset import CANONICAL_COLUMNS, load_dataset
+
+    stamp = source_stamp(source_path)
+    df = load_dataset(source_path)
+    rows = []
+    for values in df[CANONICAL_COLUMNS].itertuples(index=False):
+        # Blank cells become None and NumPy scalars plain Python, so the file stays plain JSON
+        rows.append([None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+                     for value in values])
+
+    # Write then rename so a client starting meanwhile never reads half a file
+    path = cards_path(source_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CARDS_VERSION, "source_stamp": stamp, "rows": rows},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return [Card(*row) for row in rows]
+
+
+def load_cards(source_path):
+    """Cards of `source_path`, from its card file when that is current."""
+    try:
+        with open(cards_path(source_path), encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == CARDS_VERSION and data.get("source_stamp") == source_stamp(source_path):
+            return [Card(*row) for row in data["rows"]]
+    except (OSError, ValueError):
+        pass
+    return compile_cards(source_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the terminal client's card file.")
+    parser.add_argument("source", nargs="?", help="Dataset file (.xlsx, .ods or .csv).")
+    args = parser.parse_args()
+
+    from dataset import DEFAULT_SOURCE
+    source = args.source or os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_SOURCE)
+    started = time.perf_counter()
+    cards = compile_cards(source)
+    print(f"Wrote {len(cards)} cards to {cards_path(source)} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    load_cards(source)
+    print(f"Loading them takes {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
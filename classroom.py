@@ -0,0 +1,233 @@
+"""Classroom mode: an instructor's current card, broadcast to the attendees' sessions.
+
+Rooms live in one ClassroomHub per server process (shared by all sessions
+through st.cache_resource). The instructor's session publishes the card it is
+showing and whether the resolution is revealed; every attendee session
+subscribed to the room code is notified straight away, on the publisher's
+thread. An attendee's notify callback (see fragment_rerun_trigger) only asks
+Streamlit to rerun that session's classroom fragment, so a broadcast costs the
+attendees one small fragment run each and nobody polls.
+
+fragment_rerun_trigger() relies on Streamlit internals, which any release may
+change. It checks them before handing out a trigger, and the first failure on
+the event loop switches push off for the process: push_supported() then
+returns False and attendees fall back to polling.
+
+All state is in memory: rooms disappear when the server restarts, and rooms
+nobody has published to for ROOM_IDLE_SECONDS are dropped when a new one opens.
+"""
+import secrets
+import threading
+import time
+from collections import namedtuple
+
+# No 0/O, 1/I/L: codes are read aloud and typed on phones
+CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 4
+ROOM_IDLE_SECONDS = 6 * 60 * 60
+
+# What attendees show: the instructor's document, card as its (Stroke, Number) (None before
+# the first one; row labels aren't stable across reloads) and the reveal
+RoomState = namedtuple("RoomState", ["version", "corpus_key", "situation", "revealed", "published_at"])
+
+
+class _Room:
+    __slots__ = ("code", "state", "subscribers")
+
+    def __init__(self, code):
+        self.code = code
+        self.state = RoomState(0, None, None, False, time.time())
+        self.subscribers = {}   # subscriber id -> notify()
+
+
+class ClassroomHub:
+    """In-process publish/subscribe of each room's current card, keyed by room code.
+
+    Thread-safe. publish() replaces the room's state under the lock, then calls
+    every subscriber's notify() outside it, so a broadcast to N attendees is N
+    plain function calls. notify() must not block; returning False (or raising)
+    unsubscribes it, which is how sessions that went away are dropped.
+    """
+
+    def __init__(self, code_length=CODE_LENGTH, idle_seconds=ROOM_IDLE_SECONDS):
+        self.code_length = code_length
+        self.idle_seconds = idle_seconds
+        self.published = 0
+        self.notified = 0
+        self._lock = threading.Lock()
+        self._rooms = {}
+
+    def open_room(self):
+        """Opens a room under a new, unused code and returns the code."""
+        with self._lock:
+            self._prune()
+            while True:
+                code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(self.code_length))
+                if code not in self._rooms:
+                    self._rooms[code] = _Room(code)
+                    return code
+
+    def close_room(self, code):
+        with self._lock:
+            self._rooms.pop(self.normalize_code(code), None)
+
+    def _prune(self):
+        cutoff = time.time() - self.idle_seconds
+        for code in [code for code, room in self._rooms.items() if room.state.published_at < cutoff]:
+            del self._rooms[code]
+
+    @staticmethod
+    def normalize_code(code):
+        return (code or "").strip().upper()
+
+    def state(self, code):
+        """The room's RoomState, or None if there is no such room."""
+        with self._lock:
+            room = self._rooms.get(self.normalize_code(code))
+            return room.state if room is not None else None
+
+    def publish(self, code, corpus_key, situation, revealed):
+        """Sets the room's card and notifies its subscribers.
+
+        Publishing what the room already shows does nothing, so the instructor's
+        session can publish on every run. Returns the number of subscribers
+        notified (None if the state didn't change or the room is gone).
+        """
+        with self._lock:
+            room = self._rooms.get(self.normalize_code(code))
+            if room is None:
+                return None
+            state = room.state
+            if (state.corpus_key, state.situation, state.revealed) == (corpus_key, situation, revealed):
+                return None
+            room.state = RoomState(state.version + 1, corpus_key, situation, revealed, time.time())
+            subscribers = list(room.subscribers.items())
+            self.published += 1
+
+        gone = []
+        for subscriber_id, notify in subscribers:
+            try:
+                delivered = notify()
+            except Exception:
+                delivered = False
+            if delivered is False:
+                gone.append((subscriber_id, notify))
+
+        with self._lock:
+            self.notified += len(subscribers) - len(gone)
+            for subscriber_id, notify in gone:
+                # Unless it subscribed again meanwhile with a new callback
+                if room.subscribers.get(subscriber_id) is notify:
+                    del room.subscribers[subscriber_id]
+        return len(subscribers) - len(gone)
+
+    def subscribe(self, code, subscriber_id, notify):
+        """Registers notify() for the room's changes (replacing this subscriber's previous one).
+
+        Returns the room's current RoomState, or None if there is no such room.
+        """
+        with self._lock:
+            room = self._rooms.get(self.normalize_code(code))
+            if room is None:
+                return None
+            room.subscribers[subscriber_id] = notify
+            return room.state
+
+    def unsubscribe(self, code, subscriber_id):
+        with self._lock:
+            room = self._rooms.get(self.normalize_code(code))
+            if room is not None:
+                room.subscribers.pop(subscriber_id, None)
+
+    def attendees(self, code):
+        with self._lock:
+            room = self._rooms.get(self.normalize_code(code))
+            return len(room.subscribers) if room is not None else 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rooms": len(self._rooms),
+                "subscribers": sum(len(room.subscribers) for room in self._rooms.values()),
+                "published": self.published,
+                "notified": self.notified,
+            }
+
+
+# Set the first time a pushed rerun fails; push stays off for this process from then on
+_push_failed = threading.Event()
+
+
+def push_supported():
+    """Whether fragment_rerun_trigger() can work here: a Streamlit server runtime is running
+    and no pushed rerun has failed yet."""
+    if _push_failed.is_set():
+        return False
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner_utils.script_run_context import ThreadState  # noqa: F401
+    except ImportError:
+        return False
+    return Runtime.exists()
+
+
+def fragment_rerun_trigger():
+    """A notify() that reruns the calling fragment of the calling session, from any thread.
+
+    Call it inside an @st.fragment function. Returns None when the running
+    Streamlit doesn't expose what it needs (no server runtime, as under
+    AppTest, or changed internals) or a pushed rerun has failed before; see
+    push_supported().
+
+    notify() hands the rerun to the server's event loop and returns at once;
+    it returns False once the session has disconnected, or once a pushed
+    rerun has failed. The rerun carries no widget states, so it can't undo a
+    widget change the browser is sending at the same moment.
+    """
+    if _push_failed.is_set():
+        return None
+    try:
+        from streamlit.proto.ClientState_pb2 import ClientState
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner_utils.script_run_context import ThreadState, get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        fragment_id = ThreadState.get().fragment_id
+        runtime = Runtime.instance()
+        eventloop = runtime._get_async_objs().eventloop
+        session_mgr = runtime._session_mgr
+        # Everything rerun_on_eventloop() uses, checked here so changed internals mean polling
+        info = session_mgr.get_active_session_info(ctx.session_id)
+        info.session._client_state.page_script_hash
+        info.session.request_rerun
+    except Exception:
+        return None
+    if not fragment_id:
+        return None
+    session_id = ctx.session_id
+
+    def rerun_on_eventloop():
+        try:
+            info = session_mgr.get_active_session_info(session_id)
+            if info is None:
+                return
+            last = info.session._client_state
+            client_state = ClientState(
+                query_string=last.query_string,
+                page_script_hash=last.page_script_hash,
+                page_name=last.page_name,
+                fragment_id=fragment_id,
+                is_auto_rerun=True,
+            )
+            info.session.request_rerun(client_state)
+        except Exception:
+            # Not worth a retry on every broadcast: poll from now on
+            _push_failed.set()
+
+    def notify():
+        if _push_failed.is_set() or not runtime.is_active_session(session_id):
+            return False
+        eventloop.call_soon_threadsafe(rerun_on_eventloop)
+        return True
+
+    return notify
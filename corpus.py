@@ -0,0 +1,374 @@
+"""Registry of study documents ("corpora"), each loaded and indexed on first use.
+
+Besides the built-in Stroke & Turn workbook, any .xlsx / .ods / .csv file in the
+corpora/ folder next to the app (or in the folders listed in
+SITUATIONS_CORPORA_DIRS, separated by os.pathsep) becomes a corpus, e.g.
+corpora/Starter.xlsx or corpora/Referee-and-Admin.xlsx. Files must use the
+canonical columns (or their aliases, see dataset.COLUMN_ALIASES).
+
+A corpus is parsed and indexed only when it is first selected. Loaded corpora
+are kept in least-recently-used order and evicted once their estimated memory
+passes the budget (SITUATIONS_CORPUS_BUDGET_MB, default 256). combined() joins
+all loaded corpora into one so search and shuffle can span documents.
+
+Loaded corpora are reloaded when their source file changes (a corrected
+workbook mid-season): at most every SITUATIONS_RELOAD_SECONDS (default 2, 0 to
+turn it off) get() compares each loaded source's size and modification time
+with those it was loaded from. A changed file is hashed and, if its content
+changed, parsed and indexed again on a background thread; the new CorpusData
+then replaces the old one in a single assignment. Runs keep the CorpusData they
+started with, so none ever sees a mix of old and new data or indexes.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+from card_cache import CardCache
+from dataset import file_hash, load_dataset
+from documents import APP_DIR, DEFAULT_SOURCE, document_info, source_stamp, title_from_path
+from lookups import NumberIndex, StrokePartitions
+from related import RelatedIndex
+from rule_index import RuleIndex
+from search_index import KeywordIndex
+
+CORPORA_DIR = os.path.join(APP_DIR, "corpora")
+DEFAULT_BUDGET_MB = 256
+DEFAULT_RELOAD_SECONDS = 2
+
+# For one document saved in several formats, the first of these is the source of truth
+# (the others only speed up parsing, see dataset.faster_alternates)
+PRIMARY_EXTENSIONS = (".xlsx", ".ods", ".csv")
+
+# Pseudo corpus key for "all loaded documents at once"
+ALL_LOADED = "*"
+
+# A discovered document: key (file stem), display title, source path and
+# documents.DocumentInfo (or None)
+Corpus = namedtuple("Corpus", ["key", "title", "source_path", "info"])
+
+# Numbers each CorpusData built in this process, so sessions can tell a reload apart
+# without keeping the old one alive
+_versions = itertools.count(1)
+
+
+class CorpusData:
+    """One corpus (or a combination of them) with the indexes every study mode uses.
+
+    Never modified once built: a reload builds a new CorpusData, with a new version.
+    """
+
+    __slots__ = ("keys", "title", "df", "parts", "version", "search_index", "partitions", "number_index",
+                 "rule_index", "related", "card_cache", "size_bytes", "_rows_by_situation")
+
+    def __init__(self, keys, title, df, parts=()):
+        """
+        Args:
+            keys: the corpus keys this data covers.
+            title: display title.
+            df: the rows, with the canonical columns.
+            parts: for a combination, the CorpusData it was built from.
+        """
+        self.keys = tuple(keys)
+        self.title = title
+        self.df = df
+        self.parts = tuple(parts)
+        self.version = next(_versions)
+        self.search_index = KeywordIndex.from_dataframe(df)
+        self.partitions = StrokePartitions.from_dataframe(df)
+        self.number_index = NumberIndex.from_dataframe(df)
+        self.rule_index = RuleIndex.from_dataframe(df)
+        self.related = RelatedIndex.from_dataframe(df)
+        self.card_cache = CardCache.from_dataframe(df)
+        # The card cache is empty now but may grow to its bound, so that is what counts
+        self.size_bytes = int(df.memory_usage(deep=True).sum()) + self.card_cache.max_bytes + approx_size(
+            [self.search_index, self.partitions, self.number_index, self.rule_index, self.related]
+        )
+        # First row of each (Stroke, Number), to find a situation again in a reloaded corpus
+        self._rows_by_situation = {}
+        for label, situation in zip(df.index.tolist(), zip(df['Stroke'].tolist(), df['Number'].tolist())):
+            self._rows_by_situation.setdefault(situation, label)
+
+    def situation_of(self, label):
+        """(Stroke, Number) of row `label`, or None if there is no such row."""
+        if label not in self.df.index:
+            return None
+        return self.df.at[label, 'Stroke'], self.df.at[label, 'Number']
+
+    def origin(self, label):
+        """(corpus key, Stroke, Number) of row `label` as its own document has it.
+
+        In a combination, Stroke is given without the document-title prefix.
+        """
+        if not self.parts:
+            return self.keys[0], self.df.at[label, 'Stroke'], self.df.at[label, 'Number']
+        key = self.df.at[label, 'Corpus']
+        part = next(data for data in self.parts if data.keys[0] == key)
+        return part.origin(self.df.at[label, 'Corpus row'])
+
+    def find_situation(self, situation):
+        """Row label of a (Stroke, Number) from situation_of(), e.g. of an earlier version (None if it is gone)."""
+        return self._rows_by_situation.get(situation) if situation is not None else None
+
+
+def approx_size(obj):
+    """Rough deep size in bytes of plain Python containers and objects (for the memory budget)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, int, float, bool, array)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, "__dict__"):
+                stack.append(vars(item))
+            for slot in getattr(type(item), "__slots__", ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+
+class CorpusRegistry:
+    """Discovers the available corpora and keeps the recently used ones loaded.
+
+    Thread-safe: all sessions of the server share one registry, and a corpus
+    selected by several sessions at once is still loaded only once.
+    """
+
+    def __init__(self, default_source=None, search_dirs=(), budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024,
+                 reload_seconds=DEFAULT_RELOAD_SECONDS):
+        """
+        Args:
+            default_source: the built-in document (listed first), or None.
+            search_dirs: folders scanned for more documents.
+            budget_bytes: estimated memory the loaded corpora may use before
+                the least recently used ones are evicted.
+            reload_seconds: how often get() looks for changed sources (0: never).
+        """
+        self.default_source = default_source
+        self.search_dirs = list(search_dirs)
+        self.budget_bytes = budget_bytes
+        self.reload_seconds = reload_seconds
+        self.loads = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_reload_error = None
+
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._loaded = OrderedDict()   # key -> CorpusData, least recently used first
+        self._combined = None
+        self._sources = {}             # key -> (source_stamp, file_hash) the loaded data came from
+        self._reloading = set()
+        self._next_check = 0.0
+        self.corpora = {}
+        self.discover()
+
+    @classmethod
+    def from_environment(cls, environ=os.environ):
+        """Registry for the app: the built-in workbook, ./corpora and SITUATIONS_CORPORA_DIRS."""
+        dirs = [CORPORA_DIR] + [d for d in environ.get("SITUATIONS_CORPORA_DIRS", "").split(os.pathsep) if d]
+        budget_mb = float(environ.get("SITUATIONS_CORPUS_BUDGET_MB", DEFAULT_BUDGET_MB))
+        reload_seconds = float(environ.get("SITUATIONS_RELOAD_SECONDS", DEFAULT_RELOAD_SECONDS))
+        return cls(os.path.join(APP_DIR, DEFAULT_SOURCE), dirs, int(budget_mb * 1024 * 1024), reload_seconds)
+
+    def discover(self):
+        """Rescans the search folders; returns {key: Corpus} in display order."""
+        found = {}
+        if self.default_source:
+            found[self._key(self.default_source)] = self.default_source
+        for folder in self.search_dirs:
+            if not os.path.isdir(folder):
+                continue
+            by_stem = {}
+            for name in sorted(os.listdir(folder)):
+                stem, ext = os.path.splitext(name)
+                # Skip Office lock files (~$Book.xlsx) and anything that isn't a source
+                if ext.lower() in PRIMARY_EXTENSIONS and not name.startswith("~$"):
+                    by_stem.setdefault(stem, []).append(os.path.join(folder, name))
+            for stem, paths in by_stem.items():
+                paths.sort(key=lambda p: PRIMARY_EXTENSIONS.index(os.path.splitext(p)[1].lower()))
+                found.setdefault(self._key(paths[0]), paths[0])
+
+        corpora = {key: Corpus(key, title_from_path(path), path, document_info(path)) for key, path in found.items()}
+        with self._lock:
+            self.corpora = corpora
+        return corpora
+
+    @staticmethod
+    def _key(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def get(self, key):
+        """The loaded corpus `key`, parsing and indexing it on first use."""
+        self._check_sources()
+        if key == ALL_LOADED:
+            return self.combined()
+        with self._lock:
+            data = self._loaded.get(key)
+            if data is not None:
+                self._loaded.move_to_end(key)
+                return data
+            corpus = self.corpora.get(key)
+            if corpus is None:
+                raise KeyError(f"Unknown document: {key}")
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other corpora stay available meanwhile
+        with load_lock:
+            with self._lock:
+                data = self._loaded.get(key)
+            if data is None:
+                data, source = self._build(corpus)
+                with self._lock:
+                    self.loads += 1
+                    self._loaded[key] = data
+                    self._sources[key] = source
+                    self._combined = None
+                    self._evict(keep=key)
+        return data
+
+    @staticmethod
+    def _build(corpus):
+        # Stamp before hashing: a save that lands in between shows up as a changed stamp next check
+        stamp = source_stamp(corpus.source_path)
+        source_hash = file_hash(corpus.source_path)
+        data = CorpusData([corpus.key], corpus.title, load_dataset(corpus.source_path, source_hash))
+        return data, (stamp, source_hash)
+
+    def _check_sources(self):
+        """Starts a background reload of each loaded corpus whose source file changed (rate limited)."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.reload_seconds or now < self._next_check:
+                return
+            self._next_check = now + self.reload_seconds
+            watched = [(key, self.corpora[key], self._sources[key][0]) for key in self._loaded
+                       if key in self.corpora and key in self._sources and key not in self._reloading]
+        for key, corpus, stamp in watched:
+            try:
+                changed = source_stamp(corpus.source_path) != stamp
+            except OSError:
+                # Mid-save (many editors replace the file); look again next time
+                continue
+            if changed:
+                with self._lock:
+                    if key in self._reloading:
+                        continue
+                    self._reloading.add(key)
+                threading.Thread(target=self._reload, args=(corpus,), name=f"corpus-reload-{key}",
+                                 daemon=True).start()
+
+    def _reload(self, corpus):
+        """Rebuilds a corpus from its changed source and swaps it in (on a background thread)."""
+        key = corpus.key
+        with self._lock:
+            stamp, source_hash = self._sources[key]
+        data = None
+        try:
+            stamp = source_stamp(corpus.source_path)
+            # Saved again without changes: nothing to rebuild
+            if file_hash(corpus.source_path) != source_hash:
+                data, (stamp, source_hash) = self._build(corpus)
+        except Exception as e:
+            # A half-written or broken file: keep serving the current data, and
+            # try again once the file changes again
+            with self._lock:
+                self.reload_errors += 1
+                self.last_reload_error = f"{corpus.title}: {e}"
+
+        with self._lock:
+            self._sources[key] = (stamp, source_hash)
+            self._reloading.discard(key)
+            # Unless it was evicted meanwhile; it is then loaded afresh when next used
+            if data is not None and key in self._loaded:
+                self._loaded[key] = data
+                self._combined = None
+                self.reloads += 1
+                self._evict(keep=key)
+
+    def _evict(self, keep):
+        # Least recently used first; the corpus just asked for always stays
+        while self._used_bytes() > self.budget_bytes and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                self._loaded.move_to_end(oldest)
+                continue
+            del self._loaded[oldest]
+            self._combined = None
+            self.evictions += 1
+
+    def _used_bytes(self):
+        used = sum(data.size_bytes for data in self._loaded.values())
+        if self._combined is not None:
+            used += self._combined.size_bytes
+        return used
+
+    def combined(self):
+        """All loaded corpora as one, for searching and shuffling across documents.
+
+        Loads the default corpus if nothing is loaded yet. Stroke/Topic names are
+        prefixed with the document title when more than one document is loaded.
+        """
+        with self._lock:
+            # In document order, so using a corpus (which reorders the LRU) doesn't force a rebuild
+            loaded = [self._loaded[key] for key in self.corpora if key in self._loaded]
+            combined = self._combined
+        if not loaded:
+            return self.get(self._key(self.default_source) if self.default_source else next(iter(self.corpora)))
+        if len(loaded) == 1:
+            return loaded[0]
+        keys = tuple(key for data in loaded for key in data.keys)
+        if combined is not None and combined.parts == tuple(loaded):
+            return combined
+
+        frames = []
+        for data in loaded:
+            frame = data.df.copy()
+            frame["Stroke"] = frame["Stroke"].map(
+                lambda stroke, title=data.title: f"{title}: {stroke}" if isinstance(stroke, str) else stroke
+            )
+            # Where each row came from, for CorpusData.origin()
+            frame["Corpus"] = data.keys[0]
+            frame["Corpus row"] = frame.index
+            frames.append(frame)
+        combined = CorpusData(keys, "All loaded documents", pd.concat(frames, ignore_index=True), parts=loaded)
+        with self._lock:
+            # Counts toward the budget, and is dropped whenever one of its corpora is evicted or reloaded
+            # (kept only if none was while it was being built)
+            if all(self._loaded.get(data.keys[0]) is data for data in loaded):
+                self._combined = combined
+                # Over budget, this evicts the least recently used corpora (and with them this combination)
+                self._evict(keep=next(reversed(self._loaded)))
+        return combined
+
+    def stats(self):
+        """What is loaded and how much of the memory budget it uses."""
+        with self._lock:
+            return {
+                "available": len(self.corpora),
+                "loaded": list(self._loaded),
+                "used_bytes": self._used_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "reload_errors": self.reload_errors,
+                "reloading": sorted(self._reloading),
+            }
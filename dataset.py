@@ -0,0 +1,274 @@
+"""Loads the Situations & Resolutions dataset through a precompiled snapshot.
+
+Any of the shipped formats (.csv, .xlsx, .ods) can be loaded; column names are
+mapped onto one canonical schema (see CANONICAL_COLUMNS) and CSV encodings are
+detected, so both front ends see the same columns whatever the source.
+
+Parsing the workbook through openpyxl is the slowest part of starting the app,
+so the parsed DataFrame is saved next to the source file as a pickle snapshot
+tagged with a SHA-256 of the source bytes. Later loads only hash the source and
+unpickle; the snapshot is rebuilt automatically whenever the source changes.
+When rebuilding, a same-named .csv is parsed instead of the workbook if it has
+been verified to hold exactly the same data (recorded in <source>.sources.json).
+
+Compile (and compare startup timings) from the command line:
+
+    python dataset.py Situations-n-Resolutions-with-sections.xlsx --benchmark 5
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+
+import pandas as pd
+
+from documents import DEFAULT_SOURCE  # noqa: F401 (dataset.DEFAULT_SOURCE, as before)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".snapshot.pkl"
+SOURCES_SUFFIX = ".sources.json"
+# Bump when the snapshot layout or the parsing rules change
+SNAPSHOT_VERSION = 2
+
+# Column names used throughout the app, in display order
+CANONICAL_COLUMNS = ["Stroke", "Number", "Situation", "Recommended resolution", "Applicable Rule"]
+
+# Header spellings seen in the different exports (compared lower-cased, single-spaced)
+COLUMN_ALIASES = {
+    "stroke": "Stroke",
+    "section": "Stroke",
+    "topic": "Stroke",
+    "stroke/topic": "Stroke",
+    "number": "Number",
+    "#": "Number",
+    "situation": "Situation",
+    "recommended resolution": "Recommended resolution",
+    "resolution": "Recommended resolution",
+    "applicable rule": "Applicable Rule",
+    "applicable rules": "Applicable Rule",
+    "rule": "Applicable Rule",
+}
+
+# Supported formats, fastest parser first
+SOURCE_EXTENSIONS = [".csv", ".xlsx", ".ods"]
+
+# Tried in order; cp1252 covers the "smart quotes" in Windows exports
+CSV_ENCODINGS = ["utf-8-sig", "cp1252", "latin-1"]
+
+
+def file_hash(path):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(source_path):
+    return source_path + SNAPSHOT_SUFFIX
+
+
+def detect_encoding(path):
+    """Returns the first of CSV_ENCODINGS that decodes the whole file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in CSV_ENCODINGS:
+        try:
+            data.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+
+def normalize_schema(df):
+    """Maps column aliases onto CANONICAL_COLUMNS and drops blank rows.
+
+    Raises:
+        ValueError: if a canonical column has no matching header.
+    """
+    renames = {}
+    for column in df.columns:
+        key = " ".join(str(column).split()).lower()
+        renames[column] = COLUMN_ALIASES.get(key, str(column).strip())
+    df = df.rename(columns=renames)
+
+    missing = [c for c in CANONICAL_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    # Spreadsheets often carry trailing empty rows
+    df = df.dropna(subset=["Situation"]).reset_index(drop=True)
+    numbers = pd.to_numeric(df["Number"], errors="coerce")
+    if numbers.notna().all():
+        df["Number"] = numbers.astype(int)
+    return df[CANONICAL_COLUMNS]
+
+
+def read_source(source_path):
+    """Parses a .csv, .xlsx or .ods source into the canonical schema."""
+    ext = os.path.splitext(source_path)[1].lower()
+    if ext == ".csv":
+        df = pd.read_csv(source_path, encoding=detect_encoding(source_path))
+    elif ext == ".ods":
+        # Needs the optional odfpy package
+        df = pd.read_excel(source_path, engine="odf")
+    elif ext == ".xlsx":
+        df = pd.read_excel(source_path)
+    else:
+        raise ValueError(f"Unsupported data file type: {source_path}")
+    return normalize_schema(df)
+
+
+def frames_equivalent(a, b):
+    """True if two normalized DataFrames hold exactly the same data."""
+    return a.shape == b.shape and a.astype(str).equals(b.astype(str))
+
+
+def faster_alternates(source_path):
+    """Same-named sources in a format that parses faster than `source_path`."""
+    stem, ext = os.path.splitext(source_path)
+    if ext.lower() not in SOURCE_EXTENSIONS:
+        return []
+    faster = SOURCE_EXTENSIONS[:SOURCE_EXTENSIONS.index(ext.lower())]
+    return [stem + e for e in faster if os.path.exists(stem + e)]
+
+
+def read_preferred_source(source_path, source_hash):
+    """Parses `source_path`, or a faster alternate verified to hold the same data.
+
+    Verification parses both files once per pair of file hashes; the outcome is
+    remembered in <source>.sources.json so later rebuilds can skip the slow parse.
+    """
+    manifest_path = source_path + SOURCES_SUFFIX
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("source_hash") != source_hash:
+        manifest = {"source_hash": source_hash, "alternates": {}}
+
+    df = None
+    for alternate in faster_alternates(source_path):
+        name = os.path.basename(alternate)
+        alt_hash = file_hash(alternate)
+        known = manifest["alternates"].get(name)
+        if known and known["hash"] == alt_hash:
+            if known["equivalent"]:
+                return read_source(alternate)
+            continue
+        try:
+            alt_df = read_source(alternate)
+        except (ValueError, ImportError) as e:
+            logger.warning("Skipping %s: %s", alternate, e)
+            continue
+        if df is None:
+            df = read_source(source_path)
+        equivalent = frames_equivalent(df, alt_df)
+        manifest["alternates"][name] = {"hash": alt_hash, "equivalent": equivalent}
+        try:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+        except OSError as e:
+            logger.warning("Could not write %s: %s", manifest_path, e)
+        if equivalent:
+            return alt_df
+
+    return df if df is not None else read_source(source_path)
+
+
+def compile_snapshot(source_path, source_hash=None):
+    """Parses the source (or an equivalent faster one) and writes its snapshot.
+
+    Returns the parsed DataFrame.
+    """
+    if source_hash is None:
+        source_hash = file_hash(source_path)
+    df = read_preferred_source(source_path, source_hash)
+
+    payload = {"version": SNAPSHOT_VERSION, "source_hash": source_hash, "df": df}
+    target = snapshot_path(source_path)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        # Write then rename so a concurrent reader never sees a partial snapshot
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, target)
+    except OSError as e:
+        # A read-only deploy still works, it just parses the source every time
+        logger.warning("Could not write snapshot %s: %s", target, e)
+    return df
+
+
+def read_snapshot(source_path, source_hash):
+    """Returns the snapshot DataFrame, or None if it is missing or stale."""
+    try:
+        with open(snapshot_path(source_path), "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if (not isinstance(payload, dict)
+            or payload.get("version") != SNAPSHOT_VERSION
+            or payload.get("source_hash") != source_hash):
+        return None
+    return payload["df"]
+
+
+def load_dataset(source_path=DEFAULT_SOURCE, source_hash=None):
+    """Loads the dataset from its snapshot, rebuilding it if the source changed.
+
+    source_hash: file_hash() of the source, if the caller has already computed it.
+    """
+    if source_hash is None:
+        source_hash = file_hash(source_path)
+    df = read_snapshot(source_path, source_hash)
+    if df is None:
+        df = compile_snapshot(source_path, source_hash)
+    return df
+
+
+def benchmark(source_path, repeat):
+    """Prints best-of-`repeat` timings for the parse path vs. the snapshot path."""
+    compile_snapshot(source_path)
+
+    def best_of(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    parse_time = best_of(lambda: read_source(source_path))
+    snapshot_time = best_of(lambda: load_dataset(source_path))
+    print(f"parse {os.path.basename(source_path)}: {parse_time * 1000:8.2f} ms")
+    for alternate in faster_alternates(source_path):
+        alt_time = best_of(lambda: read_source(alternate))
+        print(f"parse {os.path.basename(alternate)}: {alt_time * 1000:8.2f} ms")
+    print(f"snapshot load : {snapshot_time * 1000:8.2f} ms")
+    print(f"speedup       : {parse_time / snapshot_time:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the dataset snapshot.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE,
+                        help="Source .xlsx, .ods or .csv file to compile.")
+    parser.add_argument("--benchmark", type=int, metavar="N", default=0,
+                        help="Also compare load timings, best of N runs.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.source, args.benchmark)
+    else:
+        df = compile_snapshot(args.source)
+        print(f"Compiled {len(df)} rows to {snapshot_path(args.source)}")
+
+
+if __name__ == "__main__":
+    main()
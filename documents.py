@@ -0,0 +1,47 @@
+"""What the app knows about its documents beyond their rows: titles, published versions
+and the file stamps that tell when a source was saved again.
+
+Standard library only, so tools that don't need the indexes (export_site.py)
+can use it without importing corpus.py and, through it, numpy.
+"""
+import os
+from collections import namedtuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The built-in document, next to the app
+DEFAULT_SOURCE = "Situations-n-Resolutions-with-sections.xlsx"
+
+# Display names for sources whose file name doesn't say what they are
+KNOWN_TITLES = {DEFAULT_SOURCE: "Stroke & Turn"}
+
+# The published document a source was made from (its link in the sidebar) and the
+# version the app's footer names; only known for the documents listed here
+DocumentInfo = namedtuple("DocumentInfo", ["label", "url", "version"])
+KNOWN_DOCUMENTS = {
+    DEFAULT_SOURCE: DocumentInfo(
+        "Mar. 2025 USA Swimming Situations & Resolutions - Stroke & Turn",
+        "https://www.usaswimming.org/docs/default-source/officialsdocuments/officials-training-resources/"
+        "situations-and-resolutions/situations-and-resolutions-stroke-and-turn.pdf",
+        "03/07/2025",
+    ),
+}
+
+
+def title_from_path(path):
+    name = os.path.basename(path)
+    if name in KNOWN_TITLES:
+        return KNOWN_TITLES[name]
+    stem = os.path.splitext(name)[0]
+    return stem.replace("_", " ").replace("-", " ").strip()
+
+
+def document_info(path):
+    """The DocumentInfo of the source at `path`, or None if it isn't a known document."""
+    return KNOWN_DOCUMENTS.get(os.path.basename(path))
+
+
+def source_stamp(source_path):
+    """Size and modification time of a source file; a different stamp means it may have changed."""
+    stat = os.stat(source_path)
+    return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,487 @@
+"""Exports the dataset as a static study site that needs no Streamlit server.
+
+Every situation gets its own card page, every Stroke/Topic a sequential deck
+page, and a search page searches all situations in the browser. Any static file
+server can host the result, or it can be opened straight from disk
+(site/index.html), so a card view costs no server compute and no websocket.
+
+    python export_site.py                      # -> site/
+    python export_site.py --source corpora/Starter.xlsx --out starter-site --jobs 8
+
+The data comes from dataset.load_dataset, like the app. Stylesheet, scripts,
+search data and logos are written under content-hash names (style.3f2a9c1b7d4e.css)
+so they can be cached forever, and every text file also gets a precompressed
+.gz copy (and .br if the brotli package is installed) for servers that serve
+those directly (e.g. nginx gzip_static).
+
+Builds are incremental: site/.build-manifest.json records a digest of each
+page's inputs (its rows, neighbours and asset names), so a rebuild only renders
+and compresses the pages whose rows changed. Every build (--full too) removes
+the card, deck and asset files in the output folder that the site no longer has.
+Pages are rendered on a thread pool (--jobs); compression and file writes
+release the GIL.
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset import load_dataset
+from documents import APP_DIR, DEFAULT_SOURCE, document_info, title_from_path
+from highlight import HIGHLIGHT_CLASS, HIGHLIGHT_CSS
+from lookups import StrokePartitions
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_OUT_DIR = os.path.join(APP_DIR, "site")
+MANIFEST_NAME = ".build-manifest.json"
+# Bump when the page templates change, so the next build re-renders every page
+TEMPLATE_VERSION = 1
+
+# Written with .gz (and .br) copies next to them
+COMPRESSED_EXTENSIONS = (".html", ".css", ".js", ".svg")
+LOGOS = [("USA_Swimming_Logo.svg", "https://www.usaswimming.org/"), ("pns_logo.png", "https://www.pns.org/page/home")]
+
+FOOTER = '© 2025 <a href="https://www.usaswimming.org" target="_blank">USA Swimming</a>'
+
+STYLE_CSS = '''
+body { font-family: "Source Sans Pro", system-ui, sans-serif; max-width: 52rem; margin: 0 auto; padding: 1rem; color: #31333f; }
+header, footer { text-align: center; }
+header img { margin: 0 1rem; vertical-align: middle; }
+header h2, header h4, header h5 { margin: 0.3rem 0; }
+footer { color: grey; font-size: 14px; margin-top: 2rem; border-top: 1px solid #ddd; padding-top: 1rem; }
+a { color: #0068c9; }
+nav { display: flex; gap: 1rem; justify-content: space-between; flex-wrap: wrap; margin: 1rem 0; }
+.card { border-radius: 0.5rem; margin: 1rem 0; }
+.card h3 { margin: 0 0 0.5rem 0; font-size: 1rem; }
+.situation { background: #e8f1fb; color: #004280; padding: 1rem; border-radius: 0.5rem; font-size: 18px; }
+details { margin-top: 0.75rem; }
+summary { cursor: pointer; font-weight: bold; padding: 0.4rem 0; }
+.resolution { background: #e9f7ee; color: #145724; padding: 1rem; border-radius: 0.5rem; font-size: 18px; }
+.rule { background: #fffbe6; color: #705b00; padding: 0.6rem 1rem; border-radius: 0.5rem; margin-top: 0.5rem; }
+ul.topics { list-style: none; padding: 0; }
+ul.topics li { margin: 0.4rem 0; }
+form.search { display: grid; gap: 0.5rem; }
+form.search input, form.search select { font-size: 1rem; padding: 0.4rem; }
+ol.results { padding-left: 1.2rem; }
+ol.results li { margin: 0.6rem 0; }
+''' + HIGHLIGHT_CSS
+
+# Arrow keys follow the page's prev/next links; "r" opens or closes the resolution
+SITE_JS = '''
+document.addEventListener("keydown", function (event) {
+  if (event.target.tagName === "INPUT" || event.altKey || event.ctrlKey || event.metaKey) return;
+  var rel = { ArrowLeft: "prev", ArrowRight: "next" }[event.key];
+  var link = rel && document.querySelector('a[rel="' + rel + '"]');
+  if (link) { window.location.href = link.href; return; }
+  if (event.key === "r") {
+    var details = document.querySelector("details.resolution-toggle");
+    if (details) details.open = !details.open;
+  }
+});
+'''
+
+# Phrase search over window.SITUATIONS, like the app's Keyword Search (exact, case-insensitive)
+SEARCH_JS = '''
+(function () {
+  var rows = window.SITUATIONS || [];
+  var form = document.getElementById("search");
+  var query = document.getElementById("q");
+  var field = document.getElementById("field");
+  var topic = document.getElementById("topic");
+  var count = document.getElementById("count");
+  var results = document.getElementById("results");
+
+  function escapeHtml(text) {
+    return text.replace(/[&<>"']/g, function (c) {
+      return { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" }[c];
+    });
+  }
+  function mark(text, needle) {
+    var safe = escapeHtml(text).replace(/\\n/g, "<br>");
+    if (!needle) return safe;
+    var pattern = new RegExp(escapeHtml(needle).replace(/[.*+?^${}()|[\\]\\\\]/g, "\\\\$&"), "gi");
+    return safe.replace(pattern, function (m) { return '<mark class="HIGHLIGHT_CLASS">' + m + "</mark>"; });
+  }
+  function run() {
+    var needle = query.value.trim().toLowerCase();
+    var params = new URLSearchParams({ q: query.value, field: field.value, topic: topic.value });
+    history.replaceState(null, "", "?" + params);
+    results.innerHTML = "";
+    if (!needle) { count.textContent = ""; return; }
+    var html = [];
+    rows.forEach(function (row) {
+      // row: [number, stroke, situation, resolution, rule, url]
+      if (topic.value !== "All" && row[1] !== topic.value) return;
+      var inSituation = field.value !== "Resolutions" && row[2].toLowerCase().indexOf(needle) !== -1;
+      var inResolution = field.value !== "Situations" && row[3].toLowerCase().indexOf(needle) !== -1;
+      if (!inSituation && !inResolution) return;
+      var text = inSituation ? row[2] : row[3];
+      html.push('<li><a href="' + row[5] + '">#' + escapeHtml(String(row[0])) + " [" + escapeHtml(row[1]) + "]</a> " +
+                mark(text, query.value.trim()) + "</li>");
+    });
+    count.textContent = html.length ? "Found " + html.length + " matches." : "No matches.";
+    results.innerHTML = html.join("");
+  }
+  var params = new URLSearchParams(window.location.search);
+  query.value = params.get("q") || "";
+  if (params.get("field")) field.value = params.get("field");
+  if (params.get("topic")) topic.value = params.get("topic");
+  form.addEventListener("submit", function (event) { event.preventDefault(); run(); });
+  [query, field, topic].forEach(function (el) { el.addEventListener("input", run); });
+  run();
+})();
+'''.replace("HIGHLIGHT_CLASS", HIGHLIGHT_CLASS)
+
+# A page to (re)build: site-relative path, template function and the inputs it renders from
+Page = namedtuple("Page", ["path", "render", "inputs"])
+
+# What one build did
+BuildReport = namedtuple("BuildReport", ["rendered", "unchanged", "removed", "assets", "bytes", "seconds"])
+
+
+def slugify(text):
+    """"ᐧ Disabilities" -> "disabilities", "Individual Medley" -> "individual-medley"."""
+    ascii_text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-") or "topic"
+
+
+def text_html(text):
+    return html.escape("" if text is None else str(text)).replace("\n", "<br>")
+
+
+def fingerprinted_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write_file(out_dir, rel_path, data, compress=True):
+    """Writes one site file (atomically) plus its compressed copies. Returns bytes written."""
+    path = os.path.join(out_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    outputs = [(path, data)]
+    if compress and rel_path.endswith(COMPRESSED_EXTENSIONS):
+        # mtime=0 keeps the .gz identical across builds of the same page
+        outputs.append((path + ".gz", gzip.compress(data, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            outputs.append((path + ".br", brotli.compress(data)))
+    for target, payload in outputs:
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, target)
+    return sum(len(payload) for _, payload in outputs)
+
+
+def remove_file(out_dir, rel_path):
+    for suffix in ("", ".gz", ".br"):
+        try:
+            os.remove(os.path.join(out_dir, rel_path + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def generated_files(out_dir, folders=("cards", "decks", "assets")):
+    """Site paths of the files already in the folders the exporter writes (not their .gz / .br copies)."""
+    paths = []
+    for folder in folders:
+        try:
+            names = os.listdir(os.path.join(out_dir, folder))
+        except FileNotFoundError:
+            continue
+        paths.extend(f"{folder}/{name}" for name in names if not name.endswith((".gz", ".br", ".tmp")))
+    return paths
+
+
+# --- Templates ---
+# Each takes the page's inputs (plain JSON-able values, so they can be digested) and returns HTML.
+
+def layout(inputs, body, scripts=()):
+    root = inputs["root"]
+    assets = inputs["assets"]
+    logos = "".join(
+        f'<a href="{url}" target="_blank"><img src="{root}{assets[name]}" alt="" width="100"></a>'
+        for name, url in LOGOS if name in assets
+    )
+    script_tags = "".join(f'<script src="{root}{assets[name]}"></script>' for name in ("site.js",) + tuple(scripts))
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(inputs["page_title"])} - Situations &amp; Resolutions</title>
+<link rel="stylesheet" href="{root}{assets["style.css"]}">
+</head>
+<body>
+<header>
+{logos}
+<h2><a href="https://www.usaswimming.org" target="_blank" style="color: inherit; text-decoration: none;">USA Swimming</a> Officials</h2>
+<h4><a href="{root}index.html" style="color: inherit; text-decoration: none;">Situations &amp; Resolutions</a></h4>
+<h5>{html.escape(inputs["title"])}</h5>
+</header>
+<main>
+{body}
+</main>
+<footer>{FOOTER}{footer_version(inputs["version"])}</footer>
+{script_tags}
+</body>
+</html>
+'''
+
+
+def footer_version(version):
+    """The footer's version line, for a document whose version is known (see documents.KNOWN_DOCUMENTS)."""
+    return f"<br>National Officials Committee, Version {html.escape(version)}" if version else ""
+
+
+def card_html(row, open_resolution=False):
+    stroke, number, situation, resolution, rule = row
+    return f'''<article class="card" id="n{html.escape(str(number))}">
+<h3>Stroke/Topic: {html.escape(str(stroke))} &nbsp;#{html.escape(str(number))}</h3>
+<div class="situation"><strong>Situation:</strong><br>{text_html(situation)}</div>
+<details class="resolution-toggle"{" open" if open_resolution else ""}>
+<summary>Show Resolution</summary>
+<div class="resolution"><strong>Recommended resolution:</strong><br>{text_html(resolution)}</div>
+<div class="rule"><strong>Applicable Rule:</strong> {text_html(rule)}</div>
+</details>
+</article>'''
+
+
+def render_card_page(inputs):
+    root = inputs["root"]
+    prev_link = (f'<a rel="prev" href="{html.escape(inputs["prev"])}">&larr; Previous</a>'
+                 if inputs["prev"] else "<span></span>")
+    next_link = (f'<a rel="next" href="{html.escape(inputs["next"])}">Next &rarr;</a>'
+                 if inputs["next"] else "<span></span>")
+    if inputs["deck"]:
+        deck_link = (f'<a href="{root}decks/{inputs["deck"]}.html">{html.escape(str(inputs["row"][0]))} '
+                     f'({inputs["position"]} of {inputs["deck_size"]})</a>')
+    else:
+        deck_link = f'<a href="{root}index.html">All topics</a>'
+    body = f'''<nav>{prev_link}
+{deck_link}
+<a href="{root}search.html">Search</a>
+{next_link}</nav>
+{card_html(inputs["row"])}'''
+    return layout(inputs, body)
+
+
+def render_deck_page(inputs):
+    root = inputs["root"]
+    cards = "\n".join(
+        f'<p><a href="{root}cards/{slug}.html">Open #{html.escape(str(row[1]))} on its own</a></p>\n{card_html(row)}'
+        for slug, row in inputs["rows"]
+    )
+    body = f'''<nav><a href="{root}index.html">&larr; All topics</a><a href="{root}search.html">Search</a></nav>
+<h3>Sequential Review: {html.escape(inputs["stroke"])} ({len(inputs["rows"])} situations)</h3>
+{cards}'''
+    return layout(inputs, body)
+
+
+def render_index_page(inputs):
+    topics = "\n".join(
+        f'<li><a href="decks/{slug}.html">{html.escape(stroke)}</a> ({size} situations, '
+        f'<a href="cards/{first}.html">start with the first card</a>)</li>'
+        for stroke, slug, size, first in inputs["topics"]
+    )
+    body = f'''<nav><a href="search.html">Keyword Search</a></nav>
+<h3>Sequential Review</h3>
+<ul class="topics">
+{topics}
+</ul>
+<p>{inputs["total"]} situations. On a card, the arrow keys move to the previous and next card and "r" shows the resolution.</p>'''
+    return layout(inputs, body)
+
+
+def render_search_page(inputs):
+    options = "".join(f'<option>{html.escape(stroke)}</option>' for stroke in inputs["topics"])
+    body = f'''<nav><a href="index.html">&larr; All topics</a></nav>
+<h3>🔍 Keyword Search</h3>
+<form class="search" id="search">
+<input id="q" type="search" placeholder="Search..." aria-label="Enter keyword or phrase" autofocus>
+<select id="field" aria-label="Search within"><option>All</option><option>Situations</option><option>Resolutions</option></select>
+<select id="topic" aria-label="Limit to Stroke/Topic"><option>All</option>{options}</select>
+</form>
+<p id="count"></p>
+<ol class="results" id="results"></ol>
+<noscript>Search needs JavaScript; the topic pages list every situation.</noscript>'''
+    return layout(inputs, body, scripts=("search-data.js", "search.js"))
+
+
+# --- Build ---
+
+def plain(value):
+    """JSON-able form of a cell (NumPy scalars to Python, NaN to None)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    return None if isinstance(value, float) and value != value else value
+
+
+def card_slugs(numbers):
+    """File name per row: the situation number, suffixed if a number repeats."""
+    seen = {}
+    slugs = []
+    for number in numbers:
+        base = slugify(number) if not isinstance(number, int) else str(number)
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        slugs.append(base if count == 0 else f"{base}-{count + 1}")
+    return slugs
+
+
+def plan_site(df, title, version=None):
+    """Returns (assets {name: bytes}, pages [Page]) for the dataset, without rendering anything.
+
+    version: the document's published version for the footer, if known.
+    """
+    columns = ["Stroke", "Number", "Situation", "Recommended resolution", "Applicable Rule"]
+    rows = [[plain(value) for value in values] for values in df[columns].itertuples(index=False)]
+    positions = range(len(rows))
+    partitions = StrokePartitions(positions, [row[0] for row in rows], [row[1] for row in rows])
+    slugs = card_slugs([row[1] for row in rows])
+
+    deck_slugs = {}
+    for stroke in partitions.topics:
+        slug = base = slugify(stroke)
+        suffix = 1
+        while slug in deck_slugs.values():
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        deck_slugs[stroke] = slug
+
+    search_rows = [[row[1], row[0], row[2] or "", row[3] or "", row[4] or "", f"cards/{slugs[pos]}.html"]
+                   for pos, row in enumerate(rows)]
+    sources = {
+        "style.css": STYLE_CSS.encode("utf-8"),
+        "site.js": SITE_JS.encode("utf-8"),
+        "search.js": SEARCH_JS.encode("utf-8"),
+        "search-data.js": ("window.SITUATIONS = " + json.dumps(search_rows, ensure_ascii=False,
+                                                               separators=(",", ":")) + ";\n").encode("utf-8"),
+    }
+    for name, _ in LOGOS:
+        path = os.path.join(APP_DIR, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                sources[name] = f.read()
+    assets = {name: "assets/" + fingerprinted_name(name, data) for name, data in sources.items()}
+
+    # Only the assets a page links to count toward its digest, so new search data re-renders just the search page
+    page_assets = {name: assets[name] for name in ["style.css", "site.js"] + [name for name, _ in LOGOS]
+                   if name in assets}
+
+    def inputs(root, page_title, scripts=(), **extra):
+        return {"root": root, "assets": {**page_assets, **{name: assets[name] for name in scripts}},
+                "title": title, "version": version, "page_title": page_title, **extra}
+
+    pages = [
+        Page("index.html", render_index_page, inputs("", title, total=len(rows), topics=[
+            [stroke, deck_slugs[stroke], len(partitions.deck(stroke)), slugs[partitions.deck(stroke)[0]]]
+            for stroke in partitions.topics
+        ])),
+        Page("search.html", render_search_page, inputs("", "Keyword Search", scripts=("search-data.js", "search.js"),
+                                                          topics=partitions.topics)),
+    ]
+    for stroke in partitions.topics:
+        deck = partitions.deck(stroke)
+        pages.append(Page(f"decks/{deck_slugs[stroke]}.html", render_deck_page, inputs(
+            "../", stroke, stroke=stroke, rows=[[slugs[pos], rows[pos]] for pos in deck]
+        )))
+        for i, pos in enumerate(deck):
+            pages.append(Page(f"cards/{slugs[pos]}.html", render_card_page, inputs(
+                "../", f"#{rows[pos][1]} {stroke}", row=rows[pos], deck=deck_slugs[stroke],
+                position=i + 1, deck_size=len(deck),
+                prev=f"{slugs[deck[i - 1]]}.html" if i > 0 else None,
+                next=f"{slugs[deck[i + 1]]}.html" if i + 1 < len(deck) else None,
+            )))
+    # Rows without a Stroke/Topic are in no deck, but search still links to their card
+    in_decks = {pos for stroke in partitions.topics for pos in partitions.deck(stroke)}
+    for pos in positions:
+        if pos not in in_decks:
+            pages.append(Page(f"cards/{slugs[pos]}.html", render_card_page, inputs(
+                "../", f"#{rows[pos][1]}", row=rows[pos], deck=None, position=1, deck_size=1, prev=None, next=None,
+            )))
+    return {assets[name]: data for name, data in sources.items()}, pages
+
+
+def page_digest(page):
+    payload = json.dumps([TEMPLATE_VERSION, page.render.__name__, page.inputs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"pages": {}, "assets": []}
+    return manifest if manifest.get("version") == TEMPLATE_VERSION else {"pages": {}, "assets": []}
+
+
+def build_site(source_path, out_dir=DEFAULT_OUT_DIR, jobs=None, full=False, compress=True):
+    """Builds (or updates) the static site for `source_path` in `out_dir`. Returns a BuildReport."""
+    started = time.perf_counter()
+    df = load_dataset(source_path)
+    info = document_info(source_path)
+    assets, pages = plan_site(df, title_from_path(source_path), info.version if info else None)
+
+    previous = load_manifest(out_dir)
+    old_pages = {} if full else previous["pages"]
+    digests = {page.path: page_digest(page) for page in pages}
+    stale = [page for page in pages
+             if old_pages.get(page.path) != digests[page.path]
+             or not os.path.exists(os.path.join(out_dir, page.path))]
+
+    written = 0
+    new_assets = [path for path in assets if not os.path.exists(os.path.join(out_dir, path))]
+    for path in new_assets:
+        written += write_file(out_dir, path, assets[path], compress)
+
+    def render(page):
+        return write_file(out_dir, page.path, page.render(page.inputs).encode("utf-8"), compress)
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1, thread_name_prefix="site-render") as pool:
+        written += sum(pool.map(render, stale))
+
+    # Whatever the manifest says (it may be missing, or --full ignores it), nothing outside the plan stays
+    existing = set(previous["pages"]) | set(previous["assets"]) | set(generated_files(out_dir))
+    removed = sorted(path for path in existing if path not in digests and path not in assets)
+    for path in removed:
+        remove_file(out_dir, path)
+    removed_pages = [path for path in removed if path.endswith(".html")]
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"version": TEMPLATE_VERSION, "source": os.path.abspath(source_path),
+                   "pages": digests, "assets": sorted(assets)}, f, indent=1)
+
+    return BuildReport(len(stale), len(pages) - len(stale), len(removed_pages), len(new_assets),
+                       written, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the situations as a static study site.")
+    parser.add_argument("--source", default=os.path.join(APP_DIR, DEFAULT_SOURCE),
+                        help="Dataset file (.xlsx, .ods or .csv; default: the app's workbook).")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="Output folder (default: site/ next to the app).")
+    parser.add_argument("--jobs", type=int, help="Render threads (default: one per CPU).")
+    parser.add_argument("--full", action="store_true", help="Re-render every page (pages for removed rows are still deleted).")
+    parser.add_argument("--no-compress", action="store_true", help="Don't write .gz / .br copies.")
+    args = parser.parse_args()
+
+    report = build_site(args.source, args.out, args.jobs, args.full, not args.no_compress)
+    print(f"Rendered {report.rendered} pages ({report.unchanged} unchanged, {report.removed} removed), "
+          f"{report.assets} new assets, {report.bytes / 1024:.0f} KB written in {report.seconds:.2f} s")
+    print(f"Open {os.path.join(os.path.abspath(args.out), 'index.html')} or serve {args.out}/ from any static host.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import re
+from functools import lru_cache
+
+# Matches are wrapped in <mark class="hl">; the look is defined once per page in HIGHLIGHT_CSS
+HIGHLIGHT_CLASS = "hl"
+
+# Yellow background with black text for maximum contrast, like a highlighter pen
+HIGHLIGHT_CSS = f'''
+    mark.{HIGHLIGHT_CLASS} {{
+        background-color: #ffff00;
+        color: #000000;
+        font-weight: bold;
+        padding: 2px 4px;
+        border-radius: 3px;
+    }}
+'''
+
+_OPEN_TAG = f'<mark class="{HIGHLIGHT_CLASS}">'
+_CLOSE_TAG = '</mark>'
+
+
+def normalize_terms(query):
+    """Turns a query string or list of terms into a hashable matcher key.
+
+    Terms are lower-cased, de-duplicated and ordered longest first, so a longer
+    term ("false start") wins over a shorter one it contains ("start").
+    """
+    if isinstance(query, str):
+        query = [query]
+    terms = {t.lower() for t in query if isinstance(t, str) and t}
+    return tuple(sorted(terms, key=lambda t: (-len(t), t)))
+
+
+@lru_cache(maxsize=256)
+def compile_matcher(terms, whole_words=False):
+    """Builds one case-insensitive regex matching any of `terms` (see normalize_terms)."""
+    # re.escape ensures we don't crash if user types special characters like "("
+    pattern = "|".join(re.escape(t) for t in terms)
+    if whole_words:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _wrap(match):
+    # Preserves the original casing of the text
+    return f"{_OPEN_TAG}{match.group()}{_CLOSE_TAG}"
+
+
+def highlight_text(text, query, whole_words=False):
+    """Wraps every match of the query term(s) in `text` in one pass.
+
+    Args:
+        text: the text to mark up; non-strings are returned unchanged.
+        query: a search string, or a list of terms to highlight together.
+        whole_words: only highlight terms that stand as whole words
+            (used for ranked search, whose terms are complete words).
+    """
+    if not query or not isinstance(text, str):
+        return text
+    terms = normalize_terms(query)
+    if not terms:
+        return text
+    return compile_matcher(terms, whole_words).sub(_wrap, text)
@@ -0,0 +1,293 @@
+"""Turns the text extracted from a Situations & Resolutions document into the dataset.
+
+The input is the document's text with one section name per line, followed by
+its numbered items, each holding Situation, Recommended resolution and
+Applicable Rule separated by "~":
+
+    Backstroke
+    61. A backstroke swimmer ... What is the call?~The swimmer should be ...~101.4.2
+    62~A swimmer ...~...~101.4.3
+
+The number can end with ". " (as extracted) or "~". An item may continue on the
+following lines until all three fields have been seen. The file is read line by
+line in one pass, every row is validated, and the canonical dataset
+(dataset.CANONICAL_COLUMNS) is written as .csv or .xlsx, followed by its
+snapshot so the app starts on it straight away.
+
+Runs are incremental. <output>.ingest.json records a hash of each section's
+text together with its parsed rows, so a new revision of the document only
+re-parses the sections whose text changed. If nothing changed the output file
+is left untouched.
+
+    python ingest.py Situations-n-Resolutions.txt -o Situations-n-Resolutions-with-sections.xlsx
+    python ingest.py Situations-n-Resolutions.txt -o new-revision.csv --full
+
+Exits with status 1 if any row is invalid (nothing is written unless --keep-going).
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, namedtuple
+
+from dataset import CANONICAL_COLUMNS, file_hash, load_dataset
+
+STATE_SUFFIX = ".ingest.json"
+STATE_VERSION = 2
+FIELD_SEPARATOR = "~"
+FIELDS_PER_ITEM = 3
+
+# "12. Situation~..." as extracted, or "12~Situation~..." once the number has been tilded
+_ITEM = re.compile(r"^(\d{1,3})(?:\.\s+|~)(.*)$")
+
+# One problem found while validating: input line number, "error" or "warning", message
+Issue = namedtuple("Issue", ["line", "level", "message"])
+
+# One section of the input: unique key, name (None before the first header),
+# its (line number, text) lines and a hash of that text
+Section = namedtuple("Section", ["key", "name", "lines", "digest"])
+
+
+def read_lines(path, encoding="utf-8-sig"):
+    """Yields (line number, stripped text) for each non-blank line, one at a time."""
+    with open(path, "r", encoding=encoding) as f:
+        for number, line in enumerate(f, 1):
+            text = line.strip()
+            if text:
+                yield number, text
+
+
+def _separators(item_text):
+    """Field separators seen so far in an item's first line (the number's "~" excluded)."""
+    match = _ITEM.match(item_text)
+    return match.group(2).count(FIELD_SEPARATOR) if match else item_text.count(FIELD_SEPARATOR)
+
+
+def split_sections(lines):
+    """Groups a stream of lines into Sections, yielding each as soon as it ends.
+
+    A line that is not an item is a section header, unless the item before it
+    still lacks fields, in which case it continues that item.
+    """
+    name, key, body = None, None, []
+    seen_keys = {}
+    separators = FIELDS_PER_ITEM - 1
+
+    def finish():
+        digest = hashlib.sha256("\n".join([str(name)] + [text for _, text in body]).encode("utf-8")).hexdigest()
+        return Section(key, name, body, digest)
+
+    for number, text in lines:
+        if _ITEM.match(text):
+            separators = _separators(text)
+        elif separators < FIELDS_PER_ITEM - 1 and body:
+            separators += text.count(FIELD_SEPARATOR)
+        else:
+            if body or name is not None:
+                yield finish()
+            name = text
+            # A repeated header gets its own key, so both sections are tracked separately
+            count = seen_keys.get(name, 0)
+            seen_keys[name] = count + 1
+            key = name if count == 0 else f"{name} ({count + 1})"
+            body = []
+            continue
+        body.append((number, text))
+
+    if body or name is not None:
+        yield finish()
+
+
+def parse_section(section):
+    """Parses and validates one section. Returns (rows, issues).
+
+    Rows are [Stroke, Number, Situation, Recommended resolution, Applicable Rule];
+    an item with an error is reported and left out.
+    """
+    items = []
+    for number, text in section.lines:
+        match = _ITEM.match(text)
+        if match:
+            items.append([number, int(match.group(1)), [match.group(2)]])
+        elif items:
+            items[-1][2].append(text)
+        else:
+            items.append([number, None, [text]])
+
+    rows, issues = [], []
+    last_number = None
+    for line, number, parts in items:
+        if number is None:
+            issues.append(Issue(line, "error", "text before the first numbered item"))
+            continue
+        if section.name is None:
+            issues.append(Issue(line, "error", f"item {number} comes before any section name"))
+            continue
+        fields = [field.strip() for field in "\n".join(parts).split(FIELD_SEPARATOR)]
+        if len(fields) != FIELDS_PER_ITEM:
+            issues.append(Issue(line, "error", f"item {number} has {len(fields)} fields, "
+                                               f"expected Situation~Recommended resolution~Applicable Rule"))
+            continue
+        situation, resolution, rule = fields
+        if not situation or not resolution:
+            issues.append(Issue(line, "error", f"item {number} has an empty situation or resolution"))
+            continue
+        if not rule:
+            issues.append(Issue(line, "warning", f"item {number} has no applicable rule"))
+        if last_number is not None and number <= last_number:
+            issues.append(Issue(line, "warning", f"item {number} follows item {last_number} out of order"))
+        last_number = number
+        rows.append([section.name, number, situation, resolution, rule])
+    return rows, issues
+
+
+def state_path(output_path):
+    return output_path + STATE_SUFFIX
+
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def _write_atomic(path, write_rows, rows):
+    # Write then rename so the app never loads a half-written dataset
+    tmp_path = f"{path}.{os.getpid()}.tmp{os.path.splitext(path)[1]}"
+    write_rows(tmp_path, rows)
+    os.replace(tmp_path, path)
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CANONICAL_COLUMNS)
+        writer.writerows(rows)
+
+
+def write_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    # write_only streams rows to disk instead of building the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Situations")
+    sheet.append(CANONICAL_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {".csv": write_csv, ".xlsx": write_xlsx}
+
+# What one run did, for the summary and the exit status
+IngestReport = namedtuple("IngestReport", ["sections", "unchanged", "parsed", "removed",
+                                           "rows", "issues", "written"])
+
+
+def ingest(input_path, output_path, full=False, keep_going=False, snapshot=True, encoding="utf-8-sig"):
+    """Parses `input_path` into `output_path`, re-parsing only changed sections.
+
+    Args:
+        input_path: extracted document text.
+        output_path: dataset to write (.csv or .xlsx).
+        full: ignore the previous run's state and parse every section.
+        keep_going: write the valid rows even if some rows have errors.
+        snapshot: also compile the dataset snapshot (see dataset.py).
+        encoding: encoding of the input text.
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"Output must be one of {', '.join(WRITERS)}, not {ext or 'no extension'}")
+
+    previous = None if full else load_state(state_path(output_path))
+    previous_sections = previous["sections"] if previous else {}
+
+    sections, rows, issues = {}, [], []
+    unchanged, parsed = [], []
+    for section in split_sections(read_lines(input_path, encoding)):
+        # Issues are stored relative to the section's first line: an unchanged section
+        # moves whenever an earlier one grows or shrinks, and is rebased here
+        start = section.lines[0][0] if section.lines else 0
+        cached = previous_sections.get(section.key)
+        if cached and cached["digest"] == section.digest:
+            section_rows = cached["rows"]
+            section_issues = [Issue(start + offset, level, message) for offset, level, message in cached["issues"]]
+            unchanged.append(section.key)
+        else:
+            section_rows, section_issues = parse_section(section)
+            parsed.append(section.key)
+        sections[section.key] = {
+            "digest": section.digest,
+            "rows": section_rows,
+            "issues": [(issue.line - start, issue.level, issue.message) for issue in section_issues],
+        }
+        rows.extend(section_rows)
+        issues.extend(section_issues)
+    removed = [key for key in previous_sections if key not in sections]
+
+    # Numbers identify situations across the whole document
+    duplicates = sorted(number for number, count in Counter(row[1] for row in rows).items() if count > 1)
+    for number in duplicates:
+        issues.append(Issue(0, "error", f"situation number {number} is used more than once"))
+    if duplicates:
+        rows = [row for row in rows if row[1] not in duplicates]
+
+    has_errors = any(issue.level == "error" for issue in issues)
+    output_current = (
+        previous is not None and not parsed and not removed and os.path.exists(output_path)
+        and previous.get("output_hash") == file_hash(output_path)
+    )
+    written = False
+    if (not has_errors or keep_going) and not output_current:
+        _write_atomic(output_path, WRITERS[ext], rows)
+        written = True
+
+    if written or output_current:
+        state = {"version": STATE_VERSION, "output_hash": file_hash(output_path), "sections": sections}
+        with open(state_path(output_path), "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        if snapshot:
+            load_dataset(output_path)
+
+    return IngestReport(len(sections), unchanged, parsed, removed, len(rows), issues, written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest extracted document text into the dataset.")
+    parser.add_argument("input", help="Extracted document text (one section name or item per line).")
+    parser.add_argument("-o", "--output", required=True, help="Dataset to write (.csv or .xlsx).")
+    parser.add_argument("--full", action="store_true", help="Re-parse every section.")
+    parser.add_argument("--keep-going", action="store_true", help="Write the valid rows even if some are invalid.")
+    parser.add_argument("--no-snapshot", action="store_true", help="Don't compile the dataset snapshot.")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Encoding of the input text (default utf-8).")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = ingest(args.input, args.output, full=args.full, keep_going=args.keep_going,
+                    snapshot=not args.no_snapshot, encoding=args.encoding)
+    elapsed = time.perf_counter() - started
+
+    for issue in report.issues:
+        where = f"line {issue.line}: " if issue.line else ""
+        print(f"{where}{issue.level}: {issue.message}")
+    print(f"{report.sections} sections: {len(report.unchanged)} unchanged, {len(report.parsed)} parsed"
+          + (f" ({', '.join(report.parsed)})" if report.parsed and report.unchanged else "")
+          + (f", {len(report.removed)} removed ({', '.join(report.removed)})" if report.removed else ""))
+    if report.written:
+        print(f"Wrote {report.rows} rows to {args.output} in {elapsed:.2f} s")
+    elif any(issue.level == "error" for issue in report.issues) and not args.keep_going:
+        print(f"Not written: fix the errors above or use --keep-going ({elapsed:.2f} s)")
+    else:
+        print(f"{args.output} is up to date ({elapsed:.2f} s)")
+    sys.exit(1 if any(issue.level == "error" for issue in report.issues) else 0)
+
+
+if __name__ == "__main__":
+    main()
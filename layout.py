@@ -0,0 +1,40 @@
+import re
+
+PORTRAIT = "Portrait"
+LANDSCAPE = "Landscape"
+
+# One browser measurement, only for clients the headers can't place (tablets, unknown agents)
+ORIENTATION_JS = "screen.width < screen.height ? 'Portrait' : 'Landscape'"
+
+# Tablets are checked first: they can be held either way, so their headers don't decide
+_TABLET_UA = re.compile(r"iPad|Tablet|Kindle|Silk|PlayBook|Android(?!.*Mobile)", re.IGNORECASE)
+_PHONE_UA = re.compile(r"iPhone|iPod|Mobile|Windows Phone|BlackBerry|Opera Mini", re.IGNORECASE)
+_DESKTOP_UA = re.compile(r"Windows NT|Macintosh|X11|CrOS", re.IGNORECASE)
+
+
+def orientation_from_headers(headers):
+    """Picks the layout from the request headers of the session's first request.
+
+    Phones are laid out in Portrait and desktops in Landscape. Returns None when
+    the headers don't settle it (tablets, unknown or missing user agents), so the
+    caller can ask the browser once instead.
+
+    Args:
+        headers: mapping of request headers, e.g. st.context.headers.
+    """
+    user_agent = headers.get("User-Agent") or ""
+    if _TABLET_UA.search(user_agent):
+        return None
+
+    # Chromium sends the Sec-CH-UA-Mobile client hint ("?1" / "?0") on every request
+    mobile_hint = (headers.get("Sec-CH-UA-Mobile") or "").strip()
+    if mobile_hint == "?1":
+        return PORTRAIT
+    if mobile_hint == "?0":
+        return LANDSCAPE
+
+    if _PHONE_UA.search(user_agent):
+        return PORTRAIT
+    if _DESKTOP_UA.search(user_agent):
+        return LANDSCAPE
+    return None
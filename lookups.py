@@ -0,0 +1,202 @@
+import random
+import re
+from array import array
+from collections import namedtuple
+
+
+class StrokePartitions:
+    """Rows of the dataset grouped by Stroke/Topic, built once at load time.
+
+    Sequential Review and Random Shuffle look up their deck here instead of
+    filtering and sorting the DataFrame on every rerun.
+
+    Holds:
+        topics: sorted list of Stroke/Topic names (blank strokes excluded).
+        rows: stroke -> tuple of row labels, ordered by situation Number.
+            The "ALL" key holds every row in Number order.
+        stroke_of: row label -> stroke, for O(1) "is this card in the deck" checks.
+    """
+
+    ALL = "ALL"
+
+    def __init__(self, labels, strokes, numbers):
+        """
+        Args:
+            labels: DataFrame index labels, in row order.
+            strokes: Stroke/Topic value per row (None/NaN for blank).
+            numbers: situation Number per row.
+        """
+        order = sorted(range(len(labels)), key=lambda pos: numbers[pos])
+        groups = {}
+        self.stroke_of = {}
+        for pos in order:
+            stroke = strokes[pos]
+            self.stroke_of[labels[pos]] = stroke
+            # NaN != NaN, so this skips blank strokes like dropna() would
+            if isinstance(stroke, str) or (stroke is not None and stroke == stroke):
+                groups.setdefault(stroke, []).append(labels[pos])
+
+        self.topics = sorted(groups)
+        self.rows = {stroke: tuple(group) for stroke, group in groups.items()}
+        self.rows[self.ALL] = tuple(labels[pos] for pos in order)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(df.index.tolist(), df['Stroke'].tolist(), df['Number'].tolist())
+
+    def deck(self, stroke):
+        """Row labels for `stroke` (or "ALL") in Number order; empty if unknown."""
+        return self.rows.get(stroke, ())
+
+    def contains(self, stroke, label):
+        """True if row `label` belongs to the `stroke` deck."""
+        if stroke == self.ALL:
+            return label in self.stroke_of
+        return label in self.stroke_of and self.stroke_of[label] == stroke
+
+
+class _ShuffledDeck:
+    __slots__ = ("rows", "order", "cursor", "passes", "rng")
+
+    def __init__(self, rows, rng):
+        self.rows = rows
+        self.order = array("H" if len(rows) <= 0xFFFF else "I", range(len(rows)))
+        self.cursor = 0
+        self.passes = 0
+        self.rng = rng
+        rng.shuffle(self.order)
+
+
+class ShuffleDecks:
+    """One session's shuffled decks for Random Shuffle, drawn without replacement.
+
+    Each Stroke/Topic (and "ALL") gets its own shuffled array of positions into
+    its StrokePartitions deck, and a cursor; draw() is O(1) and only reshuffles
+    once every card of that deck has been seen. Decks are created on first use
+    and kept, so switching topics and back carries on where it left off.
+
+    Every deck's order comes from (seed, topic), so the same seed gives the same
+    sequence on any machine, e.g. for a clinic working through one shared order.
+    """
+
+    def __init__(self, partitions, seed=None):
+        """
+        Args:
+            partitions: the StrokePartitions to deal from.
+            seed: any string or int; None picks a random one (kept in `seed` so it can be shared).
+        """
+        self.partitions = partitions
+        self.seed = str(seed).strip() if seed is not None and str(seed).strip() else str(random.randrange(10 ** 6))
+        self._decks = {}
+
+    def _deck(self, stroke):
+        deck = self._decks.get(stroke)
+        if deck is None:
+            rows = self.partitions.deck(stroke)
+            if not rows:
+                return None
+            deck = self._decks[stroke] = _ShuffledDeck(rows, random.Random(f"{self.seed}/{stroke}"))
+        return deck
+
+    def draw(self, stroke):
+        """The next row label of the `stroke` deck, or None if it is empty."""
+        deck = self._deck(stroke)
+        if deck is None:
+            return None
+        if deck.cursor == len(deck.order):
+            last = deck.order[-1]
+            deck.rng.shuffle(deck.order)
+            # Don't repeat the card just seen as the first card of the new pass
+            if len(deck.order) > 1 and deck.order[0] == last:
+                swap = deck.rng.randrange(1, len(deck.order))
+                deck.order[0], deck.order[swap] = deck.order[swap], deck.order[0]
+            deck.cursor = 0
+            deck.passes += 1
+        label = deck.rows[deck.order[deck.cursor]]
+        deck.cursor += 1
+        return label
+
+    def progress(self, stroke):
+        """(cards drawn in this pass, deck size, completed passes) for `stroke`."""
+        deck = self._deck(stroke)
+        if deck is None:
+            return 0, 0, 0
+        return deck.cursor, len(deck.order), deck.passes
+
+
+# Result of a Search by Number query:
+#   rows: matching row labels, in the order the numbers were asked for (no repeats)
+#   missing: requested numbers with no situation
+#   invalid: parts of the query that are not a number or a range
+NumberLookup = namedtuple("NumberLookup", ["rows", "missing", "invalid"])
+
+# "12-20, 45 101" -> ["12-20", "45", "101"]; en/em dashes count as range dashes
+_QUERY_SPLIT = re.compile(r"[,;\s]+")
+_RANGE = re.compile(r"^(\d+)\s*[-–—]\s*(\d+)$")
+
+
+class NumberIndex:
+    """Situation Number -> row label hash index, built once at load time.
+
+    Answers single numbers, ranges and lists ("12-20, 45, 101") with dictionary
+    lookups instead of comparing the whole Number column per query.
+    """
+
+    def __init__(self, labels, numbers):
+        """
+        Args:
+            labels: DataFrame index labels, in row order.
+            numbers: situation Number per row.
+        """
+        self.row_of = {}
+        for label, number in zip(labels, numbers):
+            # Keep the first row if a number is ever duplicated
+            self.row_of.setdefault(str(number).strip(), label)
+
+        numeric = [int(key) for key in self.row_of if key.isdigit()]
+        self.min_number = min(numeric) if numeric else None
+        self.max_number = max(numeric) if numeric else None
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(df.index.tolist(), df['Number'].tolist())
+
+    def get(self, number):
+        """Row label for one situation number, or None."""
+        return self.row_of.get(str(number).strip())
+
+    def lookup(self, query):
+        """Resolves a query such as "12-20, 45, 101" in one pass. Returns a NumberLookup."""
+        rows, missing, invalid = [], [], []
+        seen = set()
+
+        # Normalize "12 - 20" to "12-20" so splitting on spaces keeps ranges whole
+        query = re.sub(r"\s*([-–—])\s*", r"\1", query.strip())
+        for part in _QUERY_SPLIT.split(query):
+            if not part:
+                continue
+            match = _RANGE.match(part)
+            if match:
+                low, high = sorted((int(match.group(1)), int(match.group(2))))
+                if self.min_number is None:
+                    missing.append(part)
+                    continue
+                # Only walk the part of the range the dataset can contain
+                keys = [str(n) for n in range(max(low, self.min_number), min(high, self.max_number) + 1)]
+                if not keys:
+                    missing.append(part)
+            else:
+                keys = [part]
+                if not part.isdigit() and part not in self.row_of:
+                    invalid.append(part)
+                    continue
+
+            for key in keys:
+                label = self.row_of.get(key)
+                if label is None:
+                    missing.append(key)
+                elif label not in seen:
+                    seen.add(label)
+                    rows.append(label)
+
+        return NumberLookup(rows, missing, invalid)
@@ -0,0 +1,279 @@
+"""Per-rerun timing spans, aggregated into per-mode, per-phase histograms.
+
+The app marks the named phases of each script run (data load, orientation,
+sidebar, mode controls, highlighting, card, footer) on a RunTimer. Finished runs
+are added to the process-wide REGISTRY, which can be exposed two ways, both
+opt-in through environment variables:
+
+    SITUATIONS_METRICS_PORT=9464        Prometheus text format at http://127.0.0.1:9464/metrics
+    SITUATIONS_METRICS_LOG=metrics.log  one JSON line of all histograms every
+    SITUATIONS_METRICS_LOG_INTERVAL=60  ... this many seconds (default 60)
+
+SamplingProfiler samples the script thread's stack while a run executes; the
+app switches it on for a single session with the ?profile=1 query parameter.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+METRIC_NAME = "situations_phase_seconds"
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe (mode, phase) -> histogram store shared by all sessions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe_run(self, mode, durations):
+        """Adds one finished run: `durations` is {phase: seconds}."""
+        with self._lock:
+            for phase, seconds in durations.items():
+                key = (mode, phase)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram()
+                histogram.observe(seconds)
+
+    def _copy(self):
+        with self._lock:
+            return {
+                key: (list(h.counts), h.total, h.count)
+                for key, h in sorted(self._histograms.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+            }
+
+    def prometheus_text(self):
+        """All histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each named phase of a script run.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for (mode, phase), (counts, total, count) in self._copy().items():
+            labels = f'mode="{_escape(mode)}",phase="{_escape(phase)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """All histograms as a JSON-friendly dict: mode -> phase -> stats."""
+        result = {}
+        for (mode, phase), (counts, total, count) in self._copy().items():
+            result.setdefault(str(mode), {})[phase] = {
+                "count": count,
+                "sum_s": round(total, 6),
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "buckets": dict(zip([str(b) for b in BUCKETS], counts)),
+            }
+        return result
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RunTimer:
+    """Times the named phases of one script run.
+
+    phase(name) closes the current phase and starts the next, so a flat script
+    can be split into phases without re-indenting it. span(name) times a nested
+    block (e.g. highlighting inside the card phase) on its own.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.finished = False
+        self._phase = None
+        self._phase_started = self.started
+
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.durations[self._phase] = self.durations.get(self._phase, 0.0) + now - self._phase_started
+        self._phase = name
+        self._phase_started = now
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def finish(self, mode, registry=REGISTRY):
+        """Closes the last phase and records the run (plus its total) under `mode`."""
+        self.phase(None)
+        self.durations["total"] = time.perf_counter() - self.started
+        self.finished = True
+        registry.observe_run(mode, self.durations)
+        return self.durations
+
+
+class _Span:
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.timer.durations[self.name] = self.timer.durations.get(self.name, 0.0) + elapsed
+        return False
+
+
+# --- EXPORTERS ---
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the Streamlit console
+        pass
+
+
+def _log_periodically(path, interval):
+    while True:
+        time.sleep(interval)
+        line = json.dumps({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "phases": REGISTRY.snapshot()})
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning("Could not write metrics log %s: %s", path, e)
+
+
+def start_exporters(environ=os.environ):
+    """Starts the endpoint and/or JSON log configured in the environment, once per process."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    port = environ.get("SITUATIONS_METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+        except (OSError, ValueError) as e:
+            logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+    log_path = environ.get("SITUATIONS_METRICS_LOG")
+    if log_path:
+        interval = float(environ.get("SITUATIONS_METRICS_LOG_INTERVAL", "60"))
+        threading.Thread(target=_log_periodically, args=(log_path, interval),
+                         name="metrics-log", daemon=True).start()
+
+
+# --- SAMPLING PROFILER ---
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread.
+
+    Costs nothing unless started; meant for one session at a time (?profile=1).
+    Stops by itself after max_seconds, in case whoever started it never gets to
+    stop() (a script run that Streamlit interrupts, or one that raised).
+    """
+
+    def __init__(self, thread_id=None, interval=0.002, max_seconds=60):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self.own = Counter()         # function -> samples where it was running
+        self.cumulative = Counter()  # function -> samples where it was on the stack
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.own[_describe(frame)] += 1
+            seen = set()
+            while frame is not None:
+                name = _describe(frame)
+                if name not in seen:
+                    seen.add(name)
+                    self.cumulative[name] += 1
+                frame = frame.f_back
+
+    def report(self, limit=15):
+        """Text table of the functions most often on the stack."""
+        if not self.samples:
+            return "No samples (the run finished faster than one sampling interval)."
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f} ms", "",
+                 f"{'on stack':>9} {'running':>8}  function"]
+        for name, count in self.cumulative.most_common(limit):
+            lines.append(f"{count / self.samples:8.0%} {self.own[name] / self.samples:8.0%}  {name}")
+        return "\n".join(lines)
+
+
+def _describe(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
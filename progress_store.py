@@ -0,0 +1,144 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Next to the app, like the other files it writes, whatever directory it was started from
+DEFAULT_DB_PATH = os.path.join(APP_DIR, "progress.sqlite3")
+
+# A situation is identified by (corpus, number): numbers repeat across documents, and
+# some documents number situations with text ("12a")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id          INTEGER PRIMARY KEY,
+    user_id     TEXT    NOT NULL,
+    corpus      TEXT,
+    number      TEXT    NOT NULL,
+    stroke      TEXT,
+    mode        TEXT,
+    correct     INTEGER NOT NULL,
+    recorded_at REAL    NOT NULL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS attempts_user_situation ON attempts (user_id, corpus, number);
+"""
+
+_INSERT = (
+    "INSERT INTO attempts (user_id, corpus, number, stroke, mode, correct, recorded_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class ProgressStore:
+    """Per-user attempt log in SQLite, written behind the app's back.
+
+    record_attempt() only puts a tuple on an in-process queue and returns, so
+    logging never adds latency to a rerun. One writer thread drains the queue
+    and inserts in batches (one transaction per batch) into a WAL-mode
+    database, so all sessions of the process share a single writer and readers
+    never block it.
+
+    If the queue is ever full the attempt is dropped and counted in `dropped`
+    rather than making a rerun wait.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=200, flush_interval=0.5, max_pending=50000):
+        """
+        Args:
+            db_path: SQLite file to write to (created if missing).
+            batch_size: most attempts written per transaction.
+            flush_interval: seconds the writer waits to fill a batch.
+            max_pending: queued attempts before new ones are dropped.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stopping = threading.Event()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        if "corpus" not in {row[1] for row in conn.execute("PRAGMA table_info(attempts)")}:
+            # A database from before attempts were kept per document; its rows get a NULL corpus
+            conn.execute("ALTER TABLE attempts ADD COLUMN corpus TEXT")
+        conn.executescript(_INDEXES)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only syncs at checkpoints; fine for a study log
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record_attempt(self, user_id, corpus, number, stroke, mode, correct):
+        """Queues one self-assessed attempt at situation `number` of document `corpus`. Never blocks."""
+        try:
+            self._queue.put_nowait(
+                (str(user_id), corpus, str(number), stroke, mode, int(bool(correct)), time.time())
+            )
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _next_batch(self):
+        """Waits for the first attempt, then gathers more for up to flush_interval."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(_INSERT, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            # Losing a batch of study stats must not take the app down
+            logger.warning("Could not write %d attempts: %s", len(batch), e)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued attempt has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Writes what is queued and stops the writer thread."""
+        if not self._stopping.is_set():
+            self._stopping.set()
+            self._writer.join(timeout=10)
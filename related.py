@@ -0,0 +1,108 @@
+from collections import Counter
+
+import numpy as np
+
+from search_index import stem, tokenize
+
+# Neighbours kept per row, and the cosine similarity below which a neighbour isn't worth showing
+DEFAULT_TOP_K = 8
+MIN_SCORE = 0.08
+# Rows multiplied against the whole matrix at once; bounds the similarity block to CHUNK_ROWS x rows
+CHUNK_ROWS = 512
+
+
+class RelatedIndex:
+    """Nearest neighbours of every situation by TF-IDF cosine similarity, built once at load time.
+
+    Each row's Situation and Recommended resolution text is tokenized and
+    stemmed like Keyword Search (search_index.py), weighted by sublinear TF-IDF
+    and L2-normalized with NumPy. The similarity of every pair of rows is then
+    computed in row chunks by one matrix product each, and only the top_k
+    neighbours per row are kept, so related() is a constant-time lookup.
+
+    Terms that occur in a single row can't make two rows similar, so they count
+    toward each row's norm but are left out of the matrix; that keeps it
+    narrow without changing any similarity.
+
+    Holds:
+        neighbors: rows x top_k array of row positions, most similar first.
+        scores: the matching cosine similarities.
+    """
+
+    def __init__(self, labels, texts, top_k=DEFAULT_TOP_K):
+        """
+        Args:
+            labels: DataFrame index labels, in row order.
+            texts: text to compare per row (None/NaN for blank).
+            top_k: neighbours kept per row.
+        """
+        self.labels = list(labels)
+        self._position = {label: pos for pos, label in enumerate(self.labels)}
+        n = len(self.labels)
+
+        vocabulary = {}
+        stems = {}   # word -> stem, None for words left out; each distinct word is stemmed once
+        rows, columns, counts = [], [], []
+        for pos, text in enumerate(texts):
+            tokens = tokenize(text.lower() if isinstance(text, str) else "")
+            for token in set(tokens).difference(stems):
+                # Digits are mostly rule and lane numbers, not what a situation is about
+                stems[token] = stem(token) if len(token) > 1 and not token.isdigit() else None
+            terms = Counter(map(stems.__getitem__, tokens))
+            terms.pop(None, None)
+            rows.extend([pos] * len(terms))
+            columns.extend([vocabulary.setdefault(term, len(vocabulary)) for term in terms])
+            counts.extend(terms.values())
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float64)
+
+        doc_freq = np.bincount(columns, minlength=len(vocabulary))
+        idf = np.log((1 + n) / (1 + doc_freq)) + 1
+        weights = (1 + np.log(counts)) * idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+        norms[norms == 0] = 1
+        weights /= norms[rows]
+
+        shared = doc_freq >= 2
+        column_of = np.cumsum(shared) - 1
+        keep = shared[columns]
+        matrix = np.zeros((n, int(shared.sum())), dtype=np.float32)
+        matrix[rows[keep], column_of[columns[keep]]] = weights[keep]
+        self.vocabulary_size = len(vocabulary)
+
+        k = max(0, min(top_k, n - 1))
+        self.neighbors = np.zeros((n, k), dtype=np.int32)
+        self.scores = np.zeros((n, k), dtype=np.float32)
+        if k == 0:
+            return
+        for start in range(0, n, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, n)
+            similarity = matrix[start:stop] @ matrix.T
+            # A row is not its own neighbour
+            similarity[np.arange(stop - start), np.arange(start, stop)] = -1
+            top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(similarity, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            self.neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+            self.scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    @classmethod
+    def from_dataframe(cls, df, **options):
+        texts = [
+            " ".join(part for part in (situation, resolution) if isinstance(part, str))
+            for situation, resolution in zip(df['Situation'].tolist(), df['Recommended resolution'].tolist())
+        ]
+        return cls(df.index.tolist(), texts, **options)
+
+    def related(self, label, limit=5, min_score=MIN_SCORE):
+        """Up to `limit` (row label, similarity) pairs most like row `label`, most similar first."""
+        pos = self._position.get(label)
+        if pos is None:
+            return []
+        result = []
+        for neighbor, score in zip(self.neighbors[pos, :limit].tolist(), self.scores[pos, :limit].tolist()):
+            if score < min_score:
+                break
+            result.append((self.labels[neighbor], score))
+        return result
@@ -0,0 +1,185 @@
+import re
+
+# One citation such as "101.6.3B(2)", "105.1.3A-B", "101.6.3.B(2)" or "102.24.1A(1)(d)":
+#   numbers: dotted rule numbers, letter: optional paragraph letter (or A-B range),
+#   parts: optional parenthesized sub-items
+_CITATION = re.compile(
+    r"^(?P<numbers>\d+(?:\.\d+)*)\.?"
+    r"(?P<letter>[A-Za-z](?:\s*-\s*[A-Za-z])?)?"
+    r"(?P<parts>(?:\(\w+\))*)$"
+)
+_PART = re.compile(r"\((\w+)\)")
+# Citations in a cell are separated by commas or semicolons, or "and" between two rule numbers
+_SEPARATOR = re.compile(r"[,;]")
+_AND = re.compile(r"\s+and\s+")
+# Query suffixes meaning "and everything under it": 101.2.x, 101.2.*, 101.2*
+_WILDCARD = re.compile(r"(?:\.?[xX*])$")
+
+
+def parse_citation(text):
+    """Parses one rule citation into trie paths.
+
+    Returns a list of paths (tuples of components), one per rule the citation
+    names: "105.1.3A-B" expands to 105/1/3/A and 105/1/3/B. Returns [] if the
+    text is not a numbered rule (e.g. "Glossary").
+    """
+    match = _CITATION.match(text.strip())
+    if not match:
+        return []
+    base = tuple(str(int(n)) for n in match.group("numbers").split("."))
+    # Sub-items keep their parentheses so 101.6.3(2) never collides with 101.6.3.2
+    parts = tuple(f"({p.lower()})" for p in _PART.findall(match.group("parts")))
+
+    letter = match.group("letter")
+    if not letter:
+        return [base + parts]
+    letter = letter.replace(" ", "").upper()
+    if "-" in letter:
+        first, last = letter.split("-")
+        letters = [chr(c) for c in range(ord(first), ord(last) + 1)] or [first, last]
+    else:
+        letters = [letter]
+    return [base + (l,) + parts for l in letters]
+
+
+def format_citation(path):
+    """Canonical text for a trie path, e.g. ("101", "6", "3", "B", "(2)") -> "101.6.3B(2)"."""
+    text = ""
+    for component in path:
+        if component.isdigit() and text:
+            text += "." + component
+        else:
+            text += component
+    return text
+
+
+def split_citations(cell):
+    """Splits an "Applicable Rule" cell into its individual citations."""
+    if not isinstance(cell, str):
+        return []
+    citations = []
+    for piece in _SEPARATOR.split(cell):
+        piece = piece.strip()
+        parts = _AND.split(piece)
+        # "101.3.2 and 103.5.3" is two rules; a titled interpretation stays whole
+        if len(parts) > 1 and all(parse_citation(p) for p in parts):
+            citations.extend(parts)
+        elif piece:
+            citations.append(piece)
+    return citations
+
+
+def _normalize_name(text):
+    # '“Hands Separated Interpretation” (see this link)' -> 'hands separated interpretation'
+    text = re.sub(r"\(see[^)]*\)", "", text)
+    return " ".join(text.strip('“”" ').split()).lower().strip('“”" ')
+
+
+class _Node:
+    __slots__ = ("children", "rows", "subtree_rows")
+
+    def __init__(self):
+        self.children = {}
+        self.rows = set()
+        self.subtree_rows = ()
+
+
+class RuleIndex:
+    """Hierarchical trie of the rule numbers cited in "Applicable Rule".
+
+    Each cited rule is a path of components (101 -> 2 -> 3); every node keeps
+    the rows citing exactly that rule plus, precomputed at build time, the rows
+    citing it or anything under it. A query walks one path and returns a stored
+    tuple, so its cost is the query length plus the size of the result.
+
+    Non-numbered references such as "Glossary" are kept in `named`, keyed by
+    their lower-cased name.
+    """
+
+    def __init__(self, labels, rule_cells):
+        """
+        Args:
+            labels: DataFrame index labels, in row order.
+            rule_cells: "Applicable Rule" value per row.
+        """
+        self.labels = list(labels)
+        self.root = _Node()
+        self.named = {}
+
+        for pos, cell in enumerate(rule_cells):
+            for citation in split_citations(cell):
+                paths = parse_citation(citation)
+                if not paths:
+                    self.named.setdefault(_normalize_name(citation), set()).add(pos)
+                for path in paths:
+                    node = self.root
+                    for component in path:
+                        node = node.children.setdefault(component, _Node())
+                    node.rows.add(pos)
+
+        self._freeze(self.root)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(df.index.tolist(), df['Applicable Rule'].tolist())
+
+    def _freeze(self, node):
+        """Fills in subtree_rows bottom-up (rows kept in dataset order)."""
+        rows = set(node.rows)
+        for child in node.children.values():
+            rows.update(self._freeze(child))
+        node.subtree_rows = tuple(sorted(rows))
+        return node.subtree_rows
+
+    def _find(self, path):
+        node = self.root
+        for component in path:
+            node = node.children.get(component)
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, query, exact=False):
+        """Row labels citing the rule in `query`, in dataset order.
+
+        "101.2" (or "101.2.x") matches 101.2 and every rule under it, such as
+        101.2.3; with exact=True only rows citing 101.2 itself. Non-numbered
+        references like "Glossary" are matched by name.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        wildcard = bool(_WILDCARD.search(query)) and not query.isalpha()
+        if wildcard:
+            query = _WILDCARD.sub("", query)
+            exact = False
+
+        paths = parse_citation(query)
+        if not paths:
+            # Named references: exact name, or any name containing the query
+            name = _normalize_name(query)
+            if name in self.named:
+                positions = self.named[name]
+            else:
+                positions = set()
+                for key, rows in self.named.items():
+                    if name and name in key:
+                        positions |= rows
+            return [self.labels[pos] for pos in sorted(positions)]
+
+        positions = set()
+        for path in paths:
+            node = self._find(path)
+            if node is not None:
+                positions.update(sorted(node.rows) if exact else node.subtree_rows)
+        return [self.labels[pos] for pos in sorted(positions)]
+
+    def children_of(self, query=""):
+        """Canonical citations one level below `query` (top-level rules if empty), for browsing."""
+        paths = parse_citation(query) if query.strip() else [()]
+        found = []
+        for path in paths:
+            node = self._find(path)
+            if node is not None:
+                found.extend(format_citation(path + (c,)) for c in node.children)
+        return sorted(found, key=lambda c: [p.zfill(4) for p in re.findall(r"\w+", c)])
@@ -0,0 +1,394 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+# Columns the Keyword Search mode can look in, keyed by the "Search within:" option
+SEARCH_FIELDS = {
+    "Situations": ("Situation",),
+    "Resolutions": ("Recommended resolution",),
+    "All": ("Situation", "Recommended resolution"),
+}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Query words whose matching rows each index remembers (the words come from what users type)
+VOCAB_CACHE_SIZE = 2048
+
+
+# BM25 tuning (the usual defaults) and ranked-search limits
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_TOP_K = 20
+# A typo match counts for less than an exact (stemmed) match
+FUZZY_WEIGHT = 0.7
+# Misspelled stems whose closest matches each index remembers
+FUZZY_CACHE_SIZE = 1024
+
+
+def tokenize(text):
+    """Splits lower-cased text into word tokens (letters, digits and underscores)."""
+    return TOKEN_PATTERN.findall(text)
+
+
+def _undouble(word):
+    # "swimm" -> "swim", "stopp" -> "stop" (but keep "pass", "fall")
+    if len(word) > 2 and word[-1] == word[-2] and word[-1] not in "lsz":
+        return word[:-1]
+    return word
+
+
+def stem(token):
+    """Light suffix-stripping stemmer, so "kick", "kicks", "kicked" and "kicking" match.
+
+    Only needs to be consistent, since documents and queries go through it alike.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("ing") and len(token) > 5:
+        return _undouble(token[:-3])
+    if token.endswith("ed") and len(token) > 4:
+        return _undouble(token[:-2])
+    if token.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def edit_distance(a, b, limit):
+    """Edit distance between a and b, counting a swap of neighbouring letters as one
+    edit ("fasle" -> "false"). Returns limit + 1 once the distance exceeds `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def max_typos(term):
+    """How many edits a query term may be off by: none for short words."""
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+class KeywordIndex:
+    """Inverted index over the searchable text columns of the dataset.
+
+    Built once per dataset so Keyword Search never has to re-lowercase or scan
+    whole columns while the user types.
+
+    Holds:
+        postings: column -> token -> set of row positions containing that token.
+        lowered: column -> list of pre-lowercased cell text (None for blank cells),
+            used to confirm the exact phrase on the few candidate rows.
+        stroke_rows: stroke/topic -> set of row positions.
+    """
+
+    def __init__(self, columns, strokes):
+        """
+        Args:
+            columns: dict of column name -> list of cell values, in row order.
+            strokes: list of stroke/topic values, in the same row order.
+        """
+        self.row_count = len(strokes)
+        self.lowered = {}
+        self.postings = {}
+        # (column, query token) -> matching rows, least recently used dropped first
+        self._candidates_for_token = lru_cache(maxsize=VOCAB_CACHE_SIZE)(self._match_vocabulary)
+
+        for name, values in columns.items():
+            lowered = [v.lower() if isinstance(v, str) else None for v in values]
+            postings = defaultdict(set)
+            for pos, text in enumerate(lowered):
+                if text:
+                    for token in tokenize(text):
+                        postings[token].add(pos)
+            self.lowered[name] = lowered
+            self.postings[name] = dict(postings)
+
+        self.stroke_rows = defaultdict(set)
+        for pos, stroke in enumerate(strokes):
+            self.stroke_rows[stroke].add(pos)
+
+        self._build_ranking()
+
+    def _build_ranking(self):
+        """Precomputes BM25 term statistics per "Search within:" option.
+
+        For each option: stem -> {row position: term frequency}, row lengths in
+        stems, the average length, and stem -> surface words (for highlighting).
+        """
+        per_column = {}
+        self.surface_forms = defaultdict(set)
+        for column, lowered in self.lowered.items():
+            counts = []
+            for text in lowered:
+                stems = Counter()
+                for token in tokenize(text or ""):
+                    token_stem = stem(token)
+                    stems[token_stem] += 1
+                    self.surface_forms[token_stem].add(token)
+                counts.append(stems)
+            per_column[column] = counts
+
+        self.ranking = {}
+        # (option, misspelled stem) -> closest stems, least recently used dropped first
+        self._fuzzy_matches = lru_cache(maxsize=FUZZY_CACHE_SIZE)(self._closest_stems)
+        for option, columns in SEARCH_FIELDS.items():
+            postings = defaultdict(dict)
+            lengths = []
+            for pos in range(self.row_count):
+                combined = Counter()
+                for column in columns:
+                    combined.update(per_column[column][pos])
+                lengths.append(sum(combined.values()))
+                for term, tf in combined.items():
+                    postings[term][pos] = tf
+            avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+            self.ranking[option] = (dict(postings), lengths, avg_length or 1.0)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        columns = {
+            name: df[name].tolist()
+            for name in SEARCH_FIELDS["All"]
+        }
+        return cls(columns, df['Stroke'].tolist())
+
+    def _match_vocabulary(self, column, token):
+        """Rows where `token` appears inside any word of `column` (substring match).
+
+        Called through the per-index cache self._candidates_for_token.
+        """
+        rows = set()
+        for word, word_rows in self.postings[column].items():
+            if token in word:
+                rows |= word_rows
+        return frozenset(rows)
+
+    def _search_column(self, column, q, rows):
+        """Positions in `rows` whose `column` text contains the lower-cased phrase `q`."""
+        lowered = self.lowered[column]
+        candidates = rows
+        # Every word fragment of the phrase must appear inside some indexed word,
+        # so intersecting postings narrows the rows we have to check by hand.
+        for token in tokenize(q):
+            candidates = candidates & self._candidates_for_token(column, token)
+            if not candidates:
+                return set()
+        return {pos for pos in candidates if lowered[pos] is not None and q in lowered[pos]}
+
+    def search(self, query, search_field="All", selected_stroke="All"):
+        """Returns the sorted row positions matching `query`.
+
+        Matches the same rows as a case-insensitive substring search on the
+        selected field(s), limited to `selected_stroke` unless it is "All".
+        """
+        if not query:
+            return []
+
+        if selected_stroke != "All":
+            rows = self.stroke_rows.get(selected_stroke, set())
+        else:
+            rows = set(range(self.row_count))
+
+        q = query.lower()
+        matches = set()
+        for column in SEARCH_FIELDS.get(search_field, SEARCH_FIELDS["All"]):
+            matches |= self._search_column(column, q, rows - matches)
+        return sorted(matches)
+
+    def filter(self, query, positions, search_field="All"):
+        """The positions among `positions` (kept in order) whose field(s) contain `query`.
+
+        Checks each given row directly, so it costs O(len(positions)) however
+        the query splits into words; used to narrow an earlier result set.
+        """
+        q = query.lower()
+        columns = SEARCH_FIELDS.get(search_field, SEARCH_FIELDS["All"])
+        if len(columns) == 1:
+            lowered = self.lowered[columns[0]]
+            return [pos for pos in positions if lowered[pos] is not None and q in lowered[pos]]
+        matches = set()
+        for column in columns:
+            lowered = self.lowered[column]
+            matches.update([pos for pos in positions if lowered[pos] is not None and q in lowered[pos]])
+        return [pos for pos in positions if pos in matches]
+
+    def _expand_term(self, option, term):
+        """Vocabulary stems to score for one query stem, as [(stem, weight)].
+
+        Exact stems score fully; otherwise the closest stems within max_typos()
+        edits score at FUZZY_WEIGHT. Typo matches are cached per index.
+        """
+        if term in self.ranking[option][0]:
+            return [(term, 1.0)]
+        return self._fuzzy_matches(option, term)
+
+    def _closest_stems(self, option, term):
+        """[(stem, FUZZY_WEIGHT)] for the vocabulary stems closest to `term` within max_typos() edits."""
+        postings = self.ranking[option][0]
+        limit = max_typos(term)
+        best, matches = limit + 1, []
+        if limit:
+            for candidate in postings:
+                distance = edit_distance(term, candidate, min(limit, best))
+                if distance < best:
+                    best, matches = distance, [candidate]
+                elif distance == best and distance <= limit:
+                    matches.append(candidate)
+        # A tuple: the cached value is shared by every caller
+        return tuple((m, FUZZY_WEIGHT) for m in matches)
+
+    def query_terms(self, query, search_field="All"):
+        """Stems (after typo correction) that a ranked search for `query` scores."""
+        option = search_field if search_field in self.ranking else "All"
+        terms = []
+        for token in tokenize(query.lower()):
+            for term, _ in self._expand_term(option, stem(token)):
+                if term not in terms:
+                    terms.append(term)
+        return terms
+
+    def highlight_words(self, query, search_field="All"):
+        """Words in the text that a ranked search for `query` matched (e.g. "kicking" for "kick")."""
+        words = set()
+        for term in self.query_terms(query, search_field):
+            words |= self.surface_forms.get(term, set())
+        return sorted(words)
+
+    def ranked_search(self, query, search_field="All", selected_stroke="All", top_k=DEFAULT_TOP_K):
+        """Returns up to `top_k` row positions ranked by BM25, best first.
+
+        Query words are stemmed, and words not in the vocabulary are matched to
+        the closest words within a small edit distance.
+        """
+        if not query:
+            return []
+        option = search_field if search_field in self.ranking else "All"
+        postings, lengths, avg_length = self.ranking[option]
+
+        if selected_stroke != "All":
+            rows = self.stroke_rows.get(selected_stroke, set())
+        else:
+            rows = None
+
+        scores = defaultdict(float)
+        for token in tokenize(query.lower()):
+            for term, weight in self._expand_term(option, stem(token)):
+                term_rows = postings[term]
+                idf = math.log(1 + (self.row_count - len(term_rows) + 0.5) / (len(term_rows) + 0.5))
+                for pos, tf in term_rows.items():
+                    if rows is not None and pos not in rows:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[pos] / avg_length)
+                    scores[pos] += weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [pos for pos, _ in best]
+
+
+class IncrementalSearch:
+    """One session's search-as-you-type state for exact phrase Keyword Search.
+
+    Every row containing "false start" also contains "false st", so when a new
+    query contains the previous one (same field and Stroke/Topic) only the
+    previous results are checked (KeywordIndex.filter) instead of searching
+    the whole dataset again. Each keystroke gets cheaper as the query narrows.
+
+    Earlier result sets are kept on a small stack, each one's query contained
+    in the next, so backspacing to an earlier query reuses its results. The
+    results are always the same as KeywordIndex.search would return.
+    """
+
+    # Narrow the previous results only when they are at most 1/NARROW_FRACTION of the rows
+    NARROW_FRACTION = 4
+
+    def __init__(self, search_index, max_depth=16):
+        """
+        Args:
+            search_index: the KeywordIndex to search.
+            max_depth: most earlier result sets kept for backspacing.
+        """
+        self.search_index = search_index
+        self.max_depth = max_depth
+        self._scope = None
+        self._stack = []   # (lower-cased query, positions), each query contained in the one above
+        self.fresh = 0
+        self.narrowed = 0
+        self.reused = 0
+
+    def search(self, query, search_field="All", selected_stroke="All"):
+        """Sorted row positions matching `query`, as KeywordIndex.search."""
+        if not query:
+            return []
+
+        scope = (search_field, selected_stroke)
+        if scope != self._scope:
+            self._scope = scope
+            self._stack = []
+
+        q = query.lower()
+        # Drop the result sets this query doesn't contain (backspacing, or a different query)
+        while self._stack and self._stack[-1][0] not in q:
+            self._stack.pop()
+
+        if self._stack and self._stack[-1][0] == q:
+            self.reused += 1
+            return list(self._stack[-1][1])
+        # Checking most of the dataset by hand is slower than the postings, e.g. after a one-letter query
+        if self._stack and len(self._stack[-1][1]) * self.NARROW_FRACTION <= self.search_index.row_count:
+            positions = self.search_index.filter(q, self._stack[-1][1], search_field)
+            self.narrowed += 1
+        else:
+            positions = self.search_index.search(query, search_field, selected_stroke)
+            self.fresh += 1
+
+        self._stack.append((q, tuple(positions)))
+        if len(self._stack) > self.max_depth:
+            del self._stack[0]
+        return positions
+
+
+def perform_keyword_search(df, search_index, query, search_field, selected_stroke, ranked=False, incremental=None):
+    """Keyword Search results as a slice of `df`.
+
+    Args:
+        df: the dataset `search_index` was built from.
+        search_index: KeywordIndex for `df`.
+        query: the text typed by the user.
+        search_field: "All", "Situations" or "Resolutions".
+        selected_stroke: Stroke/Topic to limit to, or "All".
+        ranked: BM25 ranking (best DEFAULT_TOP_K rows, best first) instead of
+            exact phrase matches in dataset order.
+        incremental: optional IncrementalSearch over `search_index` (one per
+            session), which narrows the previous phrase results as the query grows.
+    """
+    if not query:
+        return df.iloc[[]]
+
+    if ranked:
+        # BM25 over stemmed, typo-corrected words: best DEFAULT_TOP_K rows, best first
+        positions = search_index.ranked_search(query, search_field, selected_stroke, top_k=DEFAULT_TOP_K)
+    else:
+        # Intersect the prebuilt postings for the field(s) and Stroke/Topic,
+        # then return the matching rows in their original order
+        searcher = incremental if incremental is not None else search_index
+        positions = searcher.search(query, search_field, selected_stroke)
+    return df.iloc[positions]
@@ -0,0 +1,147 @@
+"""Document registry: least-recently-used eviction under the memory budget, the
+combined corpus counting toward it, and background reloads that sessions can
+follow with find_situation()."""
+import csv
+import time
+
+import pytest
+
+from corpus import ALL_LOADED, CorpusRegistry
+from dataset import CANONICAL_COLUMNS
+
+
+def write_document(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CANONICAL_COLUMNS)
+        writer.writerows(rows)
+
+
+def document_rows(prefix, count, first=1):
+    return [["Freestyle" if n % 2 else "Backstroke", n, f"{prefix} situation {n} with a swimmer",
+             f"{prefix} resolution {n}", f"101.{n}"] for n in range(first, first + count)]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in ("Alpha", "Bravo", "Charlie"):
+        write_document(tmp_path / f"{name}.csv", document_rows(name, 12))
+    return tmp_path
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_documents_load_once_on_first_use(folder):
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0)
+    assert list(registry.corpora) == ["Alpha", "Bravo", "Charlie"]
+    assert registry.stats()["loaded"] == []
+
+    alpha = registry.get("Alpha")
+    assert registry.get("Alpha") is alpha
+    assert registry.loads == 1
+    with pytest.raises(KeyError):
+        registry.get("Delta")
+
+
+def test_least_recently_used_is_evicted_over_budget(folder):
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0)
+    alpha, bravo = registry.get("Alpha"), registry.get("Bravo")
+    # Room for two documents, not three
+    registry.budget_bytes = alpha.size_bytes + bravo.size_bytes + alpha.size_bytes // 2
+
+    registry.get("Alpha")
+    registry.get("Charlie")
+    stats = registry.stats()
+    assert stats["loaded"] == ["Alpha", "Charlie"]
+    assert stats["used_bytes"] <= stats["budget_bytes"]
+    assert registry.evictions == 1
+
+    # An evicted document is loaded again when next used
+    assert registry.get("Bravo") is not bravo
+    assert registry.stats()["loaded"] == ["Charlie", "Bravo"]
+
+
+def test_document_just_asked_for_stays_even_over_budget(folder):
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0, budget_bytes=1)
+    registry.get("Alpha")
+    registry.get("Bravo")
+    assert registry.stats()["loaded"] == ["Bravo"]
+
+
+def test_combined_counts_toward_the_budget(folder):
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0)
+    alpha, bravo = registry.get("Alpha"), registry.get("Bravo")
+
+    combined = registry.get(ALL_LOADED)
+    assert combined.keys == ("Alpha", "Bravo")
+    assert len(combined.df) == len(alpha.df) + len(bravo.df)
+    assert registry.get(ALL_LOADED) is combined
+    assert registry.stats()["used_bytes"] == alpha.size_bytes + bravo.size_bytes + combined.size_bytes
+
+    # Room for both documents but not their combination as well
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0)
+    alpha, bravo = registry.get("Alpha"), registry.get("Bravo")
+    registry.budget_bytes = alpha.size_bytes + bravo.size_bytes + 1024
+    registry.combined()
+    stats = registry.stats()
+    assert stats["used_bytes"] <= stats["budget_bytes"]
+    assert stats["loaded"] == ["Bravo"]
+
+
+def test_combined_rows_know_their_origin(folder):
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0)
+    registry.get("Alpha")
+    bravo = registry.get("Bravo")
+    combined = registry.combined()
+
+    label = combined.df.index[combined.df["Corpus"] == "Bravo"][3]
+    assert combined.origin(label) == ("Bravo",) + tuple(bravo.df.loc[3, ["Stroke", "Number"]])
+    assert combined.df.at[label, "Stroke"] == f"Bravo: {bravo.df.at[3, 'Stroke']}"
+
+
+def test_changed_source_is_swapped_in_and_situations_are_found_again(folder):
+    path = folder / "Alpha.csv"
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0.01)
+    old = registry.get("Alpha")
+    label = old.find_situation(("Backstroke", 8))
+    old_text = old.df.at[label, "Situation"]
+
+    # Two situations inserted before it: the same situation now has another row label
+    write_document(path, document_rows("Alpha", 2, first=-1) + document_rows("Alpha", 12))
+    time.sleep(0.02)
+    wait_for(lambda: registry.get("Alpha") is not old)
+
+    new = registry.get("Alpha")
+    assert registry.reloads == 1
+    assert new.version != old.version
+    assert len(new.df) == len(old.df) + 2
+    # The run that started with the old data still sees it, unchanged
+    assert old.df.at[label, "Situation"] == old_text
+
+    moved = new.find_situation(old.situation_of(label))
+    assert moved != label
+    assert new.df.at[moved, "Situation"] == old_text
+
+    # A situation that was removed is not found
+    write_document(path, document_rows("Alpha", 5))
+    time.sleep(0.02)
+    wait_for(lambda: registry.get("Alpha") is not new)
+    assert registry.get("Alpha").find_situation(new.situation_of(moved)) is None
+
+
+def test_saving_the_same_content_again_keeps_the_data(folder):
+    path = folder / "Alpha.csv"
+    registry = CorpusRegistry(search_dirs=[str(folder)], reload_seconds=0.01)
+    data = registry.get("Alpha")
+
+    write_document(path, document_rows("Alpha", 12))
+    time.sleep(0.02)
+    wait_for(lambda: registry.get("Alpha") is not None and not registry.stats()["reloading"]
+             and registry._sources["Alpha"][0] == [path.stat().st_size, path.stat().st_mtime_ns])
+    assert registry.get("Alpha") is data
+    assert registry.reloads == 0
@@ -0,0 +1,91 @@
+"""Incremental ingest: unchanged sections are reused, with their issues on the right lines."""
+import csv
+import os
+
+from ingest import ingest, state_path
+
+DOCUMENT = [
+    "Freestyle",
+    "1. A swimmer stops~No infraction~101.5.1",
+    "2. A swimmer walks~Disqualify~",
+    "Backstroke",
+    "3. A swimmer turns over~Disqualify~101.4.2",
+    "4. A swimmer is missing a field~Disqualify",
+]
+
+
+def write_text(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))[1:]
+
+
+def issue_lines(report):
+    return sorted((issue.line, issue.message) for issue in report.issues)
+
+
+def test_unchanged_sections_are_reused(tmp_path):
+    source, output = tmp_path / "doc.txt", str(tmp_path / "out.csv")
+    write_text(source, DOCUMENT[:3] + DOCUMENT[3:5])
+
+    first = ingest(str(source), output, snapshot=False)
+    assert first.parsed == ["Freestyle", "Backstroke"] and first.written
+    assert read_rows(output)[0] == ["Freestyle", "1", "A swimmer stops", "No infraction", "101.5.1"]
+
+    again = ingest(str(source), output, snapshot=False)
+    assert (again.unchanged, again.parsed, again.written) == (["Freestyle", "Backstroke"], [], False)
+
+    write_text(source, DOCUMENT[:3] + DOCUMENT[3:5] + ["5. A swimmer false starts~Disqualify~101.1.2"])
+    changed = ingest(str(source), output, snapshot=False)
+    assert (changed.unchanged, changed.parsed, changed.written) == (["Freestyle"], ["Backstroke"], True)
+    assert [row[1] for row in read_rows(output)] == ["1", "2", "3", "5"]
+
+    full = ingest(str(source), output, snapshot=False, full=True)
+    assert full.parsed == ["Freestyle", "Backstroke"]
+
+
+def test_cached_issue_lines_follow_inserted_lines(tmp_path):
+    source, output = tmp_path / "doc.txt", str(tmp_path / "out.csv")
+    write_text(source, DOCUMENT)
+    first = ingest(str(source), output, snapshot=False, keep_going=True)
+    assert [line for line, _ in issue_lines(first)] == [3, 6]
+
+    # Two lines inserted into Freestyle move Backstroke's unchanged error down by two
+    write_text(source, DOCUMENT[:3] + ["", "7. A swimmer pulls~Disqualify~101.2", "8. A swimmer kicks~Disqualify~101.3"]
+               + DOCUMENT[3:])
+    moved = ingest(str(source), output, snapshot=False, keep_going=True)
+    assert moved.unchanged == ["Backstroke"]
+    assert issue_lines(moved) == issue_lines(ingest(str(source), output, snapshot=False, keep_going=True, full=True))
+    assert [line for line, message in issue_lines(moved) if "item 4" in message] == [9]
+
+
+def test_duplicate_numbers_are_errors(tmp_path):
+    source, output = tmp_path / "doc.txt", str(tmp_path / "out.csv")
+    write_text(source, DOCUMENT[:2] + ["Backstroke", "1. A swimmer turns over~Disqualify~101.4.2",
+                                       "3. A swimmer touches~No infraction~101.4.3"])
+    report = ingest(str(source), output, snapshot=False, keep_going=True)
+    assert [(issue.level, issue.message) for issue in report.issues] == [
+        ("error", "situation number 1 is used more than once")]
+    # Both rows with the number are left out
+    assert [row[1] for row in read_rows(output)] == ["3"]
+
+
+def test_nothing_is_written_while_errors_remain(tmp_path):
+    source, output = tmp_path / "doc.txt", str(tmp_path / "out.csv")
+    write_text(source, DOCUMENT)
+    report = ingest(str(source), output, snapshot=False)
+    assert any(issue.level == "error" for issue in report.issues)
+    assert not report.written
+    assert not os.path.exists(output) and not os.path.exists(state_path(output))
+
+    # Still not written (nor remembered as done) on the next run
+    assert not ingest(str(source), output, snapshot=False).written
+    assert not os.path.exists(output)
+
+    write_text(source, DOCUMENT[:5])
+    fixed = ingest(str(source), output, snapshot=False)
+    assert fixed.written and not any(issue.level == "error" for issue in fixed.issues)
+    assert [row[1] for row in read_rows(output)] == ["1", "2", "3"]
@@ -0,0 +1,110 @@
+"""Random Shuffle decks (no repeats within a pass, reproducible seeds, per-topic places)
+and Search by Number lookups (ranges, lists, unknown parts)."""
+from lookups import NumberIndex, NumberLookup, ShuffleDecks, StrokePartitions
+
+
+def make_partitions():
+    labels = list(range(30))
+    strokes = ["Freestyle" if label % 3 == 0 else "Backstroke" if label % 3 == 1 else "Butterfly"
+               for label in labels]
+    numbers = [100 + label for label in labels]
+    return StrokePartitions(labels, strokes, numbers)
+
+
+def test_draw_does_not_repeat_within_a_pass():
+    partitions = make_partitions()
+    decks = ShuffleDecks(partitions, "clinic1")
+    for stroke in ["ALL"] + partitions.topics:
+        size = len(partitions.deck(stroke))
+        for _ in range(3):
+            drawn = [decks.draw(stroke) for _ in range(size)]
+            assert sorted(drawn) == sorted(partitions.deck(stroke))
+        assert decks.progress(stroke) == (size, size, 2)
+
+
+def test_no_repeat_across_the_reshuffle():
+    decks = ShuffleDecks(make_partitions(), 7)
+    drawn = [decks.draw("Freestyle") for _ in range(200)]
+    assert all(a != b for a, b in zip(drawn, drawn[1:]))
+
+
+def test_same_seed_gives_same_order():
+    partitions = make_partitions()
+    first, second = ShuffleDecks(partitions, "clinic1"), ShuffleDecks(make_partitions(), " clinic1 ")
+    assert first.seed == second.seed == "clinic1"
+    for stroke in ["ALL", "Backstroke", "ALL", "Butterfly"]:
+        assert [first.draw(stroke) for _ in range(25)] == [second.draw(stroke) for _ in range(25)]
+
+    clinic1, clinic2 = ShuffleDecks(partitions, "clinic1"), ShuffleDecks(partitions, "clinic2")
+    assert [clinic1.draw("ALL") for _ in range(30)] != [clinic2.draw("ALL") for _ in range(30)]
+
+
+def test_blank_seed_picks_one_to_share():
+    decks = ShuffleDecks(make_partitions(), "  ")
+    assert decks.seed
+    again = ShuffleDecks(make_partitions(), decks.seed)
+    assert [decks.draw("ALL") for _ in range(10)] == [again.draw("ALL") for _ in range(10)]
+
+
+def test_switching_stroke_keeps_each_decks_place():
+    partitions = make_partitions()
+    interleaved, straight = ShuffleDecks(partitions, "s"), ShuffleDecks(partitions, "s")
+
+    free = [interleaved.draw("Freestyle") for _ in range(4)]
+    back = [interleaved.draw("Backstroke") for _ in range(3)]
+    free += [interleaved.draw("Freestyle") for _ in range(6)]
+    back += [interleaved.draw("Backstroke") for _ in range(7)]
+
+    assert free == [straight.draw("Freestyle") for _ in range(10)]
+    assert back == [straight.draw("Backstroke") for _ in range(10)]
+    assert interleaved.progress("Freestyle") == (10, 10, 0)
+    assert interleaved.progress("Backstroke") == (10, 10, 0)
+
+
+def test_unknown_stroke_is_empty():
+    decks = ShuffleDecks(make_partitions(), "s")
+    assert decks.draw("Relay") is None
+    assert decks.progress("Relay") == (0, 0, 0)
+
+
+def make_number_index():
+    # Numbers 1-20 without 7, plus a text Number; labels are "r<number>"
+    numbers = [n for n in range(1, 21) if n != 7] + ["12A"]
+    return NumberIndex([f"r{n}" for n in numbers], numbers)
+
+
+def test_number_lookup_single_and_list():
+    index = make_number_index()
+    assert index.lookup("12") == NumberLookup(["r12"], [], [])
+    assert index.lookup(" 3, 1;15  2 ") == NumberLookup(["r3", "r1", "r15", "r2"], [], [])
+    assert index.lookup("4, 4, 3-5").rows == ["r4", "r3", "r5"]
+
+
+def test_number_lookup_ranges():
+    index = make_number_index()
+    assert index.lookup("5-9") == NumberLookup(["r5", "r6", "r8", "r9"], ["7"], [])
+    assert index.lookup("5 - 6").rows == ["r5", "r6"]
+    assert index.lookup("5–6").rows == ["r5", "r6"]
+    # Reversed ranges are turned around, and ranges are clamped to the numbers that exist
+    assert index.lookup("9-8").rows == ["r8", "r9"]
+    assert index.lookup("0-2") == NumberLookup(["r1", "r2"], [], [])
+    assert index.lookup("19-500") == NumberLookup(["r19", "r20"], [], [])
+    assert index.lookup("100-200") == NumberLookup([], ["100-200"], [])
+
+
+def test_number_lookup_unknown_parts():
+    index = make_number_index()
+    assert index.lookup("12-14, 999, abc") == NumberLookup(["r12", "r13", "r14"], ["999"], ["abc"])
+    assert index.lookup("7") == NumberLookup([], ["7"], [])
+    assert index.lookup("") == NumberLookup([], [], [])
+
+
+def test_number_lookup_text_numbers():
+    index = make_number_index()
+    assert index.lookup("12A, 12") == NumberLookup(["r12A", "r12"], [], [])
+    assert index.lookup("12a") == NumberLookup([], [], ["12a"])
+    assert index.get(" 12A ") == "r12A"
+
+
+def test_number_lookup_empty_index():
+    assert NumberIndex([], []).lookup("1-5, 3") == NumberLookup([], ["1-5", "3"], [])
@@ -0,0 +1,134 @@
+"""Write-behind attempt log: batched inserts, the per-document schema and its migration."""
+import logging
+import sqlite3
+import threading
+
+import pytest
+
+from progress_store import ProgressStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "progress.sqlite3")
+
+
+def rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT user_id, corpus, number, stroke, mode, correct FROM attempts ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_attempts_are_written_in_batches(db_path):
+    store = ProgressStore(db_path, batch_size=10, flush_interval=0.5)
+    batches = []
+    write = store._write
+    store._write = lambda conn, batch: (batches.append(len(batch)), write(conn, batch))
+    try:
+        for n in range(25):
+            store.record_attempt("sam", "Doc", n, "Freestyle", "Random Shuffle", n % 2)
+        store.flush()
+    finally:
+        store.close()
+
+    assert batches == [10, 10, 5]
+    assert store.written == 25
+    written = rows(db_path)
+    assert [number for _, _, number, _, _, _ in written] == [str(n) for n in range(25)]
+    assert written[1] == ("sam", "Doc", "1", "Freestyle", "Random Shuffle", 1)
+
+
+def test_close_writes_what_is_queued(db_path):
+    store = ProgressStore(db_path, flush_interval=0.05)
+    for n in range(5):
+        store.record_attempt("sam", "Doc", n, "Freestyle", "Sequential Review", True)
+    store.close()
+    assert len(rows(db_path)) == 5
+
+
+def test_numbers_are_kept_as_text_per_document(db_path):
+    store = ProgressStore(db_path, flush_interval=0.05)
+    try:
+        store.record_attempt("sam", "Stroke", 12, "Freestyle", "Random Shuffle", True)
+        store.record_attempt("sam", "Starter", "12a", "Starts", "Random Shuffle", False)
+        store.flush()
+    finally:
+        store.close()
+    assert rows(db_path) == [("sam", "Stroke", "12", "Freestyle", "Random Shuffle", 1),
+                             ("sam", "Starter", "12a", "Starts", "Random Shuffle", 0)]
+
+
+def test_full_queue_drops_instead_of_blocking(db_path):
+    store = ProgressStore(db_path, flush_interval=0.05, max_pending=2)
+    writing, release = threading.Event(), threading.Event()
+    write = store._write
+    store._write = lambda conn, batch: (writing.set(), release.wait(10), write(conn, batch))
+    try:
+        # Hold the writer inside its first batch, then queue more than max_pending
+        store.record_attempt("sam", "Doc", 0, "Freestyle", "Random Shuffle", True)
+        assert writing.wait(10)
+        for n in range(1, 10):
+            store.record_attempt("sam", "Doc", n, "Freestyle", "Random Shuffle", True)
+        assert store.dropped == 7
+    finally:
+        release.set()
+        store.flush()
+        store.close()
+    assert store.written == 3
+    assert [number for _, _, number, _, _, _ in rows(db_path)] == ["0", "1", "2"]
+
+
+def test_database_without_corpus_column_is_migrated(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE attempts (
+            id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, number INTEGER NOT NULL, stroke TEXT,
+            mode TEXT, correct INTEGER NOT NULL, recorded_at REAL NOT NULL
+        );
+        INSERT INTO attempts (user_id, number, stroke, mode, correct, recorded_at)
+            VALUES ('sam', 7, 'Backstroke', 'Random Shuffle', 1, 0);
+    """)
+    conn.commit()
+    conn.close()
+
+    store = ProgressStore(db_path, flush_interval=0.05)
+    try:
+        store.record_attempt("sam", "Stroke", 8, "Backstroke", "Random Shuffle", False)
+        store.record_attempt("sam", "Starter", "12a", "Starts", "Random Shuffle", True)
+        store.flush()
+    finally:
+        store.close()
+    # The old column keeps its INTEGER affinity, so "8" is stored as 8 there; text Numbers stay text
+    assert rows(db_path) == [("sam", None, 7, "Backstroke", "Random Shuffle", 1),
+                             ("sam", "Stroke", 8, "Backstroke", "Random Shuffle", 0),
+                             ("sam", "Starter", "12a", "Starts", "Random Shuffle", 1)]
+
+    conn = sqlite3.connect(db_path)
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(attempts)")}
+    # Looking a situation up by its text Number still finds it
+    found = conn.execute("SELECT count(*) FROM attempts WHERE user_id = ? AND corpus = ? AND number = ?",
+                         ("sam", "Stroke", "8")).fetchone()[0]
+    conn.close()
+    assert "attempts_user_situation" in indexes
+    assert found == 1
+
+    # Opening it again doesn't try to migrate twice
+    ProgressStore(db_path, flush_interval=0.05).close()
+
+
+def test_write_failure_is_logged(db_path, caplog):
+    store = ProgressStore(db_path, flush_interval=0.05)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE attempts")
+    conn.commit()
+    conn.close()
+    try:
+        with caplog.at_level(logging.WARNING, logger="progress_store"):
+            store.record_attempt("sam", "Doc", 1, "Freestyle", "Random Shuffle", True)
+            store.flush()
+    finally:
+        store.close()
+    assert store.written == 0
+    assert "Could not write 1 attempts" in caplog.text
@@ -0,0 +1,93 @@
+"""Search by Rule: citation parsing and the rule-number trie."""
+import pytest
+
+from rule_index import RuleIndex, format_citation, parse_citation, split_citations
+
+
+@pytest.mark.parametrize("text, paths", [
+    ("101.2", [("101", "2")]),
+    ("101.02.3", [("101", "2", "3")]),
+    ("105.1.3A", [("105", "1", "3", "A")]),
+    ("105.1.3A-B", [("105", "1", "3", "A"), ("105", "1", "3", "B")]),
+    ("105.1.3a - c", [("105", "1", "3", "A"), ("105", "1", "3", "B"), ("105", "1", "3", "C")]),
+    ("102.24.1A(1)(D)", [("102", "24", "1", "A", "(1)", "(d)")]),
+    ("Glossary", []),
+    ("“Hands Separated Interpretation”", []),
+])
+def test_parse_citation(text, paths):
+    assert parse_citation(text) == paths
+
+
+def test_dotted_and_undotted_letters_are_the_same_rule():
+    assert parse_citation("101.6.3.B(2)") == parse_citation("101.6.3B(2)") == [("101", "6", "3", "B", "(2)")]
+    assert format_citation(parse_citation("101.6.3.B(2)")[0]) == "101.6.3B(2)"
+    # A parenthesized sub-item is not a dotted sub-rule
+    assert parse_citation("101.6.3(2)") != parse_citation("101.6.3.2")
+
+
+@pytest.mark.parametrize("cell, citations", [
+    ("101.3.2, 102.1", ["101.3.2", "102.1"]),
+    ("101.3.2 and 103.5.3", ["101.3.2", "103.5.3"]),
+    ("101.3.2; 103.5.3 and 104.1, Glossary", ["101.3.2", "103.5.3", "104.1", "Glossary"]),
+    ("Stroke and Turn Interpretation", ["Stroke and Turn Interpretation"]),
+    (" , ", []),
+    (None, []),
+])
+def test_split_citations(cell, citations):
+    assert split_citations(cell) == citations
+
+
+@pytest.fixture
+def index():
+    cells = [
+        "101.2",                                  # r0
+        "101.2.3",                                # r1
+        "101.2.4; 102.1",                         # r2
+        "105.1.3A-B",                             # r3
+        "101.6.3.B(2) and 101.6.3(2)",            # r4
+        "Glossary",                               # r5
+        "“Hands Separated Interpretation” (see this link)",  # r6
+        None,                                     # r7
+        "101.20",                                 # r8
+    ]
+    return RuleIndex([f"r{pos}" for pos in range(len(cells))], cells)
+
+
+def test_prefix_and_exact_lookup(index):
+    assert index.lookup("101.2") == ["r0", "r1", "r2"]
+    assert index.lookup("101.2", exact=True) == ["r0"]
+    assert index.lookup("101.2.4") == ["r2"]
+    assert index.lookup("102.1") == ["r2"]
+    assert index.lookup("101") == ["r0", "r1", "r2", "r4", "r8"]
+    assert index.lookup("101", exact=True) == []
+    assert index.lookup("109.9") == []
+    assert index.lookup("  ") == []
+
+
+def test_ranges_and_letters(index):
+    assert index.lookup("105.1.3B") == ["r3"]
+    assert index.lookup("105.1.3C") == []
+    assert index.lookup("105.1.3") == ["r3"]
+    assert index.lookup("105.1.3", exact=True) == []
+    assert index.lookup("101.6.3B(2)") == index.lookup("101.6.3.b(2)") == ["r4"]
+    assert index.lookup("101.6.3(2)", exact=True) == ["r4"]
+
+
+@pytest.mark.parametrize("query", ["101.2.x", "101.2.X", "101.2.*", "101.2*"])
+def test_wildcard_matches_everything_under_the_rule(index, query):
+    assert index.lookup(query) == ["r0", "r1", "r2"]
+    assert index.lookup(query, exact=True) == ["r0", "r1", "r2"]
+
+
+def test_named_references(index):
+    assert index.lookup("Glossary") == ["r5"]
+    assert index.lookup("glossary") == ["r5"]
+    assert index.lookup("hands separated interpretation") == ["r6"]
+    assert index.lookup("Hands Separated") == ["r6"]
+    assert index.lookup("Relay") == []
+
+
+def test_children_of(index):
+    assert index.children_of() == ["101", "102", "105"]
+    assert index.children_of("101.2") == ["101.2.3", "101.2.4"]
+    assert index.children_of("101") == ["101.2", "101.6", "101.20"]
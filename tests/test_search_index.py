@@ -0,0 +1,105 @@
+"""Keyword Search must match exactly the rows the plain substring scan finds.
+
+Runs against the built-in Stroke & Turn workbook, with seeded random queries
+and typing sessions so failures are reproducible.
+"""
+import os
+import random
+import re
+
+import pytest
+
+from dataset import DEFAULT_SOURCE, load_dataset
+from search_index import SEARCH_FIELDS, IncrementalSearch, KeywordIndex
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELDS = list(SEARCH_FIELDS)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return load_dataset(os.path.join(APP_DIR, DEFAULT_SOURCE))
+
+
+@pytest.fixture(scope="module")
+def index(df):
+    return KeywordIndex.from_dataframe(df)
+
+
+@pytest.fixture(scope="module")
+def words(df):
+    return sorted({word for text in df["Situation"].dropna() for word in text.lower().split()})
+
+
+def random_phrase(rng, df):
+    """A run of 1-4 words (or part of one) cut from a random cell, as someone would search for it."""
+    column = rng.choice(["Situation", "Recommended resolution"])
+    text = rng.choice(df[column].dropna().tolist())
+    start = rng.randrange(len(text))
+    return text[start:start + rng.randint(1, 30)]
+
+
+def baseline_keyword_search(df, query, search_field, selected_stroke):
+    """Keyword Search as the app first did it: a pandas scan of the lower-cased column(s)."""
+    if selected_stroke != "All":
+        filtered_df = df[df['Stroke'] == selected_stroke]
+    else:
+        filtered_df = df.copy()
+
+    q = query.lower()
+    if search_field == "Situations":
+        return filtered_df[filtered_df["Situation"].str.lower().str.contains(q, na=False)]
+    elif search_field == "Resolutions":
+        return filtered_df[filtered_df["Recommended resolution"].str.lower().str.contains(q, na=False)]
+    mask = (
+        filtered_df["Situation"].str.lower().str.contains(q, na=False) |
+        filtered_df["Recommended resolution"].str.lower().str.contains(q, na=False)
+    )
+    return filtered_df[mask]
+
+
+def strokes(df):
+    return ["All"] + sorted(df["Stroke"].dropna().unique().tolist())
+
+
+def test_search_matches_baseline_scan(df, index, words):
+    # The baseline matched a regular expression; queries without regex syntax make that a plain substring test
+    rng = random.Random(1)
+    topics = strokes(df)
+    queries = ["swimmer", "false start", "Touch", "the wall", "a", "zzz", "dq", "relay take-off"]
+    queries += [re.sub(r"[^\w '-]", "", random_phrase(rng, df)) for _ in range(150)]
+    queries += [re.sub(r"[^\w '-]", "", rng.choice(words)) for _ in range(100)]
+    for query in filter(None, queries):
+        for field in FIELDS:
+            for stroke in ("All", rng.choice(topics)):
+                expected = baseline_keyword_search(df, query, field, stroke)
+                assert index.search(query, field, stroke) == [df.index.get_loc(label) for label in expected.index], \
+                    (query, field, stroke)
+
+
+def test_incremental_search_matches_fresh_search(df, index, words):
+    # Random typing sessions: type a character, backspace, paste, switch field or Stroke/Topic
+    rng = random.Random(22)
+    topics = strokes(df)
+    searcher = IncrementalSearch(index)
+    for _ in range(40):
+        query, field, stroke = "", rng.choice(FIELDS), rng.choice(topics)
+        target = random_phrase(rng, df) if rng.random() < 0.8 else rng.choice(words)
+        for _ in range(60):
+            action = rng.random()
+            if action < 0.55 and len(query) < len(target):
+                query += target[len(query)]
+            elif action < 0.7:
+                query += rng.choice("abcdefghijklmnopqrstuvwxyz '-")
+            elif action < 0.85:
+                query = query[:-rng.randint(1, 3)]
+            elif action < 0.9:
+                query = random_phrase(rng, df)
+            elif action < 0.95:
+                field = rng.choice(FIELDS)
+            else:
+                stroke = rng.choice(topics)
+            expected = index.search(query, field, stroke)
+            assert searcher.search(query, field, stroke) == expected, (query, field, stroke)
+    # Every path was taken, so the comparison covered narrowing and backspacing too
+    assert searcher.narrowed and searcher.reused and searcher.fresh